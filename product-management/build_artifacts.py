@@ -0,0 +1,150 @@
+"""
+Next.js バンドル向けの products.json ビルド成果物
+
+products.json（整形済み・レビュー用）から以下を生成する:
+  - src/data/build/products.min.json     空白なしの全商品
+  - src/data/build/category/<slug>.json  カテゴリ別シャード
+  - src/data/build/budget/<slug>.json    予算帯別シャード
+  - src/data/build/manifest.json         シャード一覧（件数・バイト数）
+
+intern=True の場合は、category / recipients / occasions / budgetRange / tags の
+文字列を先頭の "strings" 配列へのインデックスに置き換える。
+内容が変わらないファイルは書き換えない。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from json_export import load_previous
+
+CATEGORY_SLUGS = {
+    '雑貨': 'zakka',
+    'ファッション': 'fashion',
+    'コスメ': 'cosme',
+    'グルメ': 'gourmet',
+    '体験': 'experience',
+    'ガジェット': 'gadget',
+    '花・植物': 'flower',
+    'インテリア': 'interior',
+}
+
+BUDGET_SLUGS = {
+    '〜3,000円': 'under-3000',
+    '3,000〜5,000円': '3000-5000',
+    '5,000〜10,000円': '5000-10000',
+    '10,000〜20,000円': '10000-20000',
+    '20,000〜30,000円': '20000-30000',
+    '30,000円〜': 'over-30000',
+}
+
+# 文字列テーブルに置き換える項目
+INTERNED_SCALARS = ('category', 'budgetRange')
+INTERNED_LISTS = ('recipients', 'occasions', 'tags')
+
+
+def dumps_min(data: Any) -> bytes:
+    """空白なしのJSON"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def intern_products(products: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """繰り返し出現する文字列をインデックスに置き換える"""
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+
+    def ref(value: str) -> int:
+        if value not in index:
+            index[value] = len(strings)
+            strings.append(value)
+        return index[value]
+
+    interned = []
+    for product in products:
+        item = dict(product)
+        for name in INTERNED_SCALARS:
+            if isinstance(item.get(name), str):
+                item[name] = ref(item[name])
+        for name in INTERNED_LISTS:
+            if isinstance(item.get(name), list):
+                item[name] = [ref(v) for v in item[name]]
+        interned.append(item)
+    return strings, interned
+
+
+def _payload(meta: Dict[str, Any], products: List[Dict[str, Any]], intern: bool) -> bytes:
+    if intern:
+        strings, products = intern_products(products)
+        return dumps_min({**meta, 'strings': strings, 'products': products})
+    return dumps_min({**meta, 'products': products})
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """内容が変わった場合だけ書き込む"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _slug(mapping: Dict[str, str], value: str) -> str:
+    return mapping.get(value) or 'other'
+
+
+def write_build_artifacts(json_path: Path, out_dir: Path, intern: bool = False) -> List[Dict[str, Any]]:
+    """
+    products.json から最小化・シャード済みの成果物を生成する
+
+    Returns:
+        各ファイルの情報（path / products / bytes / written）
+    """
+    data = load_previous(json_path)
+    products = data.get('products', [])
+    meta = {'version': data.get('version', '1.0.0'), 'lastUpdated': data.get('lastUpdated', '')}
+    out_dir = Path(out_dir)
+
+    shards: Dict[str, List[Dict[str, Any]]] = {'products.min.json': products}
+    for product in products:
+        shards.setdefault(f"category/{_slug(CATEGORY_SLUGS, product.get('category', ''))}.json", []).append(product)
+        shards.setdefault(f"budget/{_slug(BUDGET_SLUGS, product.get('budgetRange', ''))}.json", []).append(product)
+
+    # 商品がなくなったシャードは削除
+    for stale in list(out_dir.glob('category/*.json')) + list(out_dir.glob('budget/*.json')):
+        if str(stale.relative_to(out_dir)) not in shards:
+            stale.unlink()
+
+    report = []
+    for name, shard_products in shards.items():
+        payload = _payload(meta, shard_products, intern)
+        written = write_if_changed(out_dir / name, payload)
+        report.append({'path': name, 'products': len(shard_products),
+                       'bytes': len(payload), 'written': written})
+
+    manifest = {
+        **meta,
+        'interned': intern,
+        'shards': {item['path']: {'products': item['products'], 'bytes': item['bytes']}
+                   for item in report},
+    }
+    write_if_changed(out_dir / 'manifest.json', dumps_min(manifest))
+    return report
+
+
+def format_report(report: List[Dict[str, Any]], source_bytes: int) -> str:
+    """シャードごとのバイト数一覧"""
+    lines = []
+    for item in report:
+        mark = '✏️ ' if item['written'] else '  '
+        lines.append(f"   {mark}{item['path']:<32} {item['products']:>5}件 {item['bytes'] / 1024:>8.1f}KB")
+    total = next((item['bytes'] for item in report if item['path'] == 'products.min.json'), 0)
+    if source_bytes:
+        lines.append(f"   products.json {source_bytes / 1024:.1f}KB → products.min.json "
+                     f"{total / 1024:.1f}KB ({total / source_bytes:.0%})")
+    return '\n'.join(lines)
@@ -0,0 +1,206 @@
+"""
+商品名からカテゴリを推定する文字n-gram TF-IDF 分類モデル
+
+キーワードルール（category_rules.json）に1つも当てはまらない商品名は「雑貨」に
+なってしまうため、カテゴリが入力済みの商品名から学習したモデルで補う。
+
+  - 正規化した商品名の文字1〜3-gramをTF-IDFで重み付けし、カテゴリごとの重心と
+    コサイン類似度を比較する（最近傍重心法）
+  - 類似度をそのまま確信度として返す。学習データにない文字が多いほど低くなるので、
+    呼び出し側は確信度が低ければルールによる判定に戻す
+  - モデルはJSONで保存し、推定結果は正規化した商品名ごとにメモ化する
+
+使い方:
+  python3 category_model.py --bench   # 学習・読み込み・推定の速度を測る
+"""
+
+import json
+import math
+import os
+import sys
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+MODEL_VERSION = 1
+NGRAM_SIZES = (1, 2, 3)
+WEIGHT_DIGITS = 6  # 保存時の重みの桁数（ファイルサイズ削減）
+
+Prediction = Tuple[str, float]  # (カテゴリ, 確信度 0〜1)
+
+
+def normalize_name(name: str) -> str:
+    """全角・半角や大文字・小文字、空白の違いをならす"""
+    return ' '.join(unicodedata.normalize('NFKC', name).lower().split())
+
+
+def char_ngrams(text: str) -> Counter:
+    """文字n-gramの出現回数"""
+    grams = Counter()
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram.strip():
+                grams[gram] += 1
+    return grams
+
+
+class CategoryModel:
+    """学習済みのカテゴリ分類モデル"""
+
+    def __init__(self, categories: List[str], idf: Dict[str, float],
+                 weights: Dict[str, List[Tuple[int, float]]], samples: int):
+        self.categories = categories
+        self.idf = idf
+        self.weights = weights  # n-gram → [(カテゴリ番号, 重心の重み)]（転置インデックス）
+        self.samples = samples
+        # 学習データにないn-gramのIDF（最大値）
+        self.unseen_idf = math.log(1 + samples) + 1
+        self._memo: Dict[str, Prediction] = {}
+
+    # --- 学習 ---
+
+    @classmethod
+    def train(cls, names: List[str], labels: List[str]) -> 'CategoryModel':
+        """商品名とカテゴリの組から学習"""
+        docs = [char_ngrams(normalize_name(name)) for name in names]
+        samples = len(docs)
+
+        df = Counter()
+        for grams in docs:
+            df.update(grams.keys())
+        idf = {gram: math.log((1 + samples) / (1 + count)) + 1 for gram, count in df.items()}
+
+        categories = sorted(set(labels))
+        category_index = {c: i for i, c in enumerate(categories)}
+        centroids: List[Counter] = [Counter() for _ in categories]
+        for grams, label in zip(docs, labels):
+            centroids[category_index[label]].update(_normalize(_tfidf(grams, idf, 0.0)))
+
+        weights: Dict[str, List[Tuple[int, float]]] = {}
+        for i, centroid in enumerate(centroids):
+            for gram, w in _normalize(centroid).items():
+                weights.setdefault(gram, []).append((i, w))
+        return cls(categories, idf, weights, samples)
+
+    # --- 保存・読み込み ---
+
+    def save(self, path: Path):
+        """JSONで保存（一時ファイルに書いてからrenameで置き換える）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': MODEL_VERSION,
+            'ngramSizes': list(NGRAM_SIZES),
+            'samples': self.samples,
+            'categories': self.categories,
+            'idf': {g: round(v, WEIGHT_DIGITS) for g, v in self.idf.items()},
+            'weights': {g: [[i, round(w, WEIGHT_DIGITS)] for i, w in entries]
+                        for g, entries in self.weights.items()},
+        }
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'CategoryModel':
+        """
+        保存したモデルを読み込む
+
+        Raises:
+            ValueError: 形式・バージョンが異なる場合
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != MODEL_VERSION or data.get('ngramSizes') != list(NGRAM_SIZES):
+            raise ValueError(f'モデルの形式が異なります: {path}')
+        weights = {g: [(i, w) for i, w in entries] for g, entries in data['weights'].items()}
+        return cls(data['categories'], data['idf'], weights, data['samples'])
+
+    # --- 推定 ---
+
+    def _predict_normalized(self, text: str) -> Prediction:
+        vector = _tfidf(char_ngrams(text), self.idf, self.unseen_idf)
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if not norm:
+            return '', 0.0
+
+        scores = [0.0] * len(self.categories)
+        for gram, w in vector.items():
+            for i, centroid_weight in self.weights.get(gram, ()):
+                scores[i] += w * centroid_weight
+        best = max(range(len(scores)), key=scores.__getitem__, default=None)
+        if best is None or scores[best] <= 0:
+            return '', 0.0
+        return self.categories[best], min(scores[best] / norm, 1.0)
+
+    def predict(self, name: str) -> Prediction:
+        """商品名から (カテゴリ, 確信度) を推定（当てはまるものがなければ ('', 0.0)）"""
+        text = normalize_name(name)
+        if text not in self._memo:
+            self._memo[text] = self._predict_normalized(text)
+        return self._memo[text]
+
+    def predict_many(self, names: Iterable[str]) -> List[Prediction]:
+        """複数の商品名をまとめて推定"""
+        return [self.predict(name) for name in names]
+
+
+def _tfidf(grams: Counter, idf: Dict[str, float], unseen_idf: float) -> Dict[str, float]:
+    """出現回数を対数で抑えたTF × IDF"""
+    return {gram: (1 + math.log(count)) * idf.get(gram, unseen_idf) for gram, count in grams.items()}
+
+
+def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {g: w / norm for g, w in vector.items()}
+
+
+# --- ベンチマーク ---
+
+def run_benchmark(count: int = 5000):
+    """ルールで付けたカテゴリを正解として、学習・保存・読み込み・推定の速度を測る"""
+    import tempfile
+    from category_rules import RULES, generate_names
+
+    names = generate_names(RULES.rules, count * 2)
+    labels = RULES.categories_for(names)
+    train_names, test_names = names[:count], names[count:]
+
+    started = time.perf_counter()
+    model = CategoryModel.train(train_names, labels[:count])
+    train_time = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'category_model.json'
+        model.save(path)
+        size = path.stat().st_size
+        started = time.perf_counter()
+        model = CategoryModel.load(path)
+        load_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predictions = model.predict_many(test_names)
+    predict_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.predict_many(test_names)
+    memo_time = time.perf_counter() - started
+
+    correct = sum(p == label for (p, _), label in zip(predictions, labels[count:]))
+    print(f"学習        {count:>6,}件 {train_time * 1000:>8.1f}ms")
+    print(f"保存サイズ              {size / 1024:>8.1f}KB")
+    print(f"読み込み                {load_time * 1000:>8.1f}ms")
+    print(f"推定        {count:>6,}件 {predict_time * 1000:>8.1f}ms  {count / predict_time:>10,.0f}件/秒")
+    print(f"推定(メモ)  {count:>6,}件 {memo_time * 1000:>8.1f}ms  {count / memo_time:>10,.0f}件/秒")
+    print(f"ルールとの一致率        {correct / count:>8.1%}")
+
+
+if __name__ == '__main__':
+    if '--bench' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    run_benchmark()
@@ -0,0 +1,180 @@
+"""
+カテゴリ・贈る相手・シーンの判定ルール
+
+ルールは category_rules.json に定義し、読み込み時に1つの正規表現へコンパイルする。
+キーワードをカテゴリの優先順に並べた先読み付きの選択（(?=(kw1|kw2|...))）で
+商品名を1回だけ走査し、見つかったキーワードのうち最も優先順の高いカテゴリを採用する。
+同じ位置から複数のキーワードが始まる場合も優先順の高いものが選ばれるため、
+従来の「上から順に any(kw in name) を試す」判定と必ず同じ結果になる。
+
+使い方:
+  python3 category_rules.py --bench   # 従来方式との一致確認とベンチマーク
+"""
+
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RULES_PATH = Path(__file__).parent / 'category_rules.json'
+
+# 一括判定で商品名をつなぐ区切り（キーワードに含まれない文字）
+BATCH_SEPARATOR = '\n'
+
+
+class CategoryRules:
+    """コンパイル済みの判定ルール"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.rules = rules
+        self.categories: List[str] = [c['name'] for c in rules['categories']]
+        self.default_category: str = rules['defaultCategory']
+
+        # キーワード → カテゴリの優先順位（先に書かれたカテゴリを優先）
+        # 従来どおり小文字化した商品名とキーワードをそのまま比較する
+        self.keyword_rank: Dict[str, int] = {}
+        for rank, category in enumerate(rules['categories']):
+            for keyword in category['keywords']:
+                self.keyword_rank.setdefault(keyword, rank)
+
+        ordered = sorted(self.keyword_rank, key=lambda kw: (self.keyword_rank[kw], -len(kw)))
+        self.pattern = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))')
+
+        self.recipients_by_category: Dict[str, str] = {}
+        for rule in rules['recipients']:
+            for category in rule['categories']:
+                self.recipients_by_category.setdefault(category, rule['recipients'])
+        self.default_recipients: str = rules['defaultRecipients']
+
+        self.occasion_thresholds = sorted(
+            ((rule['minPrice'], rule['occasions']) for rule in rules['occasions']), reverse=True)
+        self.default_occasions: str = rules['defaultOccasions']
+        self.category_occasions: Dict[str, str] = rules['categoryOccasions']
+
+    @classmethod
+    def load(cls, path: Path = RULES_PATH) -> 'CategoryRules':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _rank_to_category(self, rank: Optional[int]) -> str:
+        return self.default_category if rank is None else self.categories[rank]
+
+    def category(self, name: str) -> str:
+        """商品名からカテゴリを判定"""
+        best = None
+        for match in self.pattern.finditer(name.lower()):
+            rank = self.keyword_rank[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return self._rank_to_category(best)
+
+    def categories_for(self, names: List[str]) -> List[str]:
+        """
+        複数の商品名を一括判定
+
+        商品名を区切り文字でつないで正規表現を1回だけ走査し、
+        マッチ位置から元の商品を特定する。
+        """
+        lowered = [name.lower() for name in names]  # lower() で文字数が変わる場合があるため先に変換
+        text = BATCH_SEPARATOR.join(lowered)
+        starts = []
+        offset = 0
+        for name in lowered:
+            starts.append(offset)
+            offset += len(name) + len(BATCH_SEPARATOR)
+
+        best: List[Optional[int]] = [None] * len(names)
+        row = 0
+        for match in self.pattern.finditer(text):
+            pos = match.start()
+            while row + 1 < len(starts) and starts[row + 1] <= pos:
+                row += 1
+            rank = self.keyword_rank[match.group(1)]
+            if best[row] is None or rank < best[row]:
+                best[row] = rank
+        return [self._rank_to_category(rank) for rank in best]
+
+    def recipients(self, category: str) -> str:
+        """カテゴリから贈る相手を判定"""
+        return self.recipients_by_category.get(category, self.default_recipients)
+
+    def occasions(self, category: str, price: int) -> str:
+        """価格とカテゴリからシーンを判定"""
+        occasions = self.default_occasions
+        for min_price, value in self.occasion_thresholds:
+            if price >= min_price:
+                occasions = value
+                break
+        extra = self.category_occasions.get(category)
+        return f'{occasions},{extra}' if extra else occasions
+
+
+# --- 従来方式との一致確認・ベンチマーク ---
+
+def legacy_category(rules: Dict[str, Any], name: str) -> str:
+    """従来の judge_category と同じ、カテゴリごとの any(kw in name) の連鎖"""
+    name_lower = name.lower()
+    for category in rules['categories']:
+        if any(kw in name_lower for kw in category['keywords']):
+            return category['name']
+    return rules['defaultCategory']
+
+
+def generate_names(rules: Dict[str, Any], count: int, seed: int = 0) -> List[str]:
+    """ベンチマーク用の商品名（キーワードを含むもの・含まないものを混ぜる）"""
+    rng = random.Random(seed)
+    keywords = [kw for c in rules['categories'] for kw in c['keywords']]
+    fillers = ['ギフトセット', 'プレミアム', '限定', 'BOX', 'オーガニック', '名入れ', 'ペア', 'Mini']
+    names = []
+    for _ in range(count):
+        parts = rng.sample(fillers, 3) + rng.sample(keywords, rng.randint(0, 2))
+        rng.shuffle(parts)
+        names.append(' '.join(parts))
+    return names
+
+
+def run_benchmark(count: int = 20000):
+    compiled = RULES
+    names = generate_names(compiled.rules, count)
+
+    mismatches = [n for n in names if legacy_category(compiled.rules, n) != compiled.category(n)]
+    batch = compiled.categories_for(names)
+    mismatches += [n for n, c in zip(names, batch) if legacy_category(compiled.rules, n) != c]
+    if mismatches:
+        print(f"❌ 従来方式と一致しない商品名: {mismatches[:5]}")
+        sys.exit(1)
+    print(f"✅ {count:,}件すべて従来方式と一致しました\n")
+
+    timings = {}
+    started = time.perf_counter()
+    for name in names:
+        legacy_category(compiled.rules, name)
+    timings['従来方式（any の連鎖）'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name in names:
+        compiled.category(name)
+    timings['コンパイル済み（1件ずつ）'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compiled.categories_for(names)
+    timings['コンパイル済み（一括）'] = time.perf_counter() - started
+
+    base = timings['従来方式（any の連鎖）']
+    for label, elapsed in timings.items():
+        print(f"{label:<20} {elapsed * 1000:>8.1f}ms  {count / elapsed:>12,.0f}件/秒  {base / elapsed:>5.1f}x")
+
+
+RULES = CategoryRules.load()
+
+
+if __name__ == '__main__':
+    if '--bench' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    run_benchmark()
@@ -0,0 +1,84 @@
+"""
+中断・再開できる処理のためのチェックポイントジャーナル
+
+処理の済んだ項目を1行1件のJSONとして追記していく（JSON Lines）。
+追記のたびに fsync するため、途中で強制終了しても書き込み済みの行は失われない。
+書き込み途中で終了した最後の1行は読み込み時に切り捨てる。
+
+1行目は対象（CSV / ストアなど）を表すヘッダーで、対象が変わっていれば
+古いジャーナルとして削除する。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+
+class CheckpointJournal:
+    """キーごとに最新の記録を残す追記型ジャーナル"""
+
+    def __init__(self, path: Path, source: str):
+        self.path = Path(path)
+        self.source = source
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        記録済みの項目（キー → 最後に書いた内容）
+
+        対象が異なるジャーナルは削除して空として扱う。書き込み途中の最後の行は
+        以降の追記とつながらないように切り詰める。
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'rb+') as f:
+                header = json.loads(f.readline() or b'{}')
+                if header.get('source') != self.source:
+                    raise ValueError('source mismatch')
+                offset = f.tell()
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        f.truncate(offset)
+                        break
+                    entries[entry['key']] = entry
+                    offset += len(line)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError):
+            self.clear()
+            return {}
+        return entries
+
+    def extend(self, entries: Iterable[Dict[str, Any]]):
+        """項目をまとめて追記（'key' が必須）"""
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        if not lines:
+            return
+        with self._lock:
+            new = not self.path.exists()
+            if new:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if new:
+                    f.write(json.dumps({'source': self.source}, ensure_ascii=False) + '\n')
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, entry: Dict[str, Any]):
+        self.extend([entry])
+
+    def clear(self):
+        """処理が完了したらジャーナルを削除"""
+        with self._lock:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
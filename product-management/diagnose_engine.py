@@ -0,0 +1,329 @@
+"""
+商品マッチングエンジン（src/lib/diagnose/engine.ts のPython版）
+
+match_products / get_relaxed_matches は engine.ts と同じ判定・並び順を返す参照実装。
+BitsetEngine は同じ結果をビット演算で求める高速版で、SEO用の結果ページの
+事前生成など、全組み合わせを評価するバッチ処理で使う。
+
+使い方:
+  python3 diagnose_engine.py --bench   # engine.ts との一致確認とベンチマーク
+
+engine.ts の期待値は engine_vectors.json（固定の商品カタログ × 全フィルタの組み合わせ）。
+engine.ts を変更したら node scripts/engine-parity-vectors.js で作り直す。
+"""
+
+import json
+import random
+from bisect import bisect_right
+from pathlib import Path
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# src/types/product.ts と同期する
+RECIPIENTS = ['彼氏', '彼女', '夫', '妻', '父', '母', '友人男性', '友人女性', '上司', '同僚', '子供']
+OCCASIONS = [
+    '誕生日', 'クリスマス', 'バレンタイン', 'ホワイトデー', '母の日', '父の日', '結婚祝い',
+    '出産祝い', '引っ越し祝い', '就職祝い', '退職祝い', 'お礼', '記念日',
+]
+BUDGET_RANGES = [
+    '〜3,000円', '3,000〜5,000円', '5,000〜10,000円',
+    '10,000〜20,000円', '20,000〜30,000円', '30,000円〜',
+]
+
+Product = Dict[str, Any]
+Filters = Dict[str, Optional[str]]  # recipient / occasion / budgetRange
+
+
+# 予算帯の境界（BUDGET_RANGES[i + 1] の下限）。engine.ts の getBudgetRangeFromPrice と同期する
+BUDGET_BOUNDARIES = [3000, 5000, 10000, 20000, 30000]
+
+
+def get_budget_range_from_price(price: int) -> str:
+    """価格から予算帯を判定（getBudgetRangeFromPrice）"""
+    return BUDGET_RANGES[bisect_right(BUDGET_BOUNDARIES, price)]
+
+
+def budget_indexes_for(prices: List[int]) -> List[int]:
+    """
+    価格の列を予算帯のインデックスの列に変換
+
+    numpy.searchsorted(BUDGET_BOUNDARIES, prices, side='right') と同じ結果。
+    同じ価格が多いため、異なる価格ごとに1回だけ二分探索する。
+    """
+    buckets = {price: bisect_right(BUDGET_BOUNDARIES, price) for price in set(prices)}
+    return [buckets[price] for price in prices]
+
+
+def _sort_by_priority(products: List[Product]) -> List[Product]:
+    # Array.prototype.sort と同じく安定ソート
+    return sorted(products, key=lambda p: -p['priority'])
+
+
+def match_products(products: List[Product], filters: Filters) -> List[Product]:
+    """フィルタ条件に基づいて商品をマッチング（matchProducts）"""
+    recipient = filters.get('recipient')
+    occasion = filters.get('occasion')
+    budget_range = filters.get('budgetRange')
+
+    matched = []
+    for p in products:
+        if not p['isPublished']:
+            continue
+        if recipient and recipient not in p['recipients']:
+            continue
+        if occasion and occasion not in p['occasions']:
+            continue
+        if budget_range and get_budget_range_from_price(p['price']) != budget_range:
+            continue
+        matched.append(p)
+    return _sort_by_priority(matched)
+
+
+def get_relaxed_matches(products: List[Product], filters: Filters,
+                        exclude_ids: List[str], limit: int = 3) -> List[Product]:
+    """予算条件を外して追加候補を取得（getRelaxedMatches）"""
+    relaxed = match_products(
+        [p for p in products if p['id'] not in exclude_ids],
+        {'recipient': filters.get('recipient'), 'occasion': filters.get('occasion')},
+    )
+    return relaxed[:limit]  # slice(0, limit) と同じ挙動
+
+
+def generate_result_id(filters: Filters) -> str:
+    """
+    結果IDを生成（generateResultId）
+
+    JSON.stringify と同じく、値がNoneのキーは含めない（undefined扱い）。
+    """
+    data = json.dumps({k: v for k, v in filters.items() if v is not None},
+                      ensure_ascii=False, separators=(',', ':'))
+    encoded = data.encode('utf-16-le')  # charCodeAt はUTF-16のコード単位
+
+    hash_value = 0
+    for i in range(0, len(encoded), 2):
+        char = encoded[i] | (encoded[i + 1] << 8)
+        hash_value = ((hash_value << 5) - hash_value + char) & 0xFFFFFFFF
+    if hash_value >= 0x80000000:  # 32bit符号付き整数に変換
+        hash_value -= 0x100000000
+
+    return _to_base36(abs(hash_value))
+
+
+def _to_base36(value: int) -> str:
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if value == 0:
+        return '0'
+    result = ''
+    while value:
+        value, rem = divmod(value, 36)
+        result = digits[rem] + result
+    return result
+
+
+class BitsetEngine:
+    """
+    ビットセットによるマッチング
+
+    公開中の商品を優先度順に1回だけ並べ、贈る相手・シーン・予算帯ごとに
+    「該当する商品のビット」を持つ整数を作っておく。フィルタはビットANDで、
+    結果は下位ビットから取り出すだけで優先度順になる。
+    """
+
+    def __init__(self, products: List[Product]):
+        self.products = _sort_by_priority([p for p in products if p['isPublished']])
+        self.all_mask = (1 << len(self.products)) - 1
+        positions: Dict[str, Dict[str, List[int]]] = {
+            'recipient': {}, 'occasion': {}, 'budget': {}, 'id': {},
+        }
+        for i, p in enumerate(self.products):
+            for r in p['recipients']:
+                positions['recipient'].setdefault(r, []).append(i)
+            for o in p['occasions']:
+                positions['occasion'].setdefault(o, []).append(i)
+            positions['budget'].setdefault(get_budget_range_from_price(p['price']), []).append(i)
+            positions['id'].setdefault(p['id'], []).append(i)
+
+        self.recipient_masks = self._build_masks(positions['recipient'])
+        self.occasion_masks = self._build_masks(positions['occasion'])
+        self.budget_masks = self._build_masks(positions['budget'])
+        self.id_positions = positions['id']  # 除外はクエリ時に数件だけなのでマスクは作らない
+
+    def _build_masks(self, positions: Dict[str, List[int]]) -> Dict[str, int]:
+        # 1ビットずつ OR すると巨大な整数の再生成が商品数分発生するため、バイト列から一度に作る
+        size = (len(self.products) + 7) // 8
+        masks = {}
+        for value, indexes in positions.items():
+            buf = bytearray(size)
+            for i in indexes:
+                buf[i >> 3] |= 1 << (i & 7)
+            masks[value] = int.from_bytes(buf, 'little')
+        return masks
+
+    def mask(self, filters: Filters, relaxed: bool = False) -> int:
+        """フィルタに該当する商品のビット（relaxed=Trueなら予算条件なし）"""
+        mask = self.all_mask
+        if filters.get('recipient'):
+            mask &= self.recipient_masks.get(filters['recipient'], 0)
+        if filters.get('occasion'):
+            mask &= self.occasion_masks.get(filters['occasion'], 0)
+        if not relaxed and filters.get('budgetRange'):
+            mask &= self.budget_masks.get(filters['budgetRange'], 0)
+        return mask
+
+    def _take(self, mask: int, limit: Optional[int] = None) -> List[Product]:
+        # 2進文字列に一度だけ変換し、立っているビットを下位から探す
+        bits = bin(mask)[:1:-1]
+        result = []
+        i = bits.find('1')
+        while i >= 0 and (limit is None or len(result) < limit):
+            result.append(self.products[i])
+            i = bits.find('1', i + 1)
+        return result
+
+    def match(self, filters: Filters) -> List[Product]:
+        """match_products と同じ結果"""
+        return self._take(self.mask(filters))
+
+    def relaxed_matches(self, filters: Filters, exclude_ids: List[str], limit: int = 3) -> List[Product]:
+        """get_relaxed_matches と同じ結果"""
+        mask = self.mask(filters, relaxed=True)
+        for product_id in exclude_ids:
+            for i in self.id_positions.get(product_id, ()):
+                mask &= ~(1 << i)
+        if limit < 0:
+            return self._take(mask)[:limit]
+        return self._take(mask, limit)
+
+    def count(self, filters: Filters) -> int:
+        """マッチ件数（リストを作らずに数える）"""
+        return bin(self.mask(filters)).count('1')
+
+
+# --- engine.ts との一致確認・ベンチマーク ---
+
+# node scripts/engine-parity-vectors.js で engine.ts を実行して得た期待値
+VECTORS_PATH = Path(__file__).parent / 'engine_vectors.json'
+
+
+def generate_products(count: int, seed: int = 0) -> List[Product]:
+    """ベンチマーク用のランダムな商品データ"""
+    rng = random.Random(seed)
+    return [{
+        'id': f'prod_{i:06d}',
+        'price': rng.randint(500, 50000),
+        'priority': rng.choice([80, 85, 90, 95]),
+        'isPublished': rng.random() < 0.9,
+        'recipients': rng.sample(RECIPIENTS, rng.randint(1, 5)),
+        'occasions': rng.sample(OCCASIONS, rng.randint(1, 6)),
+    } for i in range(count)]
+
+
+def all_filters() -> List[Filters]:
+    """未指定を含む全フィルタの組み合わせ"""
+    return [
+        {'recipient': r, 'occasion': o, 'budgetRange': b}
+        for r in [None] + RECIPIENTS
+        for o in [None] + OCCASIONS
+        for b in [None] + BUDGET_RANGES
+    ]
+
+
+def check_engine_vectors(path: Path = VECTORS_PATH) -> List[str]:
+    """参照実装とBitsetEngineを engine.ts の出力と比較（不一致の説明を返す）"""
+    with open(path, encoding='utf-8') as f:
+        vectors = json.load(f)
+
+    errors = []
+    for key, values in (('recipients', RECIPIENTS), ('occasions', OCCASIONS),
+                        ('budgetRanges', BUDGET_RANGES)):
+        if vectors[key] != values:
+            errors.append(f'{key} が src/types/product.ts と異なります')
+    for price, expected_budget in vectors['budgets']:
+        if get_budget_range_from_price(price) != expected_budget:
+            errors.append(f'budget {price}')
+
+    products = vectors['products']
+    engine = BitsetEngine(products)
+    for case in vectors['cases']:
+        filters = case['filters']
+        expected = case['match']
+        if [p['id'] for p in match_products(products, filters)] != expected:
+            errors.append(f'match（参照実装） {filters}')
+        if [p['id'] for p in engine.match(filters)] != expected:
+            errors.append(f'match（BitsetEngine） {filters}')
+        # ResultContent.tsx と同じく、3件未満のときだけ緩和マッチを求める
+        if case['relaxed'] is not None:
+            limit = 3 - len(expected)
+            relaxed = get_relaxed_matches(products, filters, expected, limit)
+            if [p['id'] for p in relaxed] != case['relaxed']:
+                errors.append(f'relaxed（参照実装） {filters}')
+            relaxed = engine.relaxed_matches(filters, expected, limit)
+            if [p['id'] for p in relaxed] != case['relaxed']:
+                errors.append(f'relaxed（BitsetEngine） {filters}')
+        if generate_result_id(filters) != case['resultId']:
+            errors.append(f'result id {filters}')
+    return errors
+
+
+def check_parity(products: List[Product]) -> List[str]:
+    """参照実装とBitsetEngineの結果を全組み合わせで比較（不一致の説明を返す）"""
+    engine = BitsetEngine(products)
+    errors = []
+    for filters in all_filters():
+        expected = [p['id'] for p in match_products(products, filters)]
+        actual = [p['id'] for p in engine.match(filters)]
+        if expected != actual:
+            errors.append(f'match {filters}')
+        limit = 3 - len(expected)
+        expected_relaxed = [p['id'] for p in get_relaxed_matches(products, filters, expected, limit)]
+        actual_relaxed = [p['id'] for p in engine.relaxed_matches(filters, expected, limit)]
+        if expected_relaxed != actual_relaxed:
+            errors.append(f'relaxed {filters}')
+    return errors
+
+
+def run_benchmark(sizes=(1_000, 10_000, 100_000), queries: int = 200):
+    """参照実装とBitsetEngineの速度比較"""
+    print(f"{'商品数':>8} {'構築':>10} {'参照実装/件':>14} {'ビットセット/件':>16} {'倍率':>8}")
+    for size in sizes:
+        products = generate_products(size)
+        filters_list = random.Random(1).sample(all_filters(), queries)
+
+        started = time.perf_counter()
+        engine = BitsetEngine(products)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for filters in filters_list:
+            match_products(products, filters)
+        reference = (time.perf_counter() - started) / queries
+
+        started = time.perf_counter()
+        for filters in filters_list:
+            engine.match(filters)
+        bitset = (time.perf_counter() - started) / queries
+
+        print(f"{size:>8,} {build * 1000:>8.1f}ms {reference * 1000:>12.3f}ms "
+              f"{bitset * 1000:>14.3f}ms {reference / bitset:>7.1f}x")
+
+
+if __name__ == '__main__':
+    if '--bench' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+
+    print("🔍 engine.ts との一致確認...")
+    errors = check_engine_vectors()
+    if errors:
+        print(f"❌ engine_vectors.json: {len(errors)}件の不一致 {errors[:5]}")
+        sys.exit(1)
+
+    print("🔍 参照実装とBitsetEngineの一致確認...")
+    for size in (0, 5, 300):
+        errors = check_parity(generate_products(size, seed=size))
+        if errors:
+            print(f"❌ {size}件: {len(errors)}件の不一致 {errors[:5]}")
+            sys.exit(1)
+    print("✅ 全組み合わせで一致しました\n")
+    run_benchmark()
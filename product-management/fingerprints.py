@@ -0,0 +1,188 @@
+"""
+商品ページのフィンガープリント（変更検出）
+
+URLごとに、取得した本文のダイジェストと、抽出した項目（商品名・価格）のハッシュを保存する。
+本文のダイジェストは、どのコマンドで取得しても「パーサーが読んだ先頭部分（打ち切るまで）」の
+SHA-256 とそのバイト数（"<sha256>:<バイト数>"）。接続の再利用のために読み捨てた残りは含めない。
+本文は広告や在庫表示などで頻繁に変わるため、後段の処理（カテゴリ判定・JSONエクスポートなど）を
+やり直すかどうかは抽出した項目のハッシュで判断する。
+
+後段の処理は「どのハッシュまで処理したか」をステージごとに記録し、ハッシュが変わった
+URLの商品だけを処理し直す。
+
+保存形式（.cache/fingerprints.json）:
+  {"version": 1, "urls": {URL: {"bodyDigest", "fieldsHash", "fields", "status", "error",
+                                "checkedAt", "changedAt", "stages": {ステージ: fieldsHash}}}}
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FINGERPRINT_VERSION = 1
+
+# 後段の処理（ステージ）
+STAGE_JUDGE = 'judge'
+STAGE_EXPORT = 'export'
+STAGE_LABELS = {STAGE_JUDGE: 'カテゴリ判定', STAGE_EXPORT: 'JSONエクスポート'}
+
+# 商品の状態
+FRESH = 'fresh'
+STALE = 'stale'
+FAILED = 'failed'
+
+
+def format_digest(sha256_hex: str, size: int) -> str:
+    """本文のダイジェストの表記（読んだバイト数つき）"""
+    return f'{sha256_hex}:{size}'
+
+
+def body_digest(prefix: bytes) -> str:
+    """パーサーが読んだ本文の先頭部分のダイジェスト"""
+    return format_digest(hashlib.sha256(prefix).hexdigest(), len(prefix))
+
+
+def fields_hash(fields: Dict[str, Any]) -> str:
+    """抽出した項目のハッシュ（キーの順序によらない）"""
+    text = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class FingerprintStore:
+    """URLごとのフィンガープリントとステージごとの処理済みハッシュ"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._touched = set()  # このプロセスで更新したURL
+        self._lock = threading.RLock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data['urls'] if data.get('version') == FINGERPRINT_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(url)
+
+    def record(self, url: str, digest: str, fields: Dict[str, Any]) -> bool:
+        """
+        取得結果を記録
+
+        抽出できなかった項目（空・0）は前回の値を引き継ぐ（価格だけを取り直す場合など）。
+
+        Returns:
+            抽出した項目が前回から変わったか（初回はTrue）
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._load().setdefault(url, {'stages': {}})
+            merged = dict(entry.get('fields', {}))
+            merged.update((k, v) for k, v in fields.items() if v)
+            new_hash = fields_hash(merged)
+            changed = new_hash != entry.get('fieldsHash')
+            entry.update({
+                'bodyDigest': digest,
+                'fieldsHash': new_hash,
+                'fields': merged,
+                'status': 'ok',
+                'error': '',
+                'checkedAt': now,
+            })
+            if changed:
+                entry['changedAt'] = now
+            self._touched.add(url)
+            return changed
+
+    def record_failure(self, url: str, error: str):
+        """取得に失敗したことを記録（前回のフィンガープリントは残す）"""
+        with self._lock:
+            entry = self._load().setdefault(url, {'stages': {}})
+            entry.update({'status': 'failed', 'error': error, 'checkedAt': time.time()})
+            self._touched.add(url)
+
+    def changed_since(self, url: str, stage: str) -> bool:
+        """ステージで処理した後に項目が変わったか（未取得のURLはFalse）"""
+        with self._lock:
+            entry = self._load().get(url)
+            return bool(entry and entry.get('fieldsHash')
+                        and entry['stages'].get(stage) != entry['fieldsHash'])
+
+    def mark(self, urls: Iterable[str], stage: str):
+        """ステージで現在のフィンガープリントまで処理したことを記録"""
+        with self._lock:
+            entries = self._load()
+            for url in urls:
+                entry = entries.get(url)
+                if entry and entry.get('fieldsHash') and entry['stages'].get(stage) != entry['fieldsHash']:
+                    entry['stages'][stage] = entry['fieldsHash']
+                    self._touched.add(url)
+
+    def status(self, urls: List[str], stages: Iterable[str], stale_after: float,
+               now: Optional[float] = None) -> Tuple[str, List[str]]:
+        """
+        商品（のURL群）の状態と理由（ネットワークにはアクセスしない）
+
+        Returns:
+            (FRESH / STALE / FAILED, 理由のリスト)
+        """
+        now = time.time() if now is None else now
+        reasons = []
+        failed = []
+        with self._lock:
+            entries = self._load()
+            for url in urls:
+                entry = entries.get(url)
+                if entry is None or not entry.get('checkedAt'):
+                    reasons.append('未取得')
+                    continue
+                if entry.get('status') == 'failed':
+                    failed.append(entry.get('error') or '取得失敗')
+                    continue
+                age_days = (now - entry['checkedAt']) / 86400
+                if now - entry['checkedAt'] > stale_after:
+                    reasons.append(f'{age_days:.0f}日前に取得')
+                for stage in stages:
+                    if entry['stages'].get(stage) != entry.get('fieldsHash'):
+                        reasons.append(f'ページの変更が未反映（{STAGE_LABELS.get(stage, stage)}）')
+
+        if failed and len(failed) == len(urls):
+            return FAILED, failed
+        if reasons or failed:
+            return STALE, list(dict.fromkeys(reasons + failed))
+        return FRESH, []
+
+    def save(self):
+        """
+        変更があれば保存（一時ファイルに書いてからrenameで置き換える）
+
+        他のプロセスが保存した内容を読み直し、このプロセスで更新したURLだけを上書きする。
+        同時に保存しうる場合は呼び出し側でロックを取る。
+        """
+        with self._lock:
+            if not self._touched:
+                return
+            entries = self._read()
+            for url in self._touched:
+                entries[url] = self._entries[url]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': FINGERPRINT_VERSION, 'urls': entries},
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._entries = entries
+            self._touched.clear()
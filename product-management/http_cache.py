@@ -0,0 +1,258 @@
+"""
+商品ページ取得用のディスクキャッシュ
+
+URLのハッシュをキーに、本文・レスポンスヘッダー・取得時刻を保存する。
+TTL内はネットワークに出ずにキャッシュを返し、TTL切れの場合は
+If-None-Match / If-Modified-Since で再検証する（304ならキャッシュを再利用）。
+合計サイズが上限を超えたら、最終アクセスの古いものから削除する（LRU）。
+
+本文はチャンク単位で読み込み、呼び出し側が必要な情報を得た時点で
+読み込みを打ち切れる（その場合は読んだ分だけを不完全なエントリとして保存）。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+DEFAULT_TTL = 24 * 60 * 60  # 1日
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+CHUNK_SIZE = 16 * 1024
+
+# キャッシュに残すレスポンスヘッダー
+KEPT_HEADERS = ('ETag', 'Last-Modified', 'Content-Type', 'Content-Length')
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュされたレスポンス"""
+    url: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+    complete: bool = True  # Falseなら途中で読み込みを打ち切った本文
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+    @property
+    def bytes_total(self) -> Optional[int]:
+        """Content-Length（不明ならNone）"""
+        length = self.headers.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+
+
+def read_chunks(chunks, until: Optional[Callable[[bytes], bool]] = None):
+    """
+    チャンクを順に読み込み、untilがTrueを返した時点で打ち切る
+
+    Returns:
+        (読み込んだ本文, 最後まで読んだかどうか)
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        if until is not None and until(chunk):
+            return bytes(buf), False
+    return bytes(buf), True
+
+
+def iter_response(response, chunk_size: int = CHUNK_SIZE):
+    """レスポンスをチャンク単位で返す"""
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_bytes(body: bytes, chunk_size: int = CHUNK_SIZE):
+    """bytesをチャンク単位で返す"""
+    for i in range(0, len(body), chunk_size):
+        yield body[i:i + chunk_size]
+
+
+class HTTPCache:
+    """URLをキーにしたコンテンツアドレス型のディスクキャッシュ"""
+
+    def __init__(self, cache_dir: Path, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # 初回のevictで計測
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, url: str):
+        key = self._key(url)
+        shard = self.cache_dir / key[:2]
+        return shard / f'{key}.body', shard / f'{key}.json'
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.stats[kind] += 1
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """キャッシュを読み込む（なければNone）"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+        # LRU判定用に最終アクセス時刻を更新
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+        return CacheEntry(
+            url=meta['url'],
+            body=body,
+            headers=meta.get('headers', {}),
+            fetched_at=meta.get('fetched_at', 0.0),
+            complete=meta.get('complete', True),
+        )
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str],
+            fetched_at: Optional[float] = None, complete: bool = True) -> CacheEntry:
+        """レスポンスを保存する"""
+        entry = CacheEntry(
+            url=url,
+            body=body,
+            headers={k: v for k, v in headers.items() if k in KEPT_HEADERS},
+            fetched_at=fetched_at if fetched_at is not None else time.time(),
+            complete=complete,
+        )
+        body_path, meta_path = self._paths(url)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            previous_size = body_path.stat().st_size
+        except OSError:
+            previous_size = 0
+
+        # 並列取得中でも壊れたファイルを残さないよう、一時ファイルからrename
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        body_tmp = body_path.with_name(body_path.name + suffix)
+        meta_tmp = meta_path.with_name(meta_path.name + suffix)
+        body_tmp.write_bytes(body)
+        with open(meta_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': entry.url,
+                'headers': entry.headers,
+                'fetched_at': entry.fetched_at,
+                'size': len(body),
+                'complete': complete,
+            }, f, ensure_ascii=False)
+        os.replace(body_tmp, body_path)
+        os.replace(meta_tmp, meta_path)
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(body) - previous_size
+        self.evict()
+        return entry
+
+    def touch(self, entry: CacheEntry) -> CacheEntry:
+        """再検証に成功したエントリの取得時刻を更新する"""
+        return self.put(entry.url, entry.body, entry.headers, complete=entry.complete)
+
+    def evict(self):
+        """合計サイズが上限を超えていれば古いものから削除"""
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+
+            bodies = []
+            total = 0
+            for body_path in self.cache_dir.glob('*/*.body'):
+                try:
+                    st = body_path.stat()
+                except OSError:
+                    continue
+                bodies.append((st.st_mtime, st.st_size, body_path))
+                total += st.st_size
+
+            if total <= self.max_bytes:
+                self._total_bytes = total
+                return
+
+            for _, size, body_path in sorted(bodies):
+                if total <= self.max_bytes:
+                    break
+                for path in (body_path, body_path.with_suffix('.json')):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+            self._total_bytes = total
+
+    def clear(self):
+        """キャッシュをすべて削除"""
+        with self._lock:
+            for path in self.cache_dir.glob('*/*'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+              timeout: float = 10, until: Optional[Callable[[bytes], bool]] = None,
+              force: bool = False) -> CacheEntry:
+        """
+        キャッシュを考慮してURLを取得する
+
+        Args:
+            until: 本文のチャンクを受け取り、読み込みを打ち切るならTrueを返す関数。
+                キャッシュから返す場合も同じようにチャンク単位で渡される。
+            force: キャッシュを使わずに取得し直す
+        """
+        entry = None if force else self.get(url)
+        if entry is not None and entry.is_fresh(self.ttl):
+            self._count('hit')
+            read_chunks(iter_bytes(entry.body), until)
+            return entry
+
+        request_headers = dict(headers or {})
+        # 不完全な本文は再検証しても補えないため、条件付きGETにしない
+        if entry is not None and entry.complete:
+            if entry.headers.get('ETag'):
+                request_headers['If-None-Match'] = entry.headers['ETag']
+            if entry.headers.get('Last-Modified'):
+                request_headers['If-Modified-Since'] = entry.headers['Last-Modified']
+
+        req = urllib.request.Request(url, headers=request_headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                response_headers = {h: response.headers[h] for h in KEPT_HEADERS
+                                    if response.headers.get(h)}
+                body, complete = read_chunks(iter_response(response), until)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry is not None:
+                self._count('revalidated')
+                read_chunks(iter_bytes(entry.body), until)
+                return self.touch(entry)
+            raise
+
+        self._count('miss')
+        return self.put(url, body, response_headers, complete=complete)
+
+    def summary(self) -> str:
+        """ヒット状況のサマリー"""
+        return (f"キャッシュ: ヒット {self.stats['hit']}件 / "
+                f"再検証(304) {self.stats['revalidated']}件 / "
+                f"取得 {self.stats['miss']}件")
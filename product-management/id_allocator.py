@@ -0,0 +1,104 @@
+"""
+商品IDの採番
+
+CSVの走査はプロセスごとに1回だけ行い、以降はメモリ上で連番を払い出す。
+払い出し済みの最大番号（high-water mark）はファイルに保存し、
+ファイルロックで排他することで、add-url を同時に実行してもIDが重複しない。
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ID_PREFIX = 'prod_'
+
+
+def parse_product_number(product_id: str) -> Optional[int]:
+    """'prod_012' → 12（形式が違えばNone）"""
+    if not product_id or not product_id.startswith(ID_PREFIX):
+        return None
+    number = product_id[len(ID_PREFIX):]
+    return int(number) if number.isdigit() else None
+
+
+def format_product_id(number: int) -> str:
+    """12 → 'prod_012'"""
+    return f'{ID_PREFIX}{number:03d}'
+
+
+class ProductIdAllocator:
+    """プロセス間で重複しない商品IDの採番器"""
+
+    def __init__(self, csv_path: Path, state_path: Path):
+        self.csv_path = Path(csv_path)
+        self.state_path = Path(state_path)
+        self.lock_path = self.state_path.with_name(self.state_path.name + '.lock')
+        self._csv_max: Optional[int] = None
+
+    @contextmanager
+    def lock(self):
+        """採番とCSV追記を排他するファイルロック"""
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _scan_csv(self) -> int:
+        """CSV内の最大番号（初回のみ走査）"""
+        if self._csv_max is None:
+            max_num = 0
+            if self.csv_path.exists():
+                with open(self.csv_path, 'r', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        num = parse_product_number(row.get('id') or '')
+                        if num is not None and num > max_num:
+                            max_num = num
+            self._csv_max = max_num
+        return self._csv_max
+
+    def _read_state(self) -> int:
+        try:
+            return int(self.state_path.read_text(encoding='utf-8').strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_state(self, value: int):
+        tmp_path = self.state_path.with_name(f'{self.state_path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(str(value), encoding='utf-8')
+        os.replace(tmp_path, self.state_path)
+
+    def reserve(self, count: int = 1, locked: bool = False) -> List[str]:
+        """
+        IDをまとめて払い出す
+
+        Args:
+            locked: 呼び出し側で既に lock() を取得している場合はTrue
+        """
+        if count <= 0:
+            return []
+
+        def allocate():
+            start = max(self._scan_csv(), self._read_state()) + 1
+            self._write_state(start + count - 1)
+            return [format_product_id(n) for n in range(start, start + count)]
+
+        if locked:
+            return allocate()
+        with self.lock():
+            return allocate()
+
+    def next_id(self) -> str:
+        """IDを1つ払い出す"""
+        return self.reserve(1)[0]
@@ -0,0 +1,125 @@
+"""
+products.json の差分書き出し
+
+前回の products.json を読み込み、商品ごとに内容のハッシュを比較する。
+変更のない商品は createdAt / updatedAt をそのまま引き継ぎ、
+何も変わっていなければファイル自体を書き換えない（無駄な差分・再ビルドを防ぐ）。
+前回・今回の商品とも1件ずつ読み書きする（product_stream.py）。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from product_stream import ProductsJSONWriter, iter_json_products
+
+# ハッシュの対象外にする項目
+TIMESTAMP_FIELDS = ('createdAt', 'updatedAt')
+
+
+def product_hash(product: Dict[str, Any]) -> str:
+    """タイムスタンプを除いた商品内容のハッシュ"""
+    content = {k: v for k, v in product.items() if k not in TIMESTAMP_FIELDS}
+    encoded = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def load_previous(json_path: Path) -> Dict[str, Any]:
+    """前回の products.json（なければ空）"""
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _iter_previous(json_path: Path, meta: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """前回の商品（ファイルがない・壊れている場合はそこまで）"""
+    try:
+        yield from iter_json_products(json_path, meta)
+    except (OSError, ValueError):
+        return
+
+
+def _index_entry(product: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str]]:
+    """前回の商品のうち比較に必要な部分（ハッシュ・createdAt・updatedAt）"""
+    return product_hash(product), product.get('createdAt'), product.get('updatedAt')
+
+
+def export_products_json(products: Iterable[Dict[str, Any]], json_path: Path,
+                         now: str, last_updated: str, version: str = '1.0.0') -> Dict[str, int]:
+    """
+    商品一覧を products.json に差分書き出しする
+
+    前回の products.json と新しい商品を先頭から並べて突き合わせながら、
+    一時ファイルに1件ずつ書き出す。並び順が変わっていなければ前回の商品を
+    先読みする必要がないため、商品数によらずメモリ使用量は一定。
+
+    Args:
+        products: createdAt / updatedAt を含まない商品データ（イテレータ可）
+        now: 追加・変更された商品に付けるタイムスタンプ
+        last_updated: 何か変更があった場合の lastUpdated
+
+    Returns:
+        added / changed / removed / unchanged の件数と、書き込んだかどうか（written）
+    """
+    json_path = Path(json_path)
+    previous_meta: Dict[str, Any] = {}
+    previous = _iter_previous(json_path, previous_meta)
+    # 突き合わせのために先読みした前回の商品（並び順が同じなら常に空）
+    lookahead: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+
+    def find_previous(product_id: str):
+        if product_id in lookahead:
+            return lookahead.pop(product_id)
+        for old in previous:
+            if not isinstance(old, dict):
+                continue
+            if old.get('id') == product_id:
+                return _index_entry(old)
+            lookahead[old.get('id')] = _index_entry(old)
+        return None
+
+    counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+    reordered = False
+    tmp_path = json_path.with_name(f'.{json_path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            writer = ProductsJSONWriter(f, {'version': version, 'lastUpdated': last_updated})
+            for product in products:
+                # 先読みが発生した＝前回と並び順が違う（追加・削除を含む）
+                reordered = reordered or bool(lookahead)
+                old = find_previous(product['id'])
+                if old is None:
+                    counts['added'] += 1
+                    created_at, updated_at = now, now
+                elif old[0] == product_hash(product):
+                    counts['unchanged'] += 1
+                    created_at, updated_at = old[1] or now, old[2] or now
+                else:
+                    counts['changed'] += 1
+                    created_at, updated_at = old[1] or now, now
+                writer.write({**product, 'createdAt': created_at, 'updatedAt': updated_at})
+            writer.close()
+
+        counts['removed'] = len(lookahead) + sum(1 for old in previous if isinstance(old, dict))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    dirty = counts['added'] or counts['changed'] or counts['removed'] or reordered
+    if dirty or previous_meta.get('version') != version:
+        os.replace(tmp_path, json_path)
+        counts['written'] = 1
+    else:
+        tmp_path.unlink()
+        counts['written'] = 0
+    return counts
+
+
+def format_counts(counts: Dict[str, int]) -> str:
+    """例: 追加 1件 / 変更 2件 / 削除 0件 / 変更なし 40件"""
+    return (f"追加 {counts['added']}件 / 変更 {counts['changed']}件 / "
+            f"削除 {counts['removed']}件 / 変更なし {counts['unchanged']}件")
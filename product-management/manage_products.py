@@ -4,208 +4,365 @@
 
 使い方:
   python3 manage_products.py add-url <URL>        # URLから商品を追加
-  python3 manage_products.py auto-fill            # 不完全な行を自動補完
-  python3 manage_products.py list                 # 商品一覧を表示
+  python3 manage_products.py add-urls <FILE|->    # URL一覧（ファイル/標準入力）から一括追加
+  python3 manage_products.py auto-fill [--model] [--workers N]
+                                                  # 不完全な行を自動補完（中断しても次回続きから再開）
+                                                  # --model: カテゴリを分類モデルで推定
+  python3 manage_products.py reclassify --all [--model]
+                                                  # 全商品のカテゴリなどを再判定（ルール変更後に）
+  python3 manage_products.py reclassify --changed # 商品ページの内容が変わった商品だけを再判定
+  python3 manage_products.py refresh-prices [--workers N] [--per-host N] [--rate R] [--dry-run]
+                                                  # 全商品の価格を取り直し、価格・予算帯の変更を反映
+  python3 manage_products.py train-model          # カテゴリ入力済みの商品から分類モデルを学習
+  python3 manage_products.py status [--all]        # 商品ページの取得状況（最新・要更新・取得失敗）を表示
+  python3 manage_products.py list [--category C] [--budget B] [--recipient R] [--occasion O] [--unpublished]
+                                                  # 商品一覧を表示（条件で絞り込み）
   python3 manage_products.py push                 # GitHubにプッシュ
+  python3 manage_products.py export [--intern] [--verify]
+                                                  # products.json・ビルド用シャード・診断インデックスを生成
   python3 manage_products.py open                 # CSVをデフォルトアプリで開く
+  python3 manage_products.py cache-clear          # 商品ページのキャッシュを削除
+  python3 manage_products.py migrate              # CSVをSQLiteストア（data/products.db）に移行
 """
 
 import csv
-import json
+import filecmp
 import subprocess
 import sys
 import os
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
 import urllib.request
-from html.parser import HTMLParser
+
+from http_cache import HTTPCache, iter_response, read_chunks
+from id_allocator import ProductIdAllocator
+from json_export import export_products_json, format_counts
+from category_rules import RULES as CATEGORY_RULES
+from checkpoint import CheckpointJournal
+from fingerprints import (FAILED, FRESH, STAGE_EXPORT, STAGE_JUDGE, STALE,
+                          FingerprintStore, body_digest)
+from diagnose_engine import (BUDGET_BOUNDARIES, BUDGET_RANGES, budget_indexes_for,
+                             get_budget_range_from_price)
+from build_artifacts import format_report, write_build_artifacts
+from match_index import write_match_index
+from page_parser import DEFAULT_REQUIRED_FIELDS, ExtractionStats, ProductHTMLParser
+from price_refresh import PriceFetcher
+from product_codec import ProductCodec, decode_rows, now_timestamp, read_csv_values
+from product_model import Product, ProductTable
+from product_store import ProductStore
 
 # パス設定
 BASE_DIR = Path(__file__).parent.parent
 CSV_PATH = BASE_DIR / "data" / "products.csv"
 JSON_PATH = BASE_DIR / "src" / "data" / "products.json"
+DB_PATH = BASE_DIR / "data" / "products.db"  # 存在する場合はこちらが正本
+BUILD_DIR = BASE_DIR / "src" / "data" / "build"  # 最小化・シャード済みのバンドル用JSON
+CACHE_DIR = BASE_DIR / ".cache" / "http"
+ID_STATE_PATH = BASE_DIR / ".cache" / "product_id"
+MODEL_PATH = BASE_DIR / ".cache" / "category_model.json"
+AUTO_FILL_JOURNAL_PATH = BASE_DIR / ".cache" / "auto_fill.jsonl"  # auto-fill の途中経過（再開用）
+FINGERPRINT_PATH = BASE_DIR / ".cache" / "fingerprints.json"  # 商品ページごとのフィンガープリント
 
+# 商品ページのキャッシュ（TTL内は再取得せず、期限切れは条件付きGETで再検証）
+HTTP_CACHE = HTTPCache(CACHE_DIR)
 
-class ProductHTMLParser(HTMLParser):
-    """商品ページのHTMLから情報を抽出"""
+# 商品ページの変更検出（取得結果のフィンガープリントと、後段の処理済みハッシュ）
+FINGERPRINTS = FingerprintStore(FINGERPRINT_PATH)
+# 最後の取得からこれ以上経った商品は「要更新」
+STALE_AFTER = 7 * 24 * 60 * 60
 
-    def __init__(self):
-        super().__init__()
-        self.title = None
-        self.price = None
-        self.in_title = False
+# 商品IDの採番（CSVの走査は1回だけ、以降はメモリ上で払い出し）
+ID_ALLOCATOR = ProductIdAllocator(CSV_PATH, ID_STATE_PATH)
 
-    def handle_starttag(self, tag, attrs):
-        if tag == 'title':
-            self.in_title = True
-        # 価格情報の抽出（一般的なパターン）
-        for attr, value in attrs:
-            if attr == 'class' and 'price' in value.lower():
-                self.in_title = True
+# 抽出戦略（JSON-LD / OpenGraph / microdata / ヒューリスティック）ごとのヒット数
+EXTRACTION_STATS = ExtractionStats()
 
-    def handle_data(self, data):
-        if self.in_title and self.title is None:
-            self.title = data.strip()
-        # 価格パターンを検索
-        if not self.price:
-            price_match = re.search(r'[¥￥]?\s*([0-9,]+)\s*円', data)
-            if price_match:
-                self.price = int(price_match.group(1).replace(',', ''))
+# 一括追加の並列数
+BULK_MAX_WORKERS = 8
+BULK_MAX_PER_HOST = 2
 
-    def handle_endtag(self, tag):
-        if tag == 'title':
-            self.in_title = False
+# 価格の取り直し（refresh-prices）でのホストごとの1秒あたりのリクエスト数
+REFRESH_RATE_PER_HOST = 1.0
+# 価格を採用するURLの優先順（先に価格が取れたものを使う）
+REFRESH_URL_FIELDS = ('productUrl', 'amazonUrl', 'rakutenUrl')
 
+# 分類モデルの確信度がこれ未満ならキーワードルールの判定を使う
+MODEL_MIN_CONFIDENCE = 0.35
 
-def fetch_product_info(url: str) -> Dict[str, Any]:
-    """URLから商品情報を取得"""
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8', errors='ignore')
+# 学習済みの分類モデル（--model 指定時に初めて読み込む）
+_category_model = None
 
-        parser = ProductHTMLParser()
-        parser.feed(html)
+
+def fetch_product_info(url: str, cache: HTTPCache = HTTP_CACHE,
+                       required_fields=DEFAULT_REQUIRED_FIELDS) -> Dict[str, Any]:
+    """URLから商品情報を取得（必要な項目が揃った時点で受信を打ち切る）"""
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    try:
+        parser = ProductHTMLParser(required_fields)
+        if cache is not None:
+            entry = cache.fetch(url, headers=headers, until=parser.feed_bytes)
+            if not entry.complete and not parser.is_complete():
+                # 以前より多くの項目を求められた場合は、打ち切られた本文では足りない
+                parser = ProductHTMLParser(required_fields)
+                entry = cache.fetch(url, headers=headers, until=parser.feed_bytes, force=True)
+            bytes_total = entry.bytes_total
+            body = entry.body
+        else:
+            req = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(req, timeout=10) as response:
+                body, _ = read_chunks(iter_response(response), parser.feed_bytes)
+                length = response.headers.get('Content-Length')
+                bytes_total = int(length) if length and length.isdigit() else None
+        parser.close()
+        EXTRACTION_STATS.record(parser)
 
         # タイトルをクリーンアップ
         title = parser.title or "商品名不明"
-        title = re.sub(r'\s*[-|]\s*.*$', '', title)  # サイト名を削除
+        if parser.strategies().get('title') in (None, 'opengraph', 'heuristic'):
+            title = re.sub(r'\s*[-|]\s*.*$', '', title)  # サイト名を削除
         title = title.strip()[:100]  # 100文字に制限
 
+        if parser.title or parser.price:
+            # キャッシュの本文はパーサーが読んだ先より長いことがあるため、読んだ先頭部分だけを使う
+            FINGERPRINTS.record(url, body_digest(body[:parser.bytes_read]),
+                                {'name': title, 'price': parser.price or 0})
+        else:
+            FINGERPRINTS.record_failure(url, '商品情報が見つかりません')
+
         return {
             'name': title,
             'price': parser.price or 0,
-            'url': url
+            'url': url,
+            'bytes_read': parser.bytes_read,
+            'bytes_total': bytes_total,
         }
     except Exception as e:
         print(f"⚠️  商品情報の取得に失敗: {e}")
-        return {'name': '', 'price': 0, 'url': url}
-
+        FINGERPRINTS.record_failure(url, f'{type(e).__name__}: {e}')
+        return {'name': '', 'price': 0, 'url': url, 'bytes_read': 0, 'bytes_total': None}
+
+
+def format_bytes_read(bytes_read: int, bytes_total) -> str:
+    """読み込み量の表示（例: 48.0KB / 1.2MB）"""
+    def fmt(n):
+        if n >= 1024 * 1024:
+            return f"{n / 1024 / 1024:.1f}MB"
+        return f"{n / 1024:.1f}KB"
+    return f"{fmt(bytes_read)} / {fmt(bytes_total) if bytes_total else '不明'}"
+
+
+# タグ・優先度の価格条件（予算帯の境界と一致するため、予算帯のインデックスで判定する）
+PETIT_GIFT_BELOW = BUDGET_BOUNDARIES.index(5000) + 1  # これより下の予算帯は「プチギフト」
+LUXURY_FROM = BUDGET_BOUNDARIES.index(10000) + 1      # これ以上の予算帯は「高級」・優先度+5
+PRIORITY_BOOST_CATEGORIES = {'コスメ', 'ガジェット'}
+
+# 予算帯ごとのタグ・基本優先度
+BUDGET_TAGS = [
+    (['プチギフト'] if i < PETIT_GIFT_BELOW else []) + (['高級'] if i >= LUXURY_FROM else [])
+    for i in range(len(BUDGET_RANGES))
+]
+BUDGET_PRIORITY = [80 + (5 if i >= LUXURY_FROM else 0) for i in range(len(BUDGET_RANGES))]
+
+# 判定結果で上書きする列
+JUDGED_FIELDS = ('category', 'recipients', 'occasions', 'budgetRange', 'tags', 'priority')
+
+# 予算帯から付くタグ（refresh-prices で予算帯が変わったときに付け替える）
+BUDGET_TAG_NAMES = {tag for tags in BUDGET_TAGS for tag in tags}
+
+
+def apply_budget_change(row: Dict[str, str], price: int):
+    """
+    価格から予算帯を更新し、予算帯から決まるタグ・優先度だけを付け替える
+
+    カテゴリ・対象・シーンや、手で追加したタグ・優先度の調整はそのまま残す
+    （優先度は予算帯による差分だけ増減する）。
+    """
+    old_budget = (BUDGET_RANGES.index(row['budgetRange'])
+                  if row.get('budgetRange') in BUDGET_RANGES else None)
+    new_budget = budget_indexes_for([price])[0]
+    row['price'] = str(price)
+    row['budgetRange'] = BUDGET_RANGES[new_budget]
+    if old_budget == new_budget:
+        return
 
-def judge_category(name: str, price: int) -> Dict[str, Any]:
-    """商品名と価格からカテゴリなどをAI判定"""
-    name_lower = name.lower()
-
-    # カテゴリ判定
-    if any(kw in name_lower for kw in ['化粧', 'コスメ', 'クリーム', '香水', 'アロマ', '入浴', 'ハンド', 'ボディ', 'スキンケア', 'シャンプー']):
-        category = 'コスメ'
-    elif any(kw in name_lower for kw in ['チョコ', 'スイーツ', 'お菓子', '酒', 'ワイン']):
-        category = 'グルメ'
-    elif any(kw in name_lower for kw in ['時計', 'イヤホン', 'スマート', 'ガジェット']):
-        category = 'ガジェット'
-    elif any(kw in name_lower for kw in ['花', 'フラワー', '植物']):
-        category = '花・植物'
-    elif any(kw in name_lower for kw in ['財布', 'ネクタイ', 'バッグ']):
-        category = 'ファッション'
-    elif any(kw in name_lower for kw in ['インテリア', '家具']):
-        category = 'インテリア'
-    elif any(kw in name_lower for kw in ['ディナー', '体験']):
-        category = '体験'
-    else:
-        category = '雑貨'
-
-    # 予算帯
-    if price < 3000:
-        budget = '〜3,000円'
-    elif price < 5000:
-        budget = '3,000〜5,000円'
-    elif price < 10000:
-        budget = '5,000〜10,000円'
-    elif price < 20000:
-        budget = '10,000〜20,000円'
-    elif price < 30000:
-        budget = '20,000〜30,000円'
-    else:
-        budget = '30,000円〜'
+    tags = [t for t in map(str.strip, (row.get('tags') or '').split(',')) if t and t not in BUDGET_TAG_NAMES]
+    row['tags'] = ','.join(tags + BUDGET_TAGS[new_budget])
 
-    # 贈る相手
-    if category in ['コスメ', '花・植物']:
-        recipients = '彼女,妻,母,友人女性'
-    elif category in ['ガジェット', 'ファッション']:
-        recipients = '彼氏,夫,父,上司,友人男性'
+    priority = (row.get('priority') or '').strip()
+    if priority.lstrip('-').isdigit() and old_budget is not None:
+        row['priority'] = str(int(priority) + BUDGET_PRIORITY[new_budget] - BUDGET_PRIORITY[old_budget])
     else:
-        recipients = '彼女,彼氏,夫,妻,友人女性,友人男性'
+        boost = 5 if row.get('category') in PRIORITY_BOOST_CATEGORIES else 0
+        row['priority'] = str(BUDGET_PRIORITY[new_budget] + boost)
+
+
+def load_category_model(retrain: bool = False):
+    """
+    分類モデルを読み込む（初回のみ）
+
+    モデルがない・商品データの方が新しい・形式が古い場合は、
+    カテゴリ入力済みの行から学習し直して保存する。
+    """
+    global _category_model
+    if _category_model is not None and not retrain:
+        return _category_model
+
+    from category_model import CategoryModel  # list などでは読み込まない
+
+    source = DB_PATH if DB_PATH.exists() else CSV_PATH
+    model = None
+    if not retrain and MODEL_PATH.exists() and MODEL_PATH.stat().st_mtime >= source.stat().st_mtime:
+        try:
+            model = CategoryModel.load(MODEL_PATH)
+        except (OSError, ValueError, KeyError):
+            model = None
+
+    if model is None:
+        _, rows = load_rows()
+        labelled = [row for row in rows if row.get('name') and row.get('category')]
+        started = time.perf_counter()
+        model = CategoryModel.train([row['name'] for row in labelled],
+                                    [row['category'] for row in labelled])
+        model.save(MODEL_PATH)
+        print(f"🧠 分類モデルを学習しました ({model.samples}件 / {len(model.categories)}カテゴリ / "
+              f"{(time.perf_counter() - started) * 1000:.0f}ms)")
+
+    _category_model = model
+    return model
+
+
+def judge_categories(names: List[str], prices: List[int], use_model: bool = False) -> Dict[str, List[Any]]:
+    """
+    商品名と価格の列をまとめてAI判定（ルールは category_rules.json）
+
+    use_model=True の場合はカテゴリを分類モデルで推定し、確信度が
+    MODEL_MIN_CONFIDENCE 未満の商品だけキーワードルールで判定する。
+
+    Returns:
+        列ごとの判定結果（category / recipients / occasions / budgetRange / tags / priority、
+        use_model=True の場合はモデルの確信度 confidence も）
+    """
+    categories = CATEGORY_RULES.categories_for(names)
+    budgets = budget_indexes_for(prices)
+
+    confidences = None
+    if use_model:
+        predictions = load_category_model().predict_many(names)
+        confidences = [confidence for _, confidence in predictions]
+        categories = [predicted if predicted and confidence >= MODEL_MIN_CONFIDENCE else category
+                      for (predicted, confidence), category in zip(predictions, categories)]
+
+    columns = {
+        'category': categories,
+        'recipients': [CATEGORY_RULES.recipients(c) for c in categories],
+        'occasions': [CATEGORY_RULES.occasions(c, p) for c, p in zip(categories, prices)],
+        'budgetRange': [BUDGET_RANGES[b] for b in budgets],
+        'tags': [','.join([c, *BUDGET_TAGS[b]]) for c, b in zip(categories, budgets)],
+        'priority': [BUDGET_PRIORITY[b] + (5 if c in PRIORITY_BOOST_CATEGORIES else 0)
+                     for c, b in zip(categories, budgets)],
+    }
+    if confidences is not None:
+        columns['confidence'] = confidences
+    return columns
 
-    # シーン
-    if price >= 5000:
-        occasions = '誕生日,クリスマス,記念日'
-    else:
-        occasions = '誕生日,お礼'
-
-    if category == 'コスメ':
-        occasions += ',母の日,ホワイトデー'
-    elif category == 'グルメ':
-        occasions += ',お中元,お歳暮'
-
-    # タグ
-    tags = [category]
-    if price < 5000:
-        tags.append('プチギフト')
-    if price >= 10000:
-        tags.append('高級')
-
-    # 優先度
-    priority = 80
-    if price >= 10000:
-        priority += 5
-    if category in ['コスメ', 'ガジェット']:
-        priority += 5
 
-    return {
-        'category': category,
-        'recipients': recipients,
-        'occasions': occasions,
-        'budgetRange': budget,
-        'tags': ','.join(tags),
-        'priority': priority
-    }
+def judge_category(name: str, price: int, use_model: bool = False) -> Dict[str, Any]:
+    """商品名と価格からカテゴリなどをAI判定"""
+    columns = judge_categories([name], [price], use_model)
+    return {field: values[0] for field, values in columns.items()}
 
 
 def get_next_product_id() -> str:
-    """次の商品IDを生成"""
-    if not CSV_PATH.exists():
-        return 'prod_001'
+    """次の商品IDを採番"""
+    return ID_ALLOCATOR.next_id()
 
-    with open(CSV_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        ids = [row['id'] for row in reader if row['id'].startswith('prod_')]
 
-    if not ids:
-        return 'prod_001'
+def product_urls(row: Dict[str, Any]) -> List[str]:
+    """商品行の商品ページURL（productUrl / amazonUrl / rakutenUrl、重複なし）"""
+    return list(dict.fromkeys(row[field] for field in REFRESH_URL_FIELDS if row.get(field)))
 
-    max_num = max([int(id.replace('prod_', '')) for id in ids if id.replace('prod_', '').isdigit()])
-    return f'prod_{max_num + 1:03d}'
 
+def save_fingerprints():
+    """フィンガープリントを保存（同時に実行された他のコマンドの記録と混ざらないようにロック）"""
+    with ID_ALLOCATOR.lock():
+        FINGERPRINTS.save()
 
-def add_product_from_url(url: str):
-    """URLから商品を追加"""
-    print(f"🔍 商品情報を取得中: {url}")
 
-    # 商品情報を取得
-    info = fetch_product_info(url)
-    if not info['name']:
-        print("❌ 商品情報を取得できませんでした")
-        return
+def open_store() -> Optional[ProductStore]:
+    """SQLiteストアが有効なら開く（CSVが直接編集されていれば取り込み直す）"""
+    if not DB_PATH.exists():
+        return None
 
-    print(f"✅ 商品名: {info['name']}")
-    print(f"✅ 価格: ¥{info['price']:,}")
+    store = ProductStore(DB_PATH)
+    if store.csv_modified(CSV_PATH):
+        count = store.import_csv(CSV_PATH)
+        print(f"🔄 CSVの変更をストアに取り込みました ({count}件)")
+    return store
 
-    # AI判定
-    judgment = judge_category(info['name'], info['price'])
-    print(f"🤖 カテゴリ: {judgment['category']}")
-    print(f"🤖 予算帯: {judgment['budgetRange']}")
 
-    # 新しい商品データ
-    product_id = get_next_product_id()
-    timestamp = datetime.now().isoformat()
+def load_rows() -> Tuple[List[str], List[Dict[str, str]]]:
+    """全商品行を読み込む（ストアがあればストアから、なければCSVから）"""
+    store = open_store()
+    if store is not None:
+        try:
+            return store.fieldnames, store.rows()
+        finally:
+            store.close()
+
+    return read_csv_rows(CSV_PATH)
+
+
+def load_products() -> ProductTable:
+    """
+    全商品を列指向の表として読み込む（一覧・絞り込みなど読むだけの処理用）
+
+    価格・優先度が数値でない行（"2,980" など）は、警告を出して読み飛ばす。
+    """
+    fieldnames, rows = load_rows()
+    codec = ProductCodec(fieldnames)
+    products = []
+    skipped = []
+    for row in rows:
+        try:
+            products.append(Product.from_dict(codec.decode_mapping(row)))
+        except ValueError:
+            skipped.append(row.get('id') or '?')
+    if skipped:
+        print(f"⚠️  価格・優先度が数値でない {len(skipped)}件はスキップしました: {', '.join(skipped)}")
+    return ProductTable(products)
+
 
+def read_csv_rows(csv_path: Path) -> Tuple[List[str], List[Dict[str, str]]]:
+    """CSVの列名と全行"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def write_csv_atomic(csv_path: Path, fieldnames: List[str], rows: List[Dict[str, Any]]):
+    """一時ファイルに書いてからrenameで置き換える（途中で終了しても元のCSVは壊れない）"""
+    tmp_path = csv_path.with_name(f'.{csv_path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, csv_path)
+
+
+def build_product_row(product_id: str, url: str, info: Dict[str, Any], judgment: Dict[str, Any]) -> Dict[str, Any]:
+    """取得情報と判定結果からCSVの1行を組み立てる"""
     # Amazon/楽天URLの判定
     amazon_url = url if 'amazon.co.jp' in url else ''
     rakuten_url = url if 'rakuten.co.jp' in url else ''
 
-    new_product = {
+    return {
         'id': product_id,
         'name': info['name'],
         'description': info['name'],  # 簡易版
@@ -223,15 +380,75 @@ def add_product_from_url(url: str):
         'productUrl': url
     }
 
-    # CSVに追加
-    fieldnames = list(new_product.keys())
-    file_exists = CSV_PATH.exists()
 
-    with open(CSV_PATH, 'a', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(new_product)
+def ends_with_newline(path: Path) -> bool:
+    """ファイルが空か、改行で終わっているか"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in (b'\n', b'\r')
+
+
+def append_products(rows: List[Dict[str, Any]]):
+    """CSVに商品行をまとめて追記"""
+    if not rows:
+        return
+
+    fieldnames = list(rows[0].keys())
+
+    # 同時に実行された add-url と書き込みが混ざらないようにロック
+    with ID_ALLOCATOR.lock():
+        store = open_store()
+        if store is not None:
+            try:
+                store.insert_rows(rows)
+                store.export_csv(CSV_PATH)
+            finally:
+                store.close()
+            return
+
+        file_exists = CSV_PATH.exists()
+        # 最終行が改行で終わっていないと、追記した1行目が最終行につながってしまう
+        needs_newline = file_exists and not ends_with_newline(CSV_PATH)
+        with open(CSV_PATH, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            if needs_newline:
+                f.write(writer.writer.dialect.lineterminator)
+            if not file_exists:
+                writer.writeheader()
+            writer.writerows(rows)
+
+
+def add_product_from_url(url: str):
+    """URLから商品を追加"""
+    print(f"🔍 商品情報を取得中: {url}")
+
+    # 商品情報を取得
+    info = fetch_product_info(url)
+    if not info['name']:
+        save_fingerprints()
+        print("❌ 商品情報を取得できませんでした")
+        return
+
+    print(f"✅ 商品名: {info['name']}")
+    print(f"✅ 価格: ¥{info['price']:,}")
+    print(f"📉 読み込み: {format_bytes_read(info['bytes_read'], info['bytes_total'])}")
+
+    # AI判定
+    judgment = judge_category(info['name'], info['price'])
+    print(f"🤖 カテゴリ: {judgment['category']}")
+    print(f"🤖 予算帯: {judgment['budgetRange']}")
+
+    # 新しい商品データ
+    product_id = get_next_product_id()
+    new_product = build_product_row(product_id, url, info, judgment)
+
+    # CSVに追加
+    append_products([new_product])
+    FINGERPRINTS.mark([url], STAGE_JUDGE)
+    save_fingerprints()
 
     print(f"✅ 商品を追加しました: {product_id}")
     print(f"\n💡 次のステップ:")
@@ -239,84 +456,236 @@ def add_product_from_url(url: str):
     print(f"   2. python3 manage_products.py push  # GitHubにプッシュ")
 
 
-def list_products():
-    """商品一覧を表示"""
-    if not CSV_PATH.exists():
+def read_url_list(source: str) -> List[str]:
+    """ファイルまたは標準入力（-）からURL一覧を読み込む"""
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    urls = []
+    seen = set()
+    for line in lines:
+        url = line.strip()
+        # 空行・コメント行・重複を除外
+        if not url or url.startswith('#') or url in seen:
+            continue
+        seen.add(url)
+        urls.append(url)
+    return urls
+
+
+def limit_per_host(fetch, max_per_host: int):
+    """URLのホストごとに同時接続数を制限した fetch(url) を返す"""
+    host_limits: Dict[str, threading.BoundedSemaphore] = {}
+    host_limits_lock = threading.Lock()
+
+    def fetch_limited(url: str):
+        host = urlparse(url).netloc
+        with host_limits_lock:
+            limit = host_limits.setdefault(host, threading.BoundedSemaphore(max_per_host))
+        with limit:
+            return fetch(url)
+
+    return fetch_limited
+
+
+def add_products_from_urls(urls: List[str], max_workers: int = BULK_MAX_WORKERS,
+                           max_per_host: int = BULK_MAX_PER_HOST):
+    """複数URLから商品を一括追加（並列取得・ID一括採番・CSV一括書き込み）"""
+    if not urls:
+        print("❌ URLが指定されていません")
+        return
+
+    print(f"🔍 {len(urls)}件のURLから商品情報を取得中 (並列数: {max_workers}, 同一ホスト: {max_per_host})")
+
+    fetch_limited = limit_per_host(fetch_product_info, max_per_host)
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_limited, url): url for url in urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures[future]
+            info = future.result()
+            results[url] = info
+            mark = '✅' if info['name'] else '❌'
+            print(f"   [{done}/{len(urls)}] {mark} {info['name'][:40] or url}")
+
+    fetch_elapsed = time.perf_counter() - started
+
+    # 入力順にAI判定とIDの一括採番
+    succeeded = [url for url in urls if results[url]['name']]
+    failed = [url for url in urls if not results[url]['name']]
+    product_ids = ID_ALLOCATOR.reserve(len(succeeded))
+    new_products = []
+
+    for product_id, url in zip(product_ids, succeeded):
+        info = results[url]
+        judgment = judge_category(info['name'], info['price'])
+        new_products.append(build_product_row(product_id, url, info, judgment))
+
+    # CSVに一括追記
+    append_products(new_products)
+    FINGERPRINTS.mark(succeeded, STAGE_JUDGE)
+    save_fingerprints()
+
+    elapsed = time.perf_counter() - started
+    throughput = len(urls) / fetch_elapsed if fetch_elapsed > 0 else 0.0
+
+    print(f"\n✅ {len(new_products)}件の商品を追加しました", end='')
+    if new_products:
+        print(f" ({new_products[0]['id']} 〜 {new_products[-1]['id']})")
+    else:
+        print()
+    if failed:
+        print(f"❌ {len(failed)}件は商品情報を取得できませんでした:")
+        for url in failed:
+            print(f"   - {url}")
+    print(f"⏱️  取得: {fetch_elapsed:.1f}秒 ({throughput:.2f}件/秒) / 合計: {elapsed:.1f}秒")
+    bytes_read = sum(info['bytes_read'] for info in results.values())
+    bytes_total = sum(info['bytes_total'] or info['bytes_read'] for info in results.values())
+    print(f"📉 読み込み: {format_bytes_read(bytes_read, bytes_total)}")
+    print(f"🔎 {EXTRACTION_STATS.summary()}")
+    print(f"🗂️  {HTTP_CACHE.summary()}")
+    print(f"\n💡 次のステップ:")
+    print(f"   1. python3 manage_products.py open  # CSVを開いて内容を確認・編集")
+    print(f"   2. python3 manage_products.py push  # GitHubにプッシュ")
+
+
+def list_products(filters: Optional[Dict[str, Any]] = None):
+    """
+    商品一覧を表示
+
+    Args:
+        filters: ProductTable.select の条件（category / budget_range / recipient /
+                 occasion / published）
+    """
+    if not CSV_PATH.exists() and not DB_PATH.exists():
         print("商品データがありません")
         return
 
-    with open(CSV_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        products = list(reader)
+    table = load_products()
+    indexes = table.select(**(filters or {}))
+
+    if filters:
+        print(f"\n📦 商品一覧 ({len(indexes)}件 / 全{len(table)}件)\n")
+    else:
+        print(f"\n📦 商品一覧 ({len(table)}件)\n")
+    for i in indexes:
+        p = table.products[i]
+        print(f"{p.id}: {p.name[:50]} - ¥{p.price} ({p.category})")
 
-    print(f"\n📦 商品一覧 ({len(products)}件)\n")
-    for p in products:
-        print(f"{p['id']}: {p['name'][:50]} - ¥{p['price']} ({p['category']})")
 
+def show_status(show_all: bool = False):
+    """
+    商品ごとの商品ページの状態を表示（記録済みのフィンガープリントだけを見て、ネットワークにはアクセスしない）
 
-def csv_to_json():
-    """CSVをJSON形式に変換"""
-    if not CSV_PATH.exists():
+      - 最新: 取得済みで、ページの変更がカテゴリ判定・JSONエクスポートに反映済み
+      - 要更新: 未取得・最後の取得から STALE_AFTER 以上経過・ページの変更が未反映のいずれか
+      - 取得失敗: 直近の取得がすべて失敗
+    """
+    if not CSV_PATH.exists() and not DB_PATH.exists():
+        print("商品データがありません")
+        return
+
+    _, rows = load_rows()
+    groups: Dict[str, List[Tuple[Dict[str, str], List[str]]]] = {FRESH: [], STALE: [], FAILED: []}
+    no_url = 0
+    for row in rows:
+        urls = product_urls(row)
+        if not urls:
+            no_url += 1
+            continue
+        state, reasons = FINGERPRINTS.status(urls, (STAGE_JUDGE, STAGE_EXPORT), STALE_AFTER)
+        groups[state].append((row, reasons))
+
+    print(f"\n📋 商品ページの状態 ({len(rows)}件)\n")
+    print(f"   ✅ 最新 {len(groups[FRESH])}件 / ⚠️  要更新 {len(groups[STALE])}件 / "
+          f"❌ 取得失敗 {len(groups[FAILED])}件 / ➖ URLなし {no_url}件")
+
+    sections = [(STALE, '⚠️  要更新'), (FAILED, '❌ 取得失敗')]
+    if show_all:
+        sections.insert(0, (FRESH, '✅ 最新'))
+    for state, label in sections:
+        if not groups[state]:
+            continue
+        print(f"\n{label}:")
+        for row, reasons in groups[state]:
+            detail = f" ({' / '.join(reasons)})" if reasons else ''
+            print(f"   {row['id']}: {row['name'][:40]}{detail}")
+
+    if groups[STALE] or groups[FAILED]:
+        print(f"\n💡 次のステップ:")
+        print(f"   1. python3 manage_products.py refresh-prices      # 商品ページを取り直す")
+        print(f"   2. python3 manage_products.py reclassify --changed  # 変わった商品だけを再判定")
+        print(f"   3. python3 manage_products.py export              # JSONに反映")
+
+
+def load_export_products() -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    エクスポートする全商品と商品ページのURL
+
+    CSVは csv.reader の行のまま、ヘッダーに合わせて生成した位置ベースの decode で変換する
+    （行ごとの dict を作らない）。
+    """
+    store = open_store()
+    if store is not None:
+        try:
+            fieldnames, rows = store.fieldnames, store.rows()
+        finally:
+            store.close()
+        return decode_rows(fieldnames, rows), [url for row in rows for url in product_urls(row)]
+
+    header, rows = read_csv_values(CSV_PATH)
+    decode = ProductCodec(header).decode
+    products = [decode(row) for row in rows]
+    url_columns = [header.index(field) for field in REFRESH_URL_FIELDS if field in header]
+    urls = list(dict.fromkeys(row[i] for row in rows for i in url_columns if row[i]))
+    return products, urls
+
+
+def csv_to_json(intern: bool = False, verify: bool = False):
+    """CSVをJSON形式に変換（バンドル用の最小化・シャード済みファイルも生成）"""
+    if not CSV_PATH.exists() and not DB_PATH.exists():
         print("❌ CSVファイルが見つかりません")
         return False
 
-    with open(CSV_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        products = []
-
-        for row in reader:
-            # データ型変換
-            product = {
-                'id': row['id'],
-                'name': row['name'],
-                'description': row['description'],
-                'price': int(row['price']) if row['price'] else 0,
-                'imageUrl': row['imageUrl'],
-                'category': row['category'],
-                'recipients': [r.strip() for r in row['recipients'].split(',') if r.strip()],
-                'occasions': [o.strip() for o in row['occasions'].split(',') if o.strip()],
-                'budgetRange': row['budgetRange'],
-                'affiliateLinks': [],
-                'tags': [t.strip() for t in row['tags'].split(',') if t.strip()],
-                'priority': int(row['priority']) if row['priority'] else 80,
-                'isPublished': row['isPublished'] == 'TRUE',
-                'createdAt': datetime.now().isoformat(),
-                'updatedAt': datetime.now().isoformat()
-            }
-
-            # affiliateLinks配列を生成
-            if row.get('amazonUrl'):
-                product['affiliateLinks'].append({
-                    'provider': 'amazon',
-                    'url': row['amazonUrl']
-                })
-            if row.get('rakutenUrl'):
-                product['affiliateLinks'].append({
-                    'provider': 'rakuten',
-                    'url': row['rakutenUrl']
-                })
-
-            products.append(product)
-
-    # ProductsData形式でラップ
-    products_data = {
-        'version': '1.0.0',
-        'lastUpdated': datetime.now().strftime('%Y-%m-%d'),
-        'products': products
-    }
+    products, urls = load_export_products()
 
-    # JSONファイルに書き込み
-    with open(JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(products_data, f, ensure_ascii=False, indent=2)
+    # 変更のあった商品だけタイムスタンプを更新して書き出し
+    now = now_timestamp()
+    counts = export_products_json(products, JSON_PATH, now=now, last_updated=now)
+    FINGERPRINTS.mark(urls, STAGE_EXPORT)
+    save_fingerprints()
 
-    print(f"✅ JSONファイルを生成しました: {JSON_PATH}")
+    if counts['written']:
+        print(f"✅ JSONファイルを生成しました: {JSON_PATH}")
+    else:
+        print(f"✅ JSONファイルは最新です（変更なし）: {JSON_PATH}")
+    print(f"📊 {format_counts(counts)}")
+
+    report = write_build_artifacts(JSON_PATH, BUILD_DIR, intern=intern)
+    print(f"📦 バンドル用JSON: {BUILD_DIR}{' (文字列テーブル)' if intern else ''}")
+    print(format_report(report, JSON_PATH.stat().st_size))
+
+    # 診断結果の事前計算インデックス
+    result = write_match_index(JSON_PATH, BUILD_DIR, verify=verify)
+    print(f"🧭 診断インデックス: {result['keys']}キー {result['bytes'] / 1024:.1f}KB"
+          f"{'' if result['written'] else '（変更なし）'}")
+    if verify:
+        if result['mismatches']:
+            print(f"❌ matchProducts と一致しないキーがあります: {result['mismatches'][:10]}")
+            return False
+        print("✅ 検証OK: すべての組み合わせで matchProducts / getRelaxedMatches と一致しました")
     return True
 
 
-def push_to_github():
+def push_to_github(intern: bool = False):
     """GitHubにプッシュ"""
     print("🔄 JSONファイルを生成中...")
-    if not csv_to_json():
+    if not csv_to_json(intern=intern):
         return
 
     print("\n📤 GitHubにプッシュ中...")
@@ -324,7 +693,7 @@ def push_to_github():
     os.chdir(BASE_DIR)
 
     # Git操作
-    subprocess.run(['git', 'add', 'data/products.csv', 'src/data/products.json'])
+    subprocess.run(['git', 'add', 'data/products.csv', 'src/data/products.json', 'src/data/build'])
 
     commit_msg = f"商品データを更新 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\nローカル商品管理ツールから自動更新"
     subprocess.run(['git', 'commit', '-m', commit_msg])
@@ -335,82 +704,450 @@ def push_to_github():
     print("🔗 https://gift-diagnosis.vercel.app")
 
 
-def auto_fill_incomplete_rows():
-    """不完全な行を自動補完"""
-    if not CSV_PATH.exists():
+def needs_fill(row: Dict[str, Any]) -> bool:
+    """商品名があるがカテゴリが空の行"""
+    return bool(row.get('name')) and not row.get('category')
+
+
+def complete_row(row: Dict[str, Any], judgment: Dict[str, Any], product_id: Optional[str] = None):
+    """
+    判定結果で空のフィールドを補完
+
+    Args:
+        product_id: IDが空の場合に使うID（まとめて reserve したもの。None なら1件ずつ採番）
+    """
+    if not row.get('id'):
+        row['id'] = product_id or get_next_product_id()
+    if not row.get('description'):
+        row['description'] = row['name']
+    if not row.get('imageUrl'):
+        row['imageUrl'] = '/images/products/default.jpg'
+    for field in JUDGED_FIELDS:
+        row[field] = judgment[field]
+    if not row.get('isPublished'):
+        row['isPublished'] = 'TRUE'
+
+    # productUrlがある場合、Amazon/楽天URLを設定
+    if row.get('productUrl'):
+        url = row['productUrl']
+        if 'amazon.co.jp' in url and not row.get('amazonUrl'):
+            row['amazonUrl'] = url
+        if 'rakuten.co.jp' in url and not row.get('rakutenUrl'):
+            row['rakutenUrl'] = url
+
+
+# auto-fill が書き換える列（書き込み時は最新の行にこの列だけを反映する）
+FILLED_FIELDS = ('id', 'description', 'imageUrl', 'price', *JUDGED_FIELDS,
+                 'isPublished', 'amazonUrl', 'rakutenUrl')
+
+
+def load_keyed_rows(store: Optional[ProductStore]) -> Tuple[List[str], List[Tuple[str, Dict[str, str]]]]:
+    """(列名, [(行のキー, 行)])。キーはストアなら主キー、CSVなら行番号"""
+    if store is not None:
+        return store.fieldnames, [(str(pk), row) for pk, row in store.rows_with_keys()]
+    fieldnames, rows = read_csv_rows(CSV_PATH)
+    return fieldnames, [(str(i), row) for i, row in enumerate(rows)]
+
+
+def auto_fill_incomplete_rows(use_model: bool = False, max_workers: int = BULK_MAX_WORKERS,
+                              max_per_host: int = BULK_MAX_PER_HOST):
+    """
+    不完全な行を自動補完（use_model=True ならカテゴリを分類モデルで推定）
+
+    価格の取得は並列で行い、取得できた価格と補完した行は都度ジャーナルに記録する。
+    中断した場合は次回の実行でジャーナルから再開し、最後にCSV（ストア）へ1回だけ書き込む。
+    価格を取得できなかった行は補完せずに残す（次回の実行で取得し直す）。
+    """
+    if not CSV_PATH.exists() and not DB_PATH.exists():
         print("❌ CSVファイルが見つかりません")
         return
 
-    rows = []
-    updated_count = 0
+    source = 'store' if DB_PATH.exists() else 'csv'
+    journal = CheckpointJournal(AUTO_FILL_JOURNAL_PATH, source)
+    timings = {'取得': 0.0, '判定': 0.0, '書き込み': 0.0}
 
-    with open(CSV_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-
-        for row in reader:
-            # 商品名があるが、カテゴリが空の場合に自動補完
-            if row['name'] and not row.get('category'):
-                print(f"\n🔍 補完中: {row['name'][:50]}")
-
-                # 価格が空の場合、productUrlから取得を試みる
-                price = int(row['price']) if row.get('price') else 0
-                if not price and row.get('productUrl'):
-                    info = fetch_product_info(row['productUrl'])
-                    price = info['price']
-                    row['price'] = price
-                    print(f"   ✅ 価格: ¥{price:,}")
-
-                # AI判定
-                judgment = judge_category(row['name'], price)
-
-                # 空のフィールドを補完
-                if not row.get('id'):
-                    row['id'] = get_next_product_id()
-                if not row.get('description'):
-                    row['description'] = row['name']
-                if not row.get('imageUrl'):
-                    row['imageUrl'] = '/images/products/default.jpg'
-                row['category'] = judgment['category']
-                row['recipients'] = judgment['recipients']
-                row['occasions'] = judgment['occasions']
-                row['budgetRange'] = judgment['budgetRange']
-                row['tags'] = judgment['tags']
-                row['priority'] = judgment['priority']
-                if not row.get('isPublished'):
-                    row['isPublished'] = 'TRUE'
-
-                # productUrlがある場合、Amazon/楽天URLを設定
-                if row.get('productUrl'):
-                    url = row['productUrl']
-                    if 'amazon.co.jp' in url and not row.get('amazonUrl'):
-                        row['amazonUrl'] = url
-                    if 'rakuten.co.jp' in url and not row.get('rakutenUrl'):
-                        row['rakutenUrl'] = url
-
-                print(f"   🤖 カテゴリ: {judgment['category']}")
-                print(f"   🤖 予算帯: {judgment['budgetRange']}")
-                print(f"   ✅ 補完完了!")
-                updated_count += 1
-
-            rows.append(row)
-
-    if updated_count == 0:
+    store = open_store()
+    try:
+        _, keyed_rows = load_keyed_rows(store)
+    finally:
+        if store is not None:
+            store.close()
+    targets = [(key, row) for key, row in keyed_rows if needs_fill(row)]
+    if not targets:
+        journal.clear()
         print("✅ 補完が必要な行はありませんでした")
         return
 
-    # CSVに書き戻し
-    with open(CSV_PATH, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    # 前回の中断からの再開（商品名が変わった行は記録を使わない）
+    recorded = journal.load()
+    filled: Dict[str, Dict[str, Any]] = {}
+    prices: Dict[str, int] = {}
+    for key, row in targets:
+        entry = recorded.get(key)
+        if entry is None or entry.get('name') != row['name']:
+            continue
+        if 'row' in entry:
+            filled[key] = entry['row']
+        elif entry.get('price'):  # 取得に失敗した価格（0）は記録を使わずに取得し直す
+            prices[key] = entry['price']
+    fetched = set(prices)
+    if filled or prices:
+        print(f"🔁 前回の中断から再開します（補完済み {len(filled)}件 / 価格取得済み {len(prices)}件）")
+
+    pending = [(key, row) for key, row in targets if key not in filled]
+
+    # 価格が空の行は productUrl から並列で取得
+    to_fetch = []
+    for key, row in pending:
+        if key in prices:
+            continue
+        price = parse_csv_price(row.get('price', '')) or 0
+        if not price and row.get('productUrl'):
+            to_fetch.append((key, row))
+        else:
+            prices[key] = price
+
+    failed: List[Dict[str, Any]] = []
+    if to_fetch:
+        print(f"🔍 {len(to_fetch)}件の価格を取得中 (並列数: {max_workers}, 同一ホスト: {max_per_host})")
+        started = time.perf_counter()
+        fetch_limited = limit_per_host(fetch_product_info, max_per_host)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch_limited, row['productUrl']): (key, row) for key, row in to_fetch}
+            for done, future in enumerate(as_completed(futures), 1):
+                key, row = futures[future]
+                price = future.result()['price']
+                if not price:
+                    failed.append(row)
+                    print(f"   [{done}/{len(to_fetch)}] ❌ 価格を取得できませんでした {row['name'][:40]}")
+                    continue
+                prices[key] = price
+                fetched.add(key)
+                journal.append({'key': key, 'name': row['name'], 'price': price})
+                print(f"   [{done}/{len(to_fetch)}] ✅ ¥{price:,} {row['name'][:40]}")
+        timings['取得'] = time.perf_counter() - started
+        pending = [(key, row) for key, row in pending if key in prices]
+
+    # まとめてAI判定（IDが空の行の分は1回でまとめて採番し、以降はメモリ上で割り当てる）
+    started = time.perf_counter()
+    columns = judge_categories([row['name'] for _, row in pending],
+                               [prices[key] for key, _ in pending], use_model)
+    new_ids = iter(ID_ALLOCATOR.reserve(sum(1 for _, row in pending if not row.get('id'))))
+    entries = []
+    for n, (key, row) in enumerate(pending):
+        judgment = {field: values[n] for field, values in columns.items()}
+        if key in fetched:
+            row['price'] = prices[key]
+        complete_row(row, judgment, None if row.get('id') else next(new_ids))
+        filled[key] = row
+        entries.append({'key': key, 'name': row['name'], 'row': row})
+
+        detail = ''
+        if 'confidence' in judgment:
+            source_label = 'モデル' if judgment['confidence'] >= MODEL_MIN_CONFIDENCE else 'ルール'
+            detail = f" ({source_label}, 確信度 {judgment['confidence']:.2f})"
+        print(f"   🤖 {row['name'][:40]}: {judgment['category']}{detail} / {judgment['budgetRange']}")
+    journal.extend(entries)
+    timings['判定'] = time.perf_counter() - started
+
+    # 最新の内容を読み直し、補完した列だけを反映して1回で書き込む
+    started = time.perf_counter()
+    updated_count = 0
+    with ID_ALLOCATOR.lock():
+        store = open_store()
+        try:
+            fieldnames, keyed_rows = load_keyed_rows(store)
+            changed = []
+            for key, row in keyed_rows:
+                done_row = filled.get(key)
+                if done_row is None or done_row.get('name') != row.get('name') or not needs_fill(row):
+                    continue
+                for field in FILLED_FIELDS:
+                    if field in fieldnames:
+                        row[field] = done_row.get(field, '')
+                changed.append((key, row))
+
+            if changed and store is not None:
+                store.update_rows([(int(key), row) for key, row in changed])
+                store.export_csv(CSV_PATH)
+            elif changed:
+                write_csv_atomic(CSV_PATH, fieldnames, [row for _, row in keyed_rows])
+            updated_count = len(changed)
+        finally:
+            if store is not None:
+                store.close()
+    journal.clear()
+    FINGERPRINTS.mark([url for row in filled.values() for url in product_urls(row)], STAGE_JUDGE)
+    save_fingerprints()
+    timings['書き込み'] = time.perf_counter() - started
 
     print(f"\n✅ {updated_count}件の行を自動補完しました")
+    if failed:
+        print(f"❌ 価格を取得できなかった{len(failed)}件は補完していません（次回の auto-fill で取得し直します）:")
+        for row in failed:
+            print(f"   - {row['name'][:40]} ({row['productUrl'][:60]})")
+    print("⏱️  " + ' / '.join(f"{stage}: {elapsed:.2f}秒" for stage, elapsed in timings.items()))
+    if EXTRACTION_STATS.pages:
+        print(f"🔎 {EXTRACTION_STATS.summary()}")
+    print(f"🗂️  {HTTP_CACHE.summary()}")
+    print(f"\n💡 次のステップ:")
+    print(f"   1. python3 manage_products.py open  # 内容を確認")
+    print(f"   2. python3 manage_products.py push  # GitHubにプッシュ")
+
+
+def parse_csv_price(value: str) -> Optional[int]:
+    """CSVの価格列を整数に（空なら0、数値でなければNone）"""
+    value = (value or '').strip()
+    if not value:
+        return 0
+    return int(value) if value.isdigit() else None
+
+
+def reclassify_products(product_ids: Optional[List[str]] = None, use_model: bool = False,
+                        changed_only: bool = False):
+    """
+    既存商品のカテゴリなどを現在の判定ルールで再判定
+
+    Args:
+        product_ids: 対象の商品ID（None なら全商品）
+        changed_only: 前回の判定後に商品ページの内容（商品名・価格）が変わった商品だけを対象にする
+    """
+    if not CSV_PATH.exists() and not DB_PATH.exists():
+        print("❌ CSVファイルが見つかりません")
+        return
+
+    with ID_ALLOCATOR.lock():
+        store = open_store()
+        try:
+            if store is not None:
+                keyed_rows = list(store.rows_with_keys())
+            else:
+                fieldnames, rows = read_csv_rows(CSV_PATH)
+                keyed_rows = list(enumerate(rows))
+
+            targets, prices, skipped = [], [], 0
+            for key, row in keyed_rows:
+                if not row.get('name') or (product_ids is not None and row.get('id') not in product_ids):
+                    continue
+                if changed_only and not any(FINGERPRINTS.changed_since(url, STAGE_JUDGE)
+                                            for url in product_urls(row)):
+                    continue
+                price = parse_csv_price(row.get('price', ''))
+                if price is None:
+                    skipped += 1
+                    continue
+                targets.append((key, row))
+                prices.append(price)
+
+            started = time.perf_counter()
+            columns = judge_categories([row['name'] for _, row in targets], prices, use_model)
+            elapsed = time.perf_counter() - started
+
+            changed = []
+            field_counts = {field: 0 for field in JUDGED_FIELDS}
+            for n, (key, row) in enumerate(targets):
+                updated = False
+                for field in JUDGED_FIELDS:
+                    value = str(columns[field][n])
+                    if row.get(field, '') != value:
+                        row[field] = value
+                        field_counts[field] += 1
+                        updated = True
+                if updated:
+                    changed.append((key, row))
+
+            # 変更があった場合だけ1回で書き戻す
+            if changed:
+                if store is not None:
+                    store.update_rows(changed)
+                    store.export_csv(CSV_PATH)
+                else:
+                    write_csv_atomic(CSV_PATH, fieldnames, [row for _, row in keyed_rows])
+
+            # ロックを取ったまま保存する（save_fingerprints は同じロックを取るため使わない）
+            FINGERPRINTS.mark([url for _, row in targets for url in product_urls(row)], STAGE_JUDGE)
+            FINGERPRINTS.save()
+        finally:
+            if store is not None:
+                store.close()
+
+    if changed_only and not targets:
+        print("✅ 前回の判定から商品ページの内容が変わった商品はありませんでした")
+        return
+    print(f"🤖 {len(targets)}件を再判定しました ({elapsed * 1000:.1f}ms)")
+    if skipped:
+        print(f"⚠️  価格が数値でない {skipped}件はスキップしました")
+    if not changed:
+        print("✅ 判定結果が変わった商品はありませんでした")
+        return
+
+    print(f"✏️  {len(changed)}件を更新しました")
+    for field, count in field_counts.items():
+        if count:
+            print(f"   {field:<12} {count}件")
     print(f"\n💡 次のステップ:")
     print(f"   1. python3 manage_products.py open  # 内容を確認")
     print(f"   2. python3 manage_products.py push  # GitHubにプッシュ")
 
 
+def refresh_prices(max_workers: int = BULK_MAX_WORKERS, max_per_host: int = BULK_MAX_PER_HOST,
+                   rate: float = REFRESH_RATE_PER_HOST, dry_run: bool = False):
+    """
+    全商品の価格を商品ページから取り直し、価格・予算帯が変わった行だけを更新
+
+    productUrl / amazonUrl / rakutenUrl をすべて取得し、REFRESH_URL_FIELDS の順で
+    最初に価格が取れたURLの価格を採用する（構造化データの価格のみ）。予算帯が変わった行は
+    予算帯から決まるタグ・優先度も付け替える（apply_budget_change）。取得はホストごとの接続プール・
+    レート制限つきで並列に行い、CSV（ストア）へは最後に1回だけ書き込む。
+    """
+    if not CSV_PATH.exists() and not DB_PATH.exists():
+        print("❌ CSVファイルが見つかりません")
+        return
+
+    store = open_store()
+    try:
+        _, keyed_rows = load_keyed_rows(store)
+    finally:
+        if store is not None:
+            store.close()
+
+    targets = [(key, row) for key, row in keyed_rows
+               if row.get('id') and any(row.get(field) for field in REFRESH_URL_FIELDS)]
+    urls = list(dict.fromkeys(row[field] for _, row in targets
+                              for field in REFRESH_URL_FIELDS if row.get(field)))
+    if not urls:
+        print("✅ 価格を取得できるURLのある商品はありませんでした")
+        return
+
+    print(f"🔍 {len(targets)}商品・{len(urls)}件のURLから価格を取得中 "
+          f"(並列数: {max_workers}, 同一ホスト: {max_per_host}, ホストごと {rate:g}件/秒)")
+    fetcher = PriceFetcher(rate=rate, max_per_host=max_per_host)
+    results = {}
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetcher.fetch, url): url for url in urls}
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results[futures[future]] = result
+                if result.price:
+                    FINGERPRINTS.record(result.url, result.digest, {'price': result.price})
+                    print(f"   [{done}/{len(urls)}] ✅ ¥{result.price:,} {result.url[:60]}")
+                else:
+                    FINGERPRINTS.record_failure(result.url, result.error)
+                    print(f"   [{done}/{len(urls)}] ❌ {result.error} {result.url[:60]}")
+    finally:
+        fetcher.close()
+        save_fingerprints()
+    fetch_elapsed = time.perf_counter() - started
+
+    # 価格・予算帯が変わった行
+    changes: Dict[str, Dict[str, Any]] = {}
+    unresolved = []
+    for key, row in targets:
+        price = next((results[row[field]].price for field in REFRESH_URL_FIELDS
+                      if row.get(field) and results[row[field]].price), None)
+        if price is None:
+            unresolved.append(row)
+            continue
+        budget_range = get_budget_range_from_price(price)
+        if row.get('price', '').strip() == str(price) and row.get('budgetRange', '') == budget_range:
+            continue
+        changes[key] = {
+            'id': row['id'], 'name': row['name'],
+            'old_price': row.get('price', ''), 'price': price,
+            'old_budget': row.get('budgetRange', ''), 'budgetRange': budget_range,
+        }
+
+    # 最新の内容を読み直し、価格・予算帯だけを反映して1回で書き込む
+    updated_count = 0
+    if changes and not dry_run:
+        with ID_ALLOCATOR.lock():
+            store = open_store()
+            try:
+                fieldnames, keyed_rows = load_keyed_rows(store)
+                changed = []
+                for key, row in keyed_rows:
+                    change = changes.get(key)
+                    if change is None or row.get('id') != change['id']:
+                        continue
+                    apply_budget_change(row, change['price'])
+                    changed.append((key, row))
+
+                if changed and store is not None:
+                    store.update_rows([(int(key), row) for key, row in changed])
+                    store.export_csv(CSV_PATH)
+                elif changed:
+                    write_csv_atomic(CSV_PATH, fieldnames, [row for _, row in keyed_rows])
+                updated_count = len(changed)
+            finally:
+                if store is not None:
+                    store.close()
+
+    # 変更レポート（変動率の大きい順）
+    def change_rate(change):
+        old = parse_csv_price(change['old_price'])
+        return abs(change['price'] - old) / old if old else float('inf')
+
+    moved = [c for c in changes.values() if c['old_budget'] != c['budgetRange']]
+    print(f"\n💴 価格が変わった商品: {len(changes)}件 (予算帯の変更 {len(moved)}件)"
+          + (" ※ --dry-run のため書き込んでいません" if dry_run and changes else ""))
+    for change in sorted(changes.values(), key=change_rate, reverse=True):
+        old = parse_csv_price(change['old_price'])
+        diff = f" ({(change['price'] - old) / old:+.1%})" if old else ''
+        old_label = f"¥{old:,}" if old else (change['old_price'] or '-')
+        line = f"   {change['id']}: {old_label} → ¥{change['price']:,}{diff} {change['name'][:30]}"
+        if change['old_budget'] != change['budgetRange']:
+            line += f"\n      予算帯: {change['old_budget'] or '-'} → {change['budgetRange']}"
+        print(line)
+    print(f"   変更なし: {len(targets) - len(changes) - len(unresolved)}件")
+    if unresolved:
+        print(f"❌ {len(unresolved)}件は価格を取得できませんでした（登録済みの価格のまま）:")
+        for row in unresolved:
+            errors = ', '.join(results[row[field]].error for field in REFRESH_URL_FIELDS if row.get(field))
+            print(f"   - {row['id']}: {row['name'][:30]} ({errors})")
+
+    throughput = len(urls) / fetch_elapsed if fetch_elapsed > 0 else 0.0
+    print(f"\n⏱️  取得: {fetch_elapsed:.1f}秒 ({throughput:.2f}件/秒)")
+    for line in fetcher.histogram.render():
+        print(line)
+    print(f"🌐 {fetcher.summary()}")
+
+    if updated_count:
+        print(f"\n✅ {updated_count}件の価格・予算帯を更新しました"
+              + (f"（予算帯が変わった{len(moved)}件はタグ・優先度も更新）" if moved else ""))
+        print(f"\n💡 次のステップ:")
+        print(f"   python3 manage_products.py export  # JSONに反映")
+        print(f"   python3 manage_products.py push  # GitHubにプッシュ")
+
+
+def migrate_to_store():
+    """CSVをSQLiteストアに移行し、書き戻した結果が元のCSVと一致するか確認"""
+    if not CSV_PATH.exists():
+        print("❌ CSVファイルが見つかりません")
+        return
+
+    existed = DB_PATH.exists()
+    store = ProductStore(DB_PATH)
+    try:
+        count = store.import_csv(CSV_PATH)
+        print(f"✅ {count}件をSQLiteストアに{'取り込み直しました' if existed else '移行しました'}: {DB_PATH}")
+
+        # ラウンドトリップ確認
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exported = Path(tmp_dir) / CSV_PATH.name
+            store.export_csv(exported, track=False)
+            if filecmp.cmp(CSV_PATH, exported, shallow=False):
+                print("✅ ラウンドトリップ確認: 書き出したCSVは元のCSVと完全に一致します")
+            else:
+                print("⚠️  書き出したCSVが元のCSVと一致しません（列数の揃っていない行などを確認してください）")
+    finally:
+        store.close()
+
+    print(f"\n💡 以降は {DB_PATH.name} が正本になり、products.csv / products.json はここから生成されます")
+    print(f"   CSVを直接編集した場合は、次のコマンド実行時に自動で取り込まれます")
+
+
 def open_csv():
     """CSVファイルをデフォルトアプリで開く"""
     if not CSV_PATH.exists():
@@ -442,18 +1179,78 @@ def main():
             return
         add_product_from_url(sys.argv[2])
 
+    elif command == 'add-urls':
+        if len(sys.argv) < 3:
+            print("使い方: python3 manage_products.py add-urls <FILE|-> [--workers N]")
+            return
+        max_workers = BULK_MAX_WORKERS
+        if '--workers' in sys.argv:
+            max_workers = int(sys.argv[sys.argv.index('--workers') + 1])
+        add_products_from_urls(read_url_list(sys.argv[2]), max_workers=max_workers)
+
     elif command == 'auto-fill':
-        auto_fill_incomplete_rows()
+        max_workers = BULK_MAX_WORKERS
+        if '--workers' in sys.argv:
+            max_workers = int(sys.argv[sys.argv.index('--workers') + 1])
+        auto_fill_incomplete_rows(use_model='--model' in sys.argv, max_workers=max_workers)
+
+    elif command == 'reclassify':
+        use_model = '--model' in sys.argv
+        product_ids = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+        if '--all' in sys.argv:
+            reclassify_products(use_model=use_model)
+        elif '--changed' in sys.argv:
+            reclassify_products(use_model=use_model, changed_only=True)
+        elif product_ids:
+            reclassify_products(product_ids, use_model=use_model)
+        else:
+            print("使い方: python3 manage_products.py reclassify --all | --changed | <ID>... [--model]")
+
+    elif command == 'refresh-prices':
+        options = {}
+        for option, key, convert in (('--workers', 'max_workers', int),
+                                     ('--per-host', 'max_per_host', int),
+                                     ('--rate', 'rate', float)):
+            if option in sys.argv:
+                options[key] = convert(sys.argv[sys.argv.index(option) + 1])
+        refresh_prices(dry_run='--dry-run' in sys.argv, **options)
+
+    elif command == 'train-model':
+        if not CSV_PATH.exists() and not DB_PATH.exists():
+            print("❌ CSVファイルが見つかりません")
+            return
+        load_category_model(retrain=True)
+        print(f"💾 {MODEL_PATH}")
 
     elif command == 'list':
-        list_products()
+        filters = {}
+        for option, key in (('--category', 'category'), ('--budget', 'budget_range'),
+                            ('--recipient', 'recipient'), ('--occasion', 'occasion')):
+            if option in sys.argv:
+                filters[key] = sys.argv[sys.argv.index(option) + 1]
+        if '--unpublished' in sys.argv:
+            filters['published'] = False
+        list_products(filters)
+
+    elif command == 'status':
+        show_status(show_all='--all' in sys.argv)
 
     elif command == 'push':
-        push_to_github()
+        push_to_github(intern='--intern' in sys.argv)
+
+    elif command == 'export':
+        csv_to_json(intern='--intern' in sys.argv, verify='--verify' in sys.argv)
 
     elif command == 'open':
         open_csv()
 
+    elif command == 'migrate':
+        migrate_to_store()
+
+    elif command == 'cache-clear':
+        HTTP_CACHE.clear()
+        print(f"🗑️  キャッシュを削除しました: {CACHE_DIR}")
+
     else:
         print(f"❌ 不明なコマンド: {command}")
         print(__doc__)
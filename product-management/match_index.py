@@ -0,0 +1,132 @@
+"""
+診断結果の事前計算インデックス
+
+贈る相手 × シーン × 予算帯（それぞれ未指定を含む）の全組み合わせについて、
+matchProducts の結果（優先度順の商品ID）と、結果が3件未満の場合に
+ResultContent が表示する getRelaxedMatches の結果を事前に計算する。
+
+キーは "贈る相手|シーン|予算帯"（未指定は空文字）。
+  {"m": [マッチした商品ID...], "r": [条件緩和で追加する商品ID...]}
+どの商品にもマッチしないキーは出力しない（参照側では空として扱う）。
+"""
+
+from itertools import product as cartesian
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from build_artifacts import write_if_changed, dumps_min
+from diagnose_engine import (
+    BUDGET_RANGES, Filters, Product, get_budget_range_from_price,
+    get_relaxed_matches, match_products,
+)
+from json_export import load_previous
+
+# 結果ページに表示する最低件数（ResultContent.tsx と同期）
+MIN_RESULTS = 3
+
+
+def index_key(recipient: str = '', occasion: str = '', budget_range: str = '') -> str:
+    return f'{recipient}|{occasion}|{budget_range}'
+
+
+def _filters_from_key(key: str) -> Filters:
+    recipient, occasion, budget_range = key.split('|')
+    return {
+        'recipient': recipient or None,
+        'occasion': occasion or None,
+        'budgetRange': budget_range or None,
+    }
+
+
+def build_match_index(products: List[Product]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    全組み合わせのマッチ結果を計算する
+
+    商品を優先度順に1回だけ並べ、各商品を該当するキーすべてに追加するため、
+    各リストは最初から優先度順になる。
+    """
+    published = sorted((p for p in products if p['isPublished']), key=lambda p: -p['priority'])
+
+    matched: Dict[str, List[str]] = {}
+    recipients_seen = {''}
+    occasions_seen = {''}
+    for p in published:
+        recipients = [''] + list(dict.fromkeys(p['recipients']))
+        occasions = [''] + list(dict.fromkeys(p['occasions']))
+        budgets = ['', get_budget_range_from_price(p['price'])]
+        recipients_seen.update(recipients)
+        occasions_seen.update(occasions)
+        for r, o, b in cartesian(recipients, occasions, budgets):
+            matched.setdefault(index_key(r, o, b), []).append(p['id'])
+
+    index: Dict[str, Dict[str, List[str]]] = {}
+    for r, o in cartesian(sorted(recipients_seen), sorted(occasions_seen)):
+        relaxed_pool = matched.get(index_key(r, o), [])
+        if not relaxed_pool:
+            continue
+        for b in [''] + BUDGET_RANGES:
+            key = index_key(r, o, b)
+            ids = matched.get(key, [])
+            relaxed: List[str] = []
+            if len(ids) < MIN_RESULTS:
+                exclude = set(ids)
+                relaxed = [pid for pid in relaxed_pool if pid not in exclude][:MIN_RESULTS - len(ids)]
+            if ids or relaxed:
+                index[key] = {'m': ids, 'r': relaxed}
+    return index
+
+
+def lookup(index: Dict[str, Dict[str, List[str]]], filters: Filters) -> Tuple[List[str], List[str]]:
+    """(マッチした商品ID, 条件緩和で追加する商品ID)"""
+    entry = index.get(index_key(
+        filters.get('recipient') or '', filters.get('occasion') or '', filters.get('budgetRange') or ''
+    ), {})
+    return entry.get('m', []), entry.get('r', [])
+
+
+def verify_match_index(products: List[Product], index: Dict[str, Any]) -> List[str]:
+    """
+    参照実装（match_products / get_relaxed_matches）と突き合わせる
+
+    Returns:
+        結果が一致しなかったキーの一覧（空なら完全一致）
+    """
+    recipients = {''} | {r for p in products for r in p['recipients']}
+    occasions = {''} | {o for p in products for o in p['occasions']}
+
+    mismatches = []
+    for r, o, b in cartesian(sorted(recipients), sorted(occasions), [''] + BUDGET_RANGES):
+        key = index_key(r, o, b)
+        filters = _filters_from_key(key)
+        expected = [p['id'] for p in match_products(products, filters)]
+        expected_relaxed = []
+        if len(expected) < MIN_RESULTS:
+            expected_relaxed = [p['id'] for p in get_relaxed_matches(
+                products, filters, expected, MIN_RESULTS - len(expected))]
+        if lookup(index, filters) != (expected, expected_relaxed):
+            mismatches.append(key)
+    return mismatches
+
+
+def write_match_index(json_path: Path, out_dir: Path, verify: bool = False) -> Dict[str, Any]:
+    """
+    products.json からインデックスを生成して match-index.json に書き出す
+
+    Returns:
+        keys / bytes / written と、verify=True の場合は mismatches
+    """
+    data = load_previous(json_path)
+    products = data.get('products', [])
+    index = build_match_index(products)
+
+    payload = dumps_min({'version': data.get('version', '1.0.0'),
+                         'lastUpdated': data.get('lastUpdated', ''),
+                         'index': index})
+    result = {
+        'keys': len(index),
+        'bytes': len(payload),
+        'written': write_if_changed(Path(out_dir) / 'match-index.json', payload),
+    }
+    if verify:
+        result['mismatches'] = verify_match_index(products, index)
+    return result
@@ -0,0 +1,258 @@
+"""
+商品ページのHTMLから商品名・価格を抽出するパーサー
+
+構造化データを優先し、見つからない項目だけ従来のヒューリスティックで補う:
+  1. JSON-LD（<script type="application/ld+json"> の Product / Offer）
+  2. OpenGraph（og:title, product:price:amount など）
+  3. microdata（itemprop="name" / itemprop="price"）
+  4. ヒューリスティック（<title> と本文中の最初の「NNN円」）
+
+必要な項目がすべて構造化データで揃った時点で読み込みを打ち切る。ヒューリスティックの
+値しかない項目があるうちは、後方（microdata や <body> 内の JSON-LD）に構造化データが
+ある可能性があるため、EOF か heuristic_budget バイトまで読んでからヒューリスティックの値を使う。
+"""
+
+import codecs
+import json
+import re
+import threading
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Any, Dict, Optional
+
+# 価格パターン（例: ¥2,970円 / 2,970 円）
+PRICE_PATTERN = re.compile(r'[¥￥]?\s*([0-9,]+)\s*円')
+
+# 商品ページから取得する項目（すべて揃った時点で読み込みを打ち切る）
+DEFAULT_REQUIRED_FIELDS = ('title', 'price')
+
+# 抽出戦略（優先度の高い順）
+STRATEGIES = ('json-ld', 'opengraph', 'microdata', 'heuristic')
+STRUCTURED_STRATEGIES = STRATEGIES[:-1]
+
+# ヒューリスティックの値しかない場合に読む上限（バイト）
+HEURISTIC_BYTE_BUDGET = 512 * 1024
+
+OG_TITLE_PROPERTIES = ('og:title',)
+OG_PRICE_PROPERTIES = ('product:price:amount', 'og:price:amount')
+
+
+def parse_price(value: Any) -> Optional[int]:
+    """構造化データの価格表記（2970 / "2,970" / "2970.00"）を整数に変換"""
+    if value is None:
+        return None
+    try:
+        return int(float(str(value).replace(',', '').strip()))
+    except ValueError:
+        return None
+
+
+def _is_product(node: Dict[str, Any]) -> bool:
+    types = node.get('@type')
+    if isinstance(types, list):
+        return 'Product' in types
+    return types == 'Product'
+
+
+def _iter_json_ld_nodes(data: Any):
+    """JSON-LDのノードを再帰的に列挙（@graph や配列にも対応）"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from _iter_json_ld_nodes(data['@graph'])
+
+
+def extract_json_ld_product(text: str) -> Dict[str, Any]:
+    """JSON-LDブロックからProductの商品名と価格を取り出す"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+
+    for node in _iter_json_ld_nodes(data):
+        if not _is_product(node):
+            continue
+        found = {}
+        if isinstance(node.get('name'), str) and node['name'].strip():
+            found['title'] = node['name'].strip()
+        offers = node.get('offers')
+        for offer in offers if isinstance(offers, list) else [offers]:
+            if not isinstance(offer, dict):
+                continue
+            price = parse_price(offer.get('price', offer.get('lowPrice')))
+            if price:
+                found['price'] = price
+                break
+        if found:
+            return found
+    return {}
+
+
+class ExtractionStats:
+    """抽出戦略ごとのヒット数（スレッドセーフ）"""
+
+    def __init__(self):
+        self.pages = 0
+        self.hits = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, parser: 'ProductHTMLParser'):
+        with self._lock:
+            self.pages += 1
+            for field, strategy in parser.strategies().items():
+                self.hits[(field, strategy)] += 1
+
+    def summary(self) -> str:
+        """例: title: json-ld 80% / heuristic 20% | price: opengraph 100%"""
+        if not self.pages:
+            return "抽出: 0件"
+        parts = []
+        for field in DEFAULT_REQUIRED_FIELDS:
+            rates = [
+                f"{strategy} {self.hits[(field, strategy)] / self.pages:.0%}"
+                for strategy in STRATEGIES if self.hits[(field, strategy)]
+            ]
+            parts.append(f"{field}: {' / '.join(rates) or '-'}")
+        return f"抽出 ({self.pages}件) " + ' | '.join(parts)
+
+
+class ProductHTMLParser(HTMLParser):
+    """商品ページのHTMLから情報を抽出"""
+
+    def __init__(self, required_fields=DEFAULT_REQUIRED_FIELDS,
+                 heuristic_budget: Optional[int] = HEURISTIC_BYTE_BUDGET):
+        """
+        Args:
+            required_fields: 読み込みを打ち切る条件とする項目
+            heuristic_budget: ヒューリスティックの値しかない項目がある場合に読むバイト数
+                              （None なら EOF まで読む）
+        """
+        super().__init__()
+        self.in_title = False
+        self.required_fields = tuple(required_fields)
+        self.heuristic_budget = heuristic_budget
+        self.bytes_read = 0
+        # 項目ごとに戦略別の候補値を保持
+        self.candidates: Dict[str, Dict[str, Any]] = {'title': {}, 'price': {}}
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._json_ld_buffer: Optional[list] = None
+        self._microdata_product = False
+        self._microdata_field: Optional[str] = None
+
+    def _resolve(self, field: str):
+        candidates = self.candidates[field]
+        for strategy in STRATEGIES:
+            if candidates.get(strategy):
+                return candidates[strategy], strategy
+        return None, None
+
+    @property
+    def title(self) -> Optional[str]:
+        return self._resolve('title')[0]
+
+    @property
+    def price(self) -> Optional[int]:
+        return self._resolve('price')[0]
+
+    def strategies(self) -> Dict[str, str]:
+        """項目ごとに採用された抽出戦略"""
+        result = {}
+        for field in self.candidates:
+            strategy = self._resolve(field)[1]
+            if strategy:
+                result[field] = strategy
+        return result
+
+    def is_structured(self, field: str) -> bool:
+        """項目の値が構造化データ（JSON-LD・OpenGraph・microdata）から得られたか"""
+        return any(self.candidates[field].get(s) for s in STRUCTURED_STRATEGIES)
+
+    def _set(self, field: str, strategy: str, value):
+        if value and not self.candidates[field].get(strategy):
+            self.candidates[field][strategy] = value
+
+    def is_complete(self) -> bool:
+        """
+        必要な項目がすべて取得できたか
+
+        構造化データで揃えば即完了。ヒューリスティックの値を含む場合は、後方の構造化データを
+        優先できるよう heuristic_budget バイトまで読み進める（None なら EOF まで完了しない）。
+        """
+        if all(self.is_structured(name) for name in self.required_fields):
+            return True
+        return (self.heuristic_budget is not None and self.bytes_read >= self.heuristic_budget
+                and all(getattr(self, name) for name in self.required_fields))
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        """
+        受信したチャンクをそのまま投入する
+
+        Returns:
+            必要な項目が揃い、これ以上読む必要がなければTrue
+        """
+        self.bytes_read += len(chunk)
+        self.feed(self._decoder.decode(chunk))
+        return self.is_complete()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == 'title':
+            self.in_title = True
+        elif tag == 'script' and (attrs.get('type') or '').lower() == 'application/ld+json':
+            self._json_ld_buffer = []
+        elif tag == 'meta':
+            prop = attrs.get('property') or attrs.get('name') or ''
+            if prop in OG_TITLE_PROPERTIES:
+                self._set('title', 'opengraph', (attrs.get('content') or '').strip())
+            elif prop in OG_PRICE_PROPERTIES:
+                self._set('price', 'opengraph', parse_price(attrs.get('content')))
+
+        # microdata（itemtype=".../Product" の内側の itemprop）
+        if 'Product' in (attrs.get('itemtype') or ''):
+            self._microdata_product = True
+        itemprop = attrs.get('itemprop')
+        if self._microdata_product and itemprop in ('name', 'price'):
+            field = 'title' if itemprop == 'name' else 'price'
+            content = attrs.get('content')
+            if content is not None:
+                self._set(field, 'microdata', parse_price(content) if field == 'price' else content.strip())
+            else:
+                self._microdata_field = field
+
+        # 価格情報の抽出（一般的なパターン）
+        if (attrs.get('class') or '') and 'price' in attrs['class'].lower():
+            self.in_title = True
+
+    def handle_data(self, data):
+        if self._json_ld_buffer is not None:
+            self._json_ld_buffer.append(data)
+            return
+
+        if self._microdata_field is not None:
+            if self._microdata_field == 'price':
+                match = PRICE_PATTERN.search(data)
+                self._set('price', 'microdata', parse_price(match.group(1) if match else data))
+            else:
+                self._set('title', 'microdata', data.strip())
+            self._microdata_field = None
+
+        if self.in_title and not self.candidates['title'].get('heuristic'):
+            self._set('title', 'heuristic', data.strip())
+        # 価格パターンを検索
+        if not self.candidates['price'].get('heuristic'):
+            price_match = PRICE_PATTERN.search(data)
+            if price_match:
+                self._set('price', 'heuristic', int(price_match.group(1).replace(',', '')))
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.in_title = False
+        elif tag == 'script' and self._json_ld_buffer is not None:
+            found = extract_json_ld_product(''.join(self._json_ld_buffer))
+            self._json_ld_buffer = None
+            for field, value in found.items():
+                self._set(field, 'json-ld', value)
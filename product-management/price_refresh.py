@@ -0,0 +1,405 @@
+"""
+商品ページの価格を取り直すためのHTTPクライアント
+
+登録済みの全商品（Amazon・楽天・その他のショップ）を一度に取り直すため、
+urllib.request のように1リクエストごとに接続し直すのではなく:
+  - ホストごとに keep-alive の接続をプールして使い回す（同一ホストの同時接続数の上限を兼ねる）
+  - ホストごとのトークンバケットで、1秒あたりのリクエスト数を制限する
+  - 接続エラー・429・5xx はジッター付きの指数バックオフで再試行する（Retry-After があれば従う）
+  - リダイレクトは自前でたどる（転送先のホストのプール・レート制限を使う）
+  - 取得時間をヒストグラムに記録する
+
+価格が分かった時点で本文の受信を打ち切り、残りが少なければ読み捨てて接続を再利用する
+（長さの分からない chunked のレスポンスも DRAIN_LIMIT まで読み捨てる）。
+価格は構造化データ（JSON-LD・OpenGraph・microdata）のものだけを使う。本文中の「NNN円」は
+「送料無料 3,980円以上」のような別の金額のことがあるため、登録済みの価格を上書きしない。
+
+使い方:
+  python3 price_refresh.py --bench   # ローカルサーバーで urllib との速度を比較
+"""
+
+import hashlib
+import http.client
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from fingerprints import format_digest
+from page_parser import ProductHTMLParser
+
+USER_AGENT = 'Mozilla/5.0'
+DEFAULT_TIMEOUT = 10
+DEFAULT_RATE = 1.0  # ホストごとの1秒あたりのリクエスト数
+DEFAULT_BURST = 2   # 連続して送れるリクエスト数
+DEFAULT_MAX_PER_HOST = 2
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 16 * 1024
+# 価格が分かった後の残りがこれ以下なら読み捨てて接続を再利用し、超えるなら切断する
+DRAIN_LIMIT = 256 * 1024
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class TokenBucket:
+    """
+    トークンバケットによるレート制限
+
+    トークンは rate 個/秒で capacity 個まで貯まり、1リクエストで1個使う。
+    足りなければ先に予約（残数をマイナスに）してから待つため、待ち順が入れ替わらない。
+    """
+
+    def __init__(self, rate: float, capacity: float = DEFAULT_BURST,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """トークンを1個使う（待った秒数を返す）"""
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+class HostPool:
+    """1ホスト分の keep-alive 接続のプール（同時に使える接続数の上限つき）"""
+
+    def __init__(self, scheme: str, netloc: str, size: int, timeout: float):
+        self.scheme = scheme
+        self.netloc = netloc
+        self.timeout = timeout
+        self._idle: deque = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """(接続, 使い回した接続かどうか)"""
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop(), True
+            self.opened += 1
+        connection_class = (http.client.HTTPSConnection if self.scheme == 'https'
+                            else http.client.HTTPConnection)
+        return connection_class(self.netloc, timeout=self.timeout), False
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class LatencyHistogram:
+    """取得時間のヒストグラム（スレッドセーフ）"""
+
+    BOUNDS_MS = (50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def render(self, width: int = 30) -> List[str]:
+        """表示用の行（例: '  100〜200ms   12 ██████'）"""
+        if not self.samples:
+            return []
+        counts = [0] * (len(self.BOUNDS_MS) + 1)
+        for seconds in self.samples:
+            counts[bisect_left(self.BOUNDS_MS, seconds * 1000)] += 1
+        peak = max(counts)
+        labels = [f"〜{self.BOUNDS_MS[0]}ms"]
+        labels += [f"{low}〜{high}ms" for low, high in zip(self.BOUNDS_MS, self.BOUNDS_MS[1:])]
+        labels.append(f"{self.BOUNDS_MS[-1]}ms〜")
+        # 最も遅いサンプルのある区間までを表示
+        last = max(i for i, count in enumerate(counts) if count)
+        lines = [f"  {label:<12} {count:>5} {'█' * max(1 if count else 0, round(count / peak * width))}"
+                 for label, count in zip(labels[:last + 1], counts)]
+        lines.append(f"  p50 {self.percentile(50) * 1000:.0f}ms / p90 {self.percentile(90) * 1000:.0f}ms"
+                     f" / p99 {self.percentile(99) * 1000:.0f}ms / 最大 {max(self.samples) * 1000:.0f}ms")
+        return lines
+
+
+@dataclass
+class FetchResult:
+    """1URL分の取得結果"""
+    url: str
+    price: Optional[int] = None
+    status: Optional[int] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: str = ''
+    digest: str = ''  # パーサーが読んだ先頭部分のダイジェスト（fingerprints.body_digest と同じ規則）
+    heuristic_price: Optional[int] = None  # 構造化データがなく、本文中の「NNN円」だけ見つかった場合
+
+
+class PriceFetcher:
+    """ホストごとの接続プールとレート制限を持つ価格取得クライアント"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST,
+                 max_per_host: int = DEFAULT_MAX_PER_HOST, retries: int = DEFAULT_RETRIES,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.rate = rate
+        self.burst = burst
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.timeout = timeout
+        self.histogram = LatencyHistogram()
+        self.stats = {'requests': 0, 'retries': 0, 'redirects': 0, 'throttled': 0.0}
+        self._pools: Dict[Tuple[str, str], HostPool] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, scheme: str, netloc: str) -> Tuple[HostPool, TokenBucket]:
+        with self._lock:
+            pool = self._pools.get((scheme, netloc))
+            if pool is None:
+                pool = self._pools[(scheme, netloc)] = HostPool(
+                    scheme, netloc, self.max_per_host, self.timeout)
+            bucket = self._buckets.get(netloc)
+            if bucket is None:
+                bucket = self._buckets[netloc] = TokenBucket(self.rate, self.burst)
+            return pool, bucket
+
+    def _count(self, key: str, value: float = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None):
+        """ジッター付きの指数バックオフ（Retry-After が秒数で指定されていればそちらを優先）"""
+        if retry_after and retry_after.strip().isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+        time.sleep(min(delay, BACKOFF_MAX))
+
+    def fetch(self, url: str) -> FetchResult:
+        """URLの商品ページから価格を取得"""
+        result = FetchResult(url)
+        started = time.perf_counter()
+        for _ in range(MAX_REDIRECTS + 1):
+            location = self._fetch_once(url, result)
+            if location is None:
+                break
+            self._count('redirects')
+            url = location
+        else:
+            result.error = 'リダイレクトが多すぎます'
+        result.elapsed = time.perf_counter() - started
+        if result.price:
+            self.histogram.record(result.elapsed)
+        return result
+
+    def _fetch_once(self, url: str, result: FetchResult) -> Optional[str]:
+        """1URLを（再試行しながら）取得。リダイレクトなら転送先のURLを返す"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            result.error = f'URLが不正です: {url}'
+            return None
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        pool, bucket = self._host(parts.scheme, parts.netloc)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retries')
+            result.attempts += 1
+            self._count('throttled', bucket.acquire())
+            self._count('requests')
+            conn, reused = pool.acquire()
+            reusable = False
+            try:
+                conn.request('GET', path, headers={'User-Agent': USER_AGENT, 'Connection': 'keep-alive'})
+                response = conn.getresponse()
+                result.status = response.status
+
+                if response.status in RETRY_STATUSES:
+                    retry_after = response.getheader('Retry-After')
+                    reusable = self._drain(response)
+                    result.error = f'HTTP {response.status}'
+                    if attempt < self.retries:
+                        pool.release(conn, reusable)
+                        conn = None
+                        self._backoff(attempt, retry_after)
+                    continue
+
+                if response.status in REDIRECT_STATUSES and response.getheader('Location'):
+                    reusable = self._drain(response)
+                    return urljoin(url, response.getheader('Location'))
+
+                if response.status != 200:
+                    reusable = self._drain(response)
+                    result.error = f'HTTP {response.status}'
+                    return None
+
+                parser = ProductHTMLParser(('price',))
+                hasher = hashlib.sha256()
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    hasher.update(chunk)
+                    if not chunk or parser.feed_bytes(chunk):
+                        break
+                parser.close()
+                result.digest = format_digest(hasher.hexdigest(), parser.bytes_read)
+                reusable = self._drain(response)
+                if parser.is_structured('price'):
+                    result.price = parser.price
+                    result.error = ''
+                elif parser.price:
+                    result.heuristic_price = parser.price
+                    result.error = f'構造化データの価格がありません（本文中の ¥{parser.price:,} は使いません）'
+                else:
+                    result.error = '価格が見つかりません'
+                return None
+            except (OSError, http.client.HTTPException) as e:
+                result.error = f'{type(e).__name__}: {e}'
+                if reused and attempt == 0:
+                    # 相手に閉じられていた keep-alive 接続なら、待たずに新しい接続で再試行する
+                    continue
+                if attempt < self.retries:
+                    pool.release(conn, False)
+                    conn = None
+                    self._backoff(attempt)
+            finally:
+                if conn is not None:
+                    pool.release(conn, reusable)
+        return None
+
+    @staticmethod
+    def _drain(response: http.client.HTTPResponse) -> bool:
+        """
+        レスポンスの残りを読み捨てる（ダイジェストには含めない）
+
+        長さの分からない（chunked の）レスポンスは、DRAIN_LIMIT まで読んで終わらなければ諦める。
+
+        Returns:
+            接続を再利用できるか（残りが DRAIN_LIMIT を超える場合は False）
+        """
+        if response.isclosed():
+            return not response.will_close
+        if response.length is not None and response.length > DRAIN_LIMIT:
+            return False
+        drained = 0
+        while drained <= DRAIN_LIMIT:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                return not response.will_close
+            drained += len(chunk)
+        return False
+
+    def summary(self) -> str:
+        """接続・再試行の集計"""
+        opened = sum(pool.opened for pool in self._pools.values())
+        reused = sum(pool.reused for pool in self._pools.values())
+        reuse_rate = reused / (opened + reused) if opened + reused else 0.0
+        return (f"リクエスト {self.stats['requests']}件 / 接続 {opened}本（再利用 {reused}回・"
+                f"再利用率 {reuse_rate:.0%}）/ "
+                f"再試行 {self.stats['retries']}回 / リダイレクト {self.stats['redirects']}回 / "
+                f"レート制限の待ち {self.stats['throttled']:.1f}秒 / ホスト {len(self._buckets)}件")
+
+    def close(self):
+        for pool in self._pools.values():
+            pool.close()
+
+
+# --- ベンチマーク ---
+
+def run_benchmark(count: int = 200, workers: int = 4):
+    """ローカルの keep-alive サーバーで、urllib（毎回接続）とプールの速度を比べる"""
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    page = ('<html><head><script type="application/ld+json">'
+            '{"@type": "Product", "name": "ベンチマーク", "offers": {"price": "2980"}}'
+            '</script></head><body>' + 'x' * 20000 + '</body></html>').encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # ヘッダーと本文を別々に送るため、Nagle と遅延ACKで keep-alive 接続が40ms待たされないようにする
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_port}/item/{i}' for i in range(count)]
+
+    def fetch_urllib(url):
+        parser = ProductHTMLParser(('price',))
+        with urllib.request.urlopen(urllib.request.Request(url, headers={'User-Agent': USER_AGENT})) as r:
+            parser.feed_bytes(r.read())
+        return parser.price
+
+    fetcher = PriceFetcher(rate=10_000, burst=10_000, max_per_host=workers)
+    try:
+        for label, fetch in (('urllib（毎回接続）', fetch_urllib),
+                             ('PriceFetcher（プール）', lambda url: fetcher.fetch(url).price)):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                prices = list(executor.map(fetch, urls))
+            elapsed = time.perf_counter() - started
+            assert prices == [2980] * count, '価格が取得できませんでした'
+            print(f"{label:<24} {count}件 {elapsed * 1000:>8.1f}ms  {count / elapsed:>8.0f}件/秒")
+        print(fetcher.summary())
+        for line in fetcher.histogram.render():
+            print(line)
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    if '--bench' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    run_benchmark()
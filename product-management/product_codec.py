@@ -0,0 +1,342 @@
+"""
+products.csv の行 ⇔ products.json の商品の変換（共通コーデック）
+
+manage_products.py の export、scripts/csv_to_json.py、scripts/json_to_csv.py は
+すべてこのモジュールで変換する。列と型は FIELDS に宣言し、CSVのヘッダーごとに
+変換関数を1回だけ生成する（列の位置や型の分岐を行ごとに調べない）。
+
+変換のルール:
+  - 文字列は前後の空白を除く
+  - 整数の空欄は既定値（price=0、priority=80）
+  - 配列はカンマ区切り（各要素の前後の空白を除き、空の要素は捨てる）
+  - isPublished は大文字・小文字を問わず TRUE なら true
+  - amazonUrl / rakutenUrl は affiliateLinks にまとめる
+  - productUrl は空でなければJSONにも含める（json_to_csv で失われないように）
+
+使い方:
+  python3 product_codec.py --check   # ランダムな商品でのラウンドトリップ確認
+  python3 product_codec.py --bench   # 変換速度（行/秒）
+"""
+
+import csv
+import io
+import random
+import sys
+import time
+from operator import itemgetter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# 優先度が空欄の場合の既定値（judge_category の基本値と同じ）
+DEFAULT_PRIORITY = 80
+
+
+class Field(NamedTuple):
+    """商品の1項目"""
+    name: str  # JSONのキー
+    kind: str  # str / int / list / bool / links
+    default: Any = None  # int の空欄の値
+    columns: Sequence[str] = ()  # 対応するCSVの列（省略時は name）
+    optional: bool = False  # True なら空のときJSONに含めない
+
+
+# JSONのキーの順番。CSVの列の順番は CSV_COLUMNS
+FIELDS = (
+    Field('id', 'str'),
+    Field('name', 'str'),
+    Field('description', 'str'),
+    Field('price', 'int', default=0),
+    Field('imageUrl', 'str'),
+    Field('category', 'str'),
+    Field('recipients', 'list'),
+    Field('occasions', 'list'),
+    Field('budgetRange', 'str'),
+    Field('affiliateLinks', 'links', columns=('amazonUrl', 'rakutenUrl')),
+    Field('tags', 'list'),
+    Field('priority', 'int', default=DEFAULT_PRIORITY),
+    Field('isPublished', 'bool'),
+    Field('productUrl', 'str', optional=True),
+)
+
+# affiliateLinks の列とプロバイダー
+AFFILIATE_COLUMNS = {'amazonUrl': 'amazon', 'rakutenUrl': 'rakuten'}
+
+CSV_COLUMNS = [
+    'id', 'name', 'description', 'price', 'imageUrl', 'category',
+    'recipients', 'occasions', 'budgetRange', 'amazonUrl', 'rakutenUrl',
+    'tags', 'priority', 'isPublished', 'productUrl',
+]
+
+
+def now_timestamp() -> str:
+    """createdAt / updatedAt / lastUpdated 用の時刻（JavaScriptの toISOString と同じ形式）"""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+# --- 生成したコードから呼ぶ変換関数（商品 → 行） ---
+
+def _join(values: Any) -> str:
+    return ','.join(values) if isinstance(values, list) else ''
+
+
+def _link_url(links: Any, provider: str) -> str:
+    if not isinstance(links, list):
+        return ''
+    for link in links:
+        if isinstance(link, dict) and link.get('provider') == provider:
+            return link.get('url', '')
+    return ''
+
+
+def _scalar(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+_HELPERS = {'_link_url': _link_url, '_join': _join, '_scalar': _scalar}
+
+
+def _compile(source: str, name: str) -> Callable:
+    namespace = dict(_HELPERS)
+    exec(compile(source, f'<product_codec.{name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+class ProductCodec:
+    """
+    CSVのヘッダーに合わせて生成した変換関数
+
+    decode(values) は csv.reader の1行（リスト）を商品に、encode(product) は
+    商品を CSV_COLUMNS の順のリストに変換する。
+    """
+
+    def __init__(self, header: Optional[Sequence[str]] = None):
+        self.header = list(header or CSV_COLUMNS)
+        self.source = self._decoder_source()
+        self.decode: Callable[[Sequence[str]], Dict[str, Any]] = _compile(self.source, 'decode')
+        self.encode: Callable[[Dict[str, Any]], List[str]] = _compile(self._encoder_source(), 'encode')
+        self._width = len(self.header)
+        self._getter = itemgetter(*self.header) if len(self.header) > 1 else None
+
+    def _column(self, name: str) -> str:
+        """行の中で列 name を参照する式（ヘッダーにない列は空文字）"""
+        return f'row[{self.header.index(name)}]' if name in self.header else "''"
+
+    def _decoder_source(self) -> str:
+        items, optional = [], []
+        for field in FIELDS:
+            if field.kind == 'links':
+                pairs = ', '.join(f'({AFFILIATE_COLUMNS[c]!r}, {self._column(c)})'
+                                  for c in field.columns)
+                expr = f"[{{'provider': p, 'url': u.strip()}} for p, u in ({pairs},) if u.strip()]"
+            else:
+                column = self._column((field.columns or (field.name,))[0])
+                expr = {
+                    'str': f'{column}.strip()',
+                    # int() は前後の空白を無視する
+                    'int': f'(int({column}) if {column}.strip() else {field.default!r})',
+                    'list': f'[v for v in map(str.strip, {column}.split(",")) if v]',
+                    'bool': f"{column}.strip().upper() == 'TRUE'",
+                }[field.kind]
+            if field.optional:
+                optional.append(f'    value = {expr}\n'
+                                f'    if value:\n'
+                                f'        product[{field.name!r}] = value\n')
+            else:
+                items.append(f'        {field.name!r}: {expr},\n')
+        return ('def decode(row):\n'
+                '    product = {\n' + ''.join(items) + '    }\n'
+                + ''.join(optional) +
+                '    return product\n')
+
+    def _encoder_source(self) -> str:
+        by_column = {}
+        for field in FIELDS:
+            if field.kind == 'links':
+                for column in field.columns:
+                    by_column[column] = (f"_link_url(product.get({field.name!r}), "
+                                         f"{AFFILIATE_COLUMNS[column]!r})")
+                continue
+            getter = f'product.get({field.name!r})'
+            by_column[(field.columns or (field.name,))[0]] = {
+                'str': f'_scalar({getter})',
+                'int': f'_scalar({getter})',
+                'list': f'_join({getter})',
+                'bool': f"'TRUE' if {getter} else 'FALSE'",
+            }[field.kind]
+        values = ''.join(f'        {by_column[c]},\n' for c in CSV_COLUMNS)
+        return 'def encode(product):\n    return [\n' + values + '    ]\n'
+
+    def decode_values(self, values: Sequence[Optional[str]]) -> Dict[str, Any]:
+        """列数が足りない・None を含む行も受け付ける decode"""
+        if len(values) < self._width or None in values:
+            values = [v or '' for v in values] + [''] * (self._width - len(values))
+        return self.decode(values)
+
+    def decode_mapping(self, row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """csv.DictReader / ProductStore の行（dict）を商品に変換"""
+        try:
+            values = self._getter(row)
+        except (KeyError, TypeError):
+            values = [row.get(name) for name in self.header]
+        if None in values:
+            values = [v or '' for v in values]
+        return self.decode(values)
+
+
+DEFAULT_CODEC = ProductCodec()
+
+
+def decode_rows(header: Sequence[str], rows) -> List[Dict[str, Any]]:
+    """dict の行の一覧を商品の一覧に変換"""
+    codec = ProductCodec(header)
+    return [codec.decode_mapping(row) for row in rows]
+
+
+def read_csv_values(csv_path) -> Tuple[List[str], List[List[str]]]:
+    """
+    CSVのヘッダーと全行（csv.reader のリストのまま。ProductCodec(header).decode でそのまま変換できる）
+
+    列数が足りない行は空文字で埋める。空行は読み飛ばす。
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        rows = [row for row in reader if row]
+    for row in rows:
+        if len(row) < width:
+            row.extend([''] * (width - len(row)))
+    return header, rows
+
+
+# --- ラウンドトリップ確認・ベンチマーク ---
+
+_TEXT = ['ギフト', 'セット', 'Gift', '"引用"', '改\n行', 'a,b', '限定', 'ñ', '🎁', '']
+
+
+def _random_text(rng: random.Random, allow_comma: bool = True) -> str:
+    parts = [rng.choice(_TEXT) for _ in range(rng.randint(0, 4))]
+    text = ''.join(p if allow_comma else p.replace(',', '') for p in parts)
+    return text.strip()
+
+
+def random_product(rng: random.Random) -> Dict[str, Any]:
+    """変換ルールで正規化済みの（decode の結果になり得る）ランダムな商品"""
+    product = {
+        'id': f'prod_{rng.randint(0, 10 ** 6):06d}',
+        'name': _random_text(rng),
+        'description': _random_text(rng),
+        'price': rng.choice([0, 1, 2999, 3000, rng.randint(0, 10 ** 7)]),
+        'imageUrl': rng.choice(['', '/images/products/default.jpg']),
+        'category': rng.choice(['', 'コスメ', '花・植物']),
+        'recipients': [t for t in (_random_text(rng, False) for _ in range(rng.randint(0, 3))) if t],
+        'occasions': [t for t in (_random_text(rng, False) for _ in range(rng.randint(0, 3))) if t],
+        'budgetRange': rng.choice(['', '〜3,000円', '30,000円〜']),
+        'affiliateLinks': [{'provider': p, 'url': f'https://example.com/{p}?a=1,2'}
+                           for p in ('amazon', 'rakuten') if rng.random() < 0.5],
+        'tags': [t for t in (_random_text(rng, False) for _ in range(rng.randint(0, 3))) if t],
+        'priority': rng.choice([0, 80, 95, rng.randint(0, 1000)]),
+        'isPublished': rng.random() < 0.8,
+    }
+    if rng.random() < 0.5:
+        product['productUrl'] = f'https://example.com/item/{rng.randint(0, 999)}'
+    return product
+
+
+def check_round_trip(count: int = 5000, seed: int = 0) -> List[str]:
+    """商品 → CSV → 商品 がすべて一致するか（不一致の説明を返す）"""
+    rng = random.Random(seed)
+    products = [random_product(rng) for _ in range(count)]
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(DEFAULT_CODEC.encode(p) for p in products)
+
+    reader = csv.reader(io.StringIO(buf.getvalue()))
+    # ヘッダーの列順が違っても同じ結果になることも確認する
+    header = next(reader)
+    shuffled = header[:]
+    rng.shuffle(shuffled)
+    order = [header.index(c) for c in shuffled]
+    codec = ProductCodec(shuffled)
+
+    errors = []
+    for product, row in zip(products, reader):
+        decoded = DEFAULT_CODEC.decode(row)
+        if decoded != product:
+            errors.append(f'{product!r} → {decoded!r}')
+        if codec.decode([row[i] for i in order]) != product:
+            errors.append(f'列順入れ替え {product!r}')
+    return errors
+
+
+def _legacy_row_to_product(row: Dict[str, str]) -> Dict[str, Any]:
+    """共通化前の scripts/csv_to_json.py の変換（ベンチマークの比較用）"""
+    affiliate_links = []
+    if row['amazonUrl'].strip():
+        affiliate_links.append({'provider': 'amazon', 'url': row['amazonUrl'].strip()})
+    if row['rakutenUrl'].strip():
+        affiliate_links.append({'provider': 'rakuten', 'url': row['rakutenUrl'].strip()})
+    return {
+        'id': row['id'].strip(),
+        'name': row['name'].strip(),
+        'description': row['description'].strip(),
+        'price': int(row['price']) if row['price'].strip() else 0,
+        'imageUrl': row['imageUrl'].strip(),
+        'category': row['category'].strip(),
+        'recipients': [r.strip() for r in row['recipients'].split(',') if r.strip()],
+        'occasions': [o.strip() for o in row['occasions'].split(',') if o.strip()],
+        'budgetRange': row['budgetRange'].strip(),
+        'affiliateLinks': affiliate_links,
+        'tags': [t.strip() for t in row['tags'].split(',') if t.strip()],
+        'priority': int(row['priority']) if row['priority'].strip() else 0,
+        'isPublished': row['isPublished'].strip().upper() == 'TRUE',
+    }
+
+
+def run_benchmark(count: int = 200_000):
+    rng = random.Random(1)
+    products = [random_product(rng) for _ in range(1000)]
+    rows = [DEFAULT_CODEC.encode(products[i % len(products)]) for i in range(count)]
+    dict_rows = [dict(zip(CSV_COLUMNS, row)) for row in rows]
+
+    timings = {}
+    started = time.perf_counter()
+    for row in dict_rows:
+        _legacy_row_to_product(row)
+    timings['従来（dict・行ごとに split）'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for row in dict_rows:
+        DEFAULT_CODEC.decode_mapping(row)
+    timings['コーデック（dict）'] = time.perf_counter() - started
+
+    decode = DEFAULT_CODEC.decode
+    started = time.perf_counter()
+    for row in rows:
+        decode(row)
+    timings['コーデック（csv.reader の行）'] = time.perf_counter() - started
+
+    encode = DEFAULT_CODEC.encode
+    started = time.perf_counter()
+    for product in products * (count // len(products)):
+        encode(product)
+    timings['コーデック（商品 → 行）'] = time.perf_counter() - started
+
+    base = timings['従来（dict・行ごとに split）']
+    for label, elapsed in timings.items():
+        print(f"{label:<28} {elapsed * 1000:>8.1f}ms  {count / elapsed:>12,.0f}行/秒  {base / elapsed:>5.2f}x")
+
+
+if __name__ == '__main__':
+    if '--check' in sys.argv:
+        errors = check_round_trip()
+        if errors:
+            print(f"❌ {len(errors)}件が一致しません: {errors[:3]}")
+            sys.exit(1)
+        print("✅ ラウンドトリップ確認: 5,000件すべて一致しました")
+    elif '--bench' in sys.argv:
+        run_benchmark()
+    else:
+        print(__doc__)
@@ -0,0 +1,304 @@
+"""
+商品データのコンパクトなメモリ表現
+
+csv.DictReader の行（15個の文字列キーを持つdict）の代わりに、カタログ全体を
+扱う処理で使う。
+  - Product: __slots__ を持つ1商品のレコード。カテゴリ・予算帯・贈る相手・シーン・
+    タグは sys.intern で同じ文字列を共有し、配列の項目はタプルで持つ
+  - ProductTable: 項目ごとの列（array・値ごとのビット）で持つ
+    列指向の表。全商品を条件で絞り込む処理に使う
+
+使い方:
+  python3 product_model.py --bench [件数]   # dict との1商品あたりのメモリ・走査速度の比較
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from product_codec import FIELDS
+
+# 項目の種類ごとの既定値
+_EMPTY = {'str': '', 'int': 0, 'list': (), 'bool': False, 'links': ()}
+
+
+def _intern_all(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sys.intern(v) for v in values)
+
+
+class Product:
+    """1商品（product_codec の decode 結果と同じ項目を持つ）"""
+
+    __slots__ = tuple(f.name for f in FIELDS)
+
+    def __init__(self, **values: Any):
+        for field in FIELDS:
+            setattr(self, field.name, values.get(field.name, _EMPTY[field.kind]))
+
+    @classmethod
+    def from_dict(cls, product: Dict[str, Any]) -> 'Product':
+        """products.json の商品（dict）から作る"""
+        self = cls.__new__(cls)
+        self.id = product['id']
+        self.name = product['name']
+        self.description = product['description']
+        self.price = product['price']
+        self.imageUrl = product['imageUrl']
+        self.category = sys.intern(product['category'])
+        self.recipients = _intern_all(product['recipients'])
+        self.occasions = _intern_all(product['occasions'])
+        self.budgetRange = sys.intern(product['budgetRange'])
+        self.affiliateLinks = tuple((link['provider'], link['url']) for link in product['affiliateLinks'])
+        self.tags = _intern_all(product['tags'])
+        self.priority = product['priority']
+        self.isPublished = product['isPublished']
+        self.productUrl = product.get('productUrl', '')
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """products.json の商品（dict）に戻す"""
+        product = {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'price': self.price,
+            'imageUrl': self.imageUrl,
+            'category': self.category,
+            'recipients': list(self.recipients),
+            'occasions': list(self.occasions),
+            'budgetRange': self.budgetRange,
+            'affiliateLinks': [{'provider': p, 'url': u} for p, u in self.affiliateLinks],
+            'tags': list(self.tags),
+            'priority': self.priority,
+            'isPublished': self.isPublished,
+        }
+        if self.productUrl:
+            product['productUrl'] = self.productUrl
+        return product
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f'Product(id={self.id!r}, name={self.name!r}, price={self.price})'
+
+
+class _Codes:
+    """値 ⇔ 番号の対応表（列指向の表で文字列の代わりに番号を持つ）"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return self.index[value]
+
+
+class ProductTable:
+    """
+    列指向の商品表
+
+    価格・優先度は array、カテゴリ・予算帯は値の番号の array で持つ。
+    さらにカテゴリ・予算帯・贈る相手・シーン・公開状態は、diagnose_engine.BitsetEngine と
+    同じく「その値を持つ商品の位置」のビット（int）を値ごとに作るため、絞り込みは
+    ビットANDと価格の比較だけで済む。
+    """
+
+    _BIT_FIELDS = ('category', 'budgetRange', 'recipients', 'occasions', 'isPublished')
+
+    def __init__(self, products: Iterable[Product] = ()):
+        self.products: List[Product] = []
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.prices = array('q')
+        self.priorities = array('q')
+        self.categories = _Codes()
+        self.budget_ranges = _Codes()
+        self.category_codes = array('H')
+        self.budget_codes = array('H')
+        self._positions: Dict[str, Dict[Any, List[int]]] = {name: {} for name in self._BIT_FIELDS}
+        self._masks: Optional[Dict[str, Dict[Any, int]]] = None
+        for product in products:
+            self.append(product)
+
+    def append(self, product: Product):
+        i = len(self.ids)
+        self.products.append(product)
+        self.ids.append(product.id)
+        self.names.append(product.name)
+        self.prices.append(product.price)
+        self.priorities.append(product.priority)
+        self.category_codes.append(self.categories.code(product.category))
+        self.budget_codes.append(self.budget_ranges.code(product.budgetRange))
+        positions = self._positions
+        positions['category'].setdefault(product.category, []).append(i)
+        positions['budgetRange'].setdefault(product.budgetRange, []).append(i)
+        positions['isPublished'].setdefault(bool(product.isPublished), []).append(i)
+        for value in product.recipients:
+            positions['recipients'].setdefault(value, []).append(i)
+        for value in product.occasions:
+            positions['occasions'].setdefault(value, []).append(i)
+        self._masks = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self.products)
+
+    def _mask(self, field: str, value: Any) -> int:
+        if self._masks is None:
+            # 1ビットずつ OR すると巨大な整数の再生成が商品数分発生するため、バイト列から一度に作る
+            size = (len(self) + 7) // 8
+            self._masks = {}
+            for name, by_value in self._positions.items():
+                masks = {}
+                for v, indexes in by_value.items():
+                    buf = bytearray(size)
+                    for i in indexes:
+                        buf[i >> 3] |= 1 << (i & 7)
+                    masks[v] = int.from_bytes(buf, 'little')
+                self._masks[name] = masks
+        return self._masks[field].get(value, 0)
+
+    def select(self, category: Optional[str] = None, budget_range: Optional[str] = None,
+               recipient: Optional[str] = None, occasion: Optional[str] = None,
+               published: Optional[bool] = None, min_price: Optional[int] = None,
+               max_price: Optional[int] = None) -> List[int]:
+        """条件に合う商品の位置（元の並び順）"""
+        mask = (1 << len(self)) - 1
+        for field, value in (('category', category), ('budgetRange', budget_range),
+                             ('recipients', recipient), ('occasions', occasion),
+                             ('isPublished', published)):
+            if value is not None:
+                mask &= self._mask(field, value)
+
+        # 2進文字列に一度だけ変換し、立っているビットを下位から探す
+        bits = bin(mask)[:1:-1]
+        prices = self.prices
+        low = min_price if min_price is not None else -(1 << 63)
+        high = max_price if max_price is not None else (1 << 63) - 1
+        result = []
+        i = bits.find('1')
+        while i >= 0:
+            if low <= prices[i] <= high:
+                result.append(i)
+            i = bits.find('1', i + 1)
+        return result
+
+    def category_counts(self) -> Dict[str, int]:
+        """カテゴリごとの商品数"""
+        counts = [0] * len(self.categories.values)
+        for code in self.category_codes:
+            counts[code] += 1
+        return dict(zip(self.categories.values, counts))
+
+
+# --- ベンチマーク ---
+
+def _generate_csv(count: int) -> str:
+    """products.csv と同じ形式のCSV"""
+    import csv
+    import io
+    import random
+    from category_rules import RULES
+    from diagnose_engine import BUDGET_RANGES, OCCASIONS, RECIPIENTS
+    from product_codec import CSV_COLUMNS
+
+    rng = random.Random(0)
+    categories = RULES.categories + [RULES.default_category]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for i in range(count):
+        writer.writerow([
+            f'prod_{i:06d}', f'ギフトセット {i}', f'ベンチマーク用の商品説明 {i}',
+            rng.randint(500, 50000), '/images/products/default.jpg', rng.choice(categories),
+            ','.join(rng.sample(RECIPIENTS, 4)), ','.join(rng.sample(OCCASIONS, 3)),
+            rng.choice(BUDGET_RANGES), f'https://www.amazon.co.jp/dp/{i:010d}', '',
+            'プチギフト,人気', rng.choice([80, 85, 90]), rng.choice(['TRUE', 'TRUE', 'FALSE']), '',
+        ])
+    return out.getvalue()
+
+
+def _measure(build) -> Tuple[Any, int]:
+    """build() の結果が保持しているメモリ（途中で捨てたものは含まない）"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def run_benchmark(count: int = 100_000, repeat: int = 5):
+    import csv
+    import io
+    from product_codec import DEFAULT_CODEC
+
+    text = _generate_csv(count)
+
+    def reader():
+        return csv.DictReader(io.StringIO(text))
+
+    decode = DEFAULT_CODEC.decode_mapping
+    rows, rows_bytes = _measure(lambda: list(reader()))
+    decoded, decoded_bytes = _measure(lambda: [decode(r) for r in reader()])
+    products, product_bytes = _measure(lambda: [Product.from_dict(decode(r)) for r in reader()])
+    # 表は Product を参照するだけなので、列の分だけを表示する
+    table, table_bytes = _measure(lambda: ProductTable(products))
+
+    print(f"🧮 {count:,}件の1商品あたりのメモリ")
+    print(f"   dict（csv.DictReader の行）     {rows_bytes / count:>8.0f} B")
+    print(f"   dict（decode 済み）             {decoded_bytes / count:>8.0f} B")
+    print(f"   Product（__slots__・intern）    {product_bytes / count:>8.0f} B")
+    print(f"   ProductTable（追加の列）        {table_bytes / count:>8.0f} B")
+
+    def scan_rows():
+        return [r['id'] for r in rows
+                if r['category'] == 'コスメ' and '母' in [v.strip() for v in r['recipients'].split(',')]
+                and r['isPublished'].upper() == 'TRUE']
+
+    def scan_decoded():
+        return [p['id'] for p in decoded
+                if p['category'] == 'コスメ' and '母' in p['recipients'] and p['isPublished']]
+
+    def scan_products():
+        return [p.id for p in products
+                if p.category == 'コスメ' and '母' in p.recipients and p.isPublished]
+
+    def scan_table():
+        return [table.ids[i] for i in table.select(category='コスメ', recipient='母', published=True)]
+
+    expected = scan_rows()
+    assert scan_decoded() == scan_products() == scan_table() == expected, '絞り込み結果が一致しません'
+
+    print(f"\n🔎 走査（カテゴリ=コスメ・贈る相手=母・公開中 → {len(expected):,}件）")
+    base = None
+    for label, scan in (('dict（CSVの行）', scan_rows),
+                        ('dict（decode 済み）', scan_decoded),
+                        ('Product', scan_products),
+                        ('ProductTable', scan_table)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            scan()
+        elapsed = (time.perf_counter() - started) / repeat
+        base = base or elapsed
+        print(f"   {label:<20} {elapsed * 1000:>8.2f}ms  {base / elapsed:>6.1f}x")
+
+
+if __name__ == '__main__':
+    if '--bench' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    extra = sys.argv[sys.argv.index('--bench') + 1:]
+    run_benchmark(int(extra[0]) if extra else 100_000)
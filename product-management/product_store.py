@@ -0,0 +1,214 @@
+"""
+SQLiteによる商品ストア
+
+data/products.db が存在する場合はこれを正本とし、products.csv / products.json は
+ここから生成するエクスポートとして扱う。CSVの値は文字列のまま保存するため、
+import → export で元のCSVとバイト単位で一致する。
+
+CSVをNumbers等で直接編集した場合は、次回の読み込み時に変更を検知して取り込み直す。
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from product_codec import CSV_COLUMNS
+
+# CSVの標準カラム（この順で出力）
+PRODUCT_FIELDS = CSV_COLUMNS
+
+COLUMN_DEFS = ',\n    '.join(f'"{name}" TEXT NOT NULL DEFAULT \'\'' for name in PRODUCT_FIELDS)
+
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS products (
+    pk INTEGER PRIMARY KEY AUTOINCREMENT,
+    position INTEGER NOT NULL,
+    {COLUMN_DEFS},
+    extra TEXT NOT NULL DEFAULT '{{}}'
+);
+CREATE INDEX IF NOT EXISTS idx_products_position ON products(position);
+CREATE INDEX IF NOT EXISTS idx_products_id ON products(id);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_budget_range ON products(budgetRange);
+CREATE INDEX IF NOT EXISTS idx_products_published ON products(upper(isPublished));
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+COLUMNS = ', '.join(f'"{name}"' for name in PRODUCT_FIELDS)
+
+
+class ProductStore:
+    """products.csv と同じ行を保持するSQLiteストア"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """トランザクション（例外時はロールバック）"""
+        with self.conn:
+            yield self.conn
+
+    # --- meta ---
+
+    def _get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else default
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value),
+        )
+
+    @property
+    def fieldnames(self) -> List[str]:
+        """CSVのヘッダー（取り込んだ時の並び順）"""
+        return json.loads(self._get_meta('fieldnames', json.dumps(PRODUCT_FIELDS)))
+
+    # --- 行の変換 ---
+
+    def _to_params(self, row: Dict[str, Any]) -> Tuple[list, str]:
+        values = ['' if row.get(name) is None else str(row.get(name)) for name in PRODUCT_FIELDS]
+        extra = {k: ('' if v is None else str(v)) for k, v in row.items()
+                 if k not in PRODUCT_FIELDS and k is not None}
+        return values, json.dumps(extra, ensure_ascii=False)
+
+    def _to_row(self, record: sqlite3.Row, fieldnames: List[str]) -> Dict[str, str]:
+        extra = json.loads(record['extra'])
+        return {name: record[name] if name in PRODUCT_FIELDS else extra.get(name, '')
+                for name in fieldnames}
+
+    # --- 読み込み ---
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+    def rows(self) -> List[Dict[str, str]]:
+        """全行をCSVと同じ順序で取得"""
+        return [row for _, row in self.rows_with_keys()]
+
+    def rows_with_keys(self) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """(主キー, 行) をCSVと同じ順序で取得"""
+        fieldnames = self.fieldnames
+        for record in self.conn.execute('SELECT * FROM products ORDER BY position'):
+            yield record['pk'], self._to_row(record, fieldnames)
+
+    def get(self, product_id: str) -> Optional[Dict[str, str]]:
+        """IDで1件取得"""
+        record = self.conn.execute(
+            'SELECT * FROM products WHERE id = ? ORDER BY position LIMIT 1', (product_id,)
+        ).fetchone()
+        return self._to_row(record, self.fieldnames) if record else None
+
+    def find(self, category: Optional[str] = None, budget_range: Optional[str] = None,
+             published: Optional[bool] = None) -> List[Dict[str, str]]:
+        """カテゴリ・予算帯・公開状態で絞り込み（インデックス使用）"""
+        clauses, params = [], []
+        if category is not None:
+            clauses.append('category = ?')
+            params.append(category)
+        if budget_range is not None:
+            clauses.append('budgetRange = ?')
+            params.append(budget_range)
+        if published is not None:
+            clauses.append("upper(isPublished) = 'TRUE'" if published
+                           else "upper(isPublished) != 'TRUE'")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        fieldnames = self.fieldnames
+        return [self._to_row(record, fieldnames) for record in self.conn.execute(
+            f'SELECT * FROM products {where} ORDER BY position', params)]
+
+    # --- 書き込み ---
+
+    def _insert(self, conn: sqlite3.Connection, position: int, row: Dict[str, Any]):
+        values, extra = self._to_params(row)
+        conn.execute(
+            f'INSERT INTO products (position, {COLUMNS}, extra) '
+            f'VALUES (?, {", ".join("?" * len(PRODUCT_FIELDS))}, ?)',
+            [position, *values, extra],
+        )
+
+    def insert_rows(self, rows: List[Dict[str, Any]]):
+        """末尾に行を追加（1トランザクション）"""
+        with self.transaction() as conn:
+            position = conn.execute('SELECT COALESCE(MAX(position), -1) FROM products').fetchone()[0]
+            for row in rows:
+                position += 1
+                self._insert(conn, position, row)
+
+    def update_row(self, pk: int, row: Dict[str, Any]):
+        """1行を更新（1トランザクション）"""
+        self.update_rows([(pk, row)])
+
+    def update_rows(self, rows: List[Tuple[int, Dict[str, Any]]]):
+        """複数行をまとめて更新（1トランザクション）"""
+        assignments = ', '.join(f'"{name}" = ?' for name in PRODUCT_FIELDS)
+        params = []
+        for pk, row in rows:
+            values, extra = self._to_params(row)
+            params.append([*values, extra, pk])
+        with self.transaction() as conn:
+            conn.executemany(f'UPDATE products SET {assignments}, extra = ? WHERE pk = ?', params)
+
+    # --- CSVとの変換 ---
+
+    def import_csv(self, csv_path: Path) -> int:
+        """CSVの内容で全行を置き換える"""
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        reader = csv.DictReader(io.StringIO(text, newline=''))
+        fieldnames = reader.fieldnames or PRODUCT_FIELDS
+        rows = list(reader)
+
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM products')
+            for position, row in enumerate(rows):
+                self._insert(conn, position, row)
+            self._set_meta('fieldnames', json.dumps(fieldnames, ensure_ascii=False))
+            # 表計算アプリが書き出したCSVは末尾の改行がないことがある
+            self._set_meta('trailing_newline', '1' if text.endswith(('\n', '\r')) else '0')
+            self._set_meta('csv_mtime_ns', str(os.stat(csv_path).st_mtime_ns))
+        return len(rows)
+
+    def export_csv(self, csv_path: Path, track: bool = True):
+        """
+        全行をCSVに書き出す（一時ファイル経由で置き換え）
+
+        Args:
+            track: 書き出し後のCSVを「直接編集されていない状態」として記録する
+        """
+        csv_path = Path(csv_path)
+        tmp_path = csv_path.with_name(f'.{csv_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            writer.writeheader()
+            writer.writerows(self.rows())
+            if self._get_meta('trailing_newline', '1') == '0':
+                f.truncate(f.tell() - len(writer.writer.dialect.lineterminator))
+        os.replace(tmp_path, csv_path)
+
+        if track:
+            with self.transaction():
+                self._set_meta('csv_mtime_ns', str(os.stat(csv_path).st_mtime_ns))
+
+    def csv_modified(self, csv_path: Path) -> bool:
+        """最後の取り込み/書き出し以降にCSVが直接編集されたか"""
+        if not Path(csv_path).exists():
+            return False
+        return self._get_meta('csv_mtime_ns') != str(os.stat(csv_path).st_mtime_ns)
@@ -0,0 +1,360 @@
+"""
+products.csv ⇔ products.json のストリーミング変換
+
+商品を1件ずつ読み書きするため、商品数が増えてもメモリ使用量は一定。
+  - CSV → JSON: csv.DictReader で1行ずつ読み、JSON配列に1件ずつ追記する
+  - JSON → CSV: products.json を少しずつ読み込んで商品を1件ずつ取り出し、CSVに1行ずつ書く
+
+行と商品の変換は product_codec.py、書き出すJSONは
+json.dump(..., ensure_ascii=False, indent=2) とバイト単位で同じ形式。
+
+使い方:
+  python3 product_stream.py --bench [行数]   # 変換速度（行/秒）とピークメモリを測る
+"""
+
+import csv
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from product_codec import CSV_COLUMNS, DEFAULT_CODEC, ProductCodec
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+# --- 検証 ---
+
+def validate_row(row: Dict[str, Optional[str]]) -> List[str]:
+    """CSVの1行の問題点（なければ空）"""
+    errors = []
+    if None in row or any(v is None for v in row.values()):
+        errors.append('列数がヘッダーと一致しません')
+        return errors
+    if not row.get('id', '').strip():
+        errors.append('id が空です')
+    if not row.get('name', '').strip():
+        errors.append('name が空です')
+    for field in ('price', 'priority'):
+        value = row.get(field, '').strip()
+        if value and not value.isdigit():
+            errors.append(f'{field} が整数ではありません: {value!r}')
+    published = row.get('isPublished', '').strip()
+    if published and published.upper() not in ('TRUE', 'FALSE'):
+        errors.append(f'isPublished が TRUE / FALSE ではありません: {published!r}')
+    return errors
+
+
+def validate_product(product: Any) -> List[str]:
+    """products.json の商品1件の問題点（なければ空）"""
+    if not isinstance(product, dict):
+        return ['商品がオブジェクトではありません']
+    errors = []
+    for field in ('id', 'name'):
+        if not isinstance(product.get(field), str) or not product[field]:
+            errors.append(f'{field} が空です')
+    for field in ('price', 'priority'):
+        if not isinstance(product.get(field), int) or isinstance(product.get(field), bool):
+            errors.append(f'{field} が整数ではありません')
+    if not isinstance(product.get('isPublished'), bool):
+        errors.append('isPublished が true / false ではありません')
+    for field in ('recipients', 'occasions', 'tags', 'affiliateLinks'):
+        if not isinstance(product.get(field, []), list):
+            errors.append(f'{field} が配列ではありません')
+    return errors
+
+
+def iter_csv_errors(csv_path: Path) -> Iterator[Tuple[int, str]]:
+    """CSV全体の問題点を (行番号, 内容) で返す（IDの重複を含む）"""
+    seen_ids: Dict[str, int] = {}
+    for line_num, row in iter_csv_rows(csv_path):
+        for error in validate_row(row):
+            yield line_num, error
+        product_id = (row.get('id') or '').strip()
+        if product_id in seen_ids:
+            yield line_num, f'id {product_id} が {seen_ids[product_id]}行目と重複しています'
+        elif product_id:
+            seen_ids[product_id] = line_num
+
+
+def iter_json_errors(json_path: Path) -> Iterator[Tuple[int, str]]:
+    """products.json 全体の問題点を (商品の番号, 内容) で返す（IDの重複・JSONの構文エラーを含む）"""
+    seen_ids: Dict[str, int] = {}
+    index = 0
+    try:
+        for index, product in enumerate(iter_json_products(json_path), 1):
+            for error in validate_product(product):
+                yield index, error
+            product_id = product.get('id') if isinstance(product, dict) else None
+            if isinstance(product_id, str) and product_id in seen_ids:
+                yield index, f'id {product_id} が {seen_ids[product_id]}件目と重複しています'
+            elif isinstance(product_id, str):
+                seen_ids[product_id] = index
+    except ValueError as e:
+        yield index + 1, f'JSONの形式が正しくありません: {e}'
+
+
+# --- CSVの読み書き ---
+
+def iter_csv_rows(csv_path: Path) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(行番号, 行) を1行ずつ返す"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def iter_csv_products(csv_path: Path) -> Iterator[Dict[str, Any]]:
+    """CSVの行を商品に変換しながら1件ずつ返す"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        codec = ProductCodec(next(reader, []))
+        decode = codec.decode_values
+        for values in reader:
+            if values:  # csv.DictReader と同じく空行は読み飛ばす
+                yield decode(values)
+
+
+def write_products_csv(products, csv_path: Path) -> int:
+    """商品を1件ずつCSVに書き出す（一時ファイル経由で置き換え）。書き出した件数を返す"""
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = csv_path.with_name(f'.{csv_path.name}.{os.getpid()}.tmp')
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        encode = DEFAULT_CODEC.encode
+        for product in products:
+            writer.writerow(encode(product))
+            count += 1
+    os.replace(tmp_path, csv_path)
+    return count
+
+
+# --- JSONの読み込み ---
+
+class _JSONReader:
+    """ファイルを少しずつ読み込みながら、JSONの値を1つずつ取り出す"""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """空白を読み飛ばした次の1文字（終端なら空文字）"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'{char!r} が必要な位置に {found!r} があります')
+        self.pos += 1
+
+    def value(self) -> Any:
+        """次の値を1つ読む（途中までしか読み込んでいなければ追加で読み込む）"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数値などはバッファの末尾で切れている可能性がある
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_products(json_path: Path, meta: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    products.json の商品を1件ずつ返す
+
+    Args:
+        meta: 指定すると products 以外の項目（version / lastUpdated など）を格納する
+
+    Raises:
+        ValueError: JSONの形式が正しくない場合
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        reader = _JSONReader(f)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == 'products':
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.peek() == ']':
+                            reader.pos += 1
+                            break
+                        reader.expect(',')
+            else:
+                value = reader.value()
+                if meta is not None:
+                    meta[key] = value
+            if reader.peek() == '}':
+                return
+            reader.expect(',')
+
+
+# --- JSONの書き出し ---
+
+class ProductsJSONWriter:
+    """
+    {"version": ..., "lastUpdated": ..., "products": [...]} を1件ずつ書き出す
+
+    json.dump(data, f, ensure_ascii=False, indent=2) と同じ出力になる。
+    """
+
+    def __init__(self, f: TextIO, meta: Dict[str, Any]):
+        self.f = f
+        self.count = 0
+        f.write('{\n')
+        for key, value in meta.items():
+            f.write(f'  {_dumps(key)}: {_dumps(value, 2)},\n')
+        f.write('  "products": [')
+
+    def write(self, product: Dict[str, Any]):
+        self.f.write(',\n    ' if self.count else '\n    ')
+        self.f.write(_dumps(product, 4))
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n  ]\n}' if self.count else ']\n}')
+
+
+_encode_str = json.encoder.encode_basestring  # ensure_ascii=False と同じ（C実装）
+
+
+def _dumps(value: Any, indent: int = 0) -> str:
+    """
+    json.dumps(value, ensure_ascii=False, indent=2) の各行を indent 文字下げたもの
+
+    indent を指定した json.dumps はPython実装のエンコーダーになり遅いため、
+    入れ子の構造だけをここで組み立て、文字列の変換はC実装に任せる。
+    """
+    kind = type(value)
+    if kind is str:
+        return _encode_str(value)
+    if kind is int:
+        return int.__repr__(value)
+    if kind is dict:
+        if not value:
+            return '{}'
+        inner = '\n' + ' ' * (indent + 2)
+        return '{' + inner + (',' + inner).join(
+            [f'{_encode_str(str(k))}: {_dumps(v, indent + 2)}' for k, v in value.items()]
+        ) + '\n' + ' ' * indent + '}'
+    if kind is list or kind is tuple:
+        if not value:
+            return '[]'
+        inner = '\n' + ' ' * (indent + 2)
+        if all(type(v) is str for v in value):
+            items = [_encode_str(v) for v in value]
+        else:
+            items = [_dumps(v, indent + 2) for v in value]
+        return '[' + inner + (',' + inner).join(items) + '\n' + ' ' * indent + ']'
+    return json.dumps(value)
+
+
+# --- ベンチマーク ---
+
+def _generate_csv(csv_path: Path, rows: int):
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for i in range(rows):
+            writer.writerow([
+                f'prod_{i:07d}', f'ギフトセット {i}', 'ベンチマーク用の商品説明です。' * 3,
+                1000 + i % 50000, '/images/products/default.jpg', 'コスメ',
+                '彼女,妻,母,友人女性', '誕生日,お礼,母の日', '〜3,000円',
+                f'https://www.amazon.co.jp/dp/{i:010d}', '', 'コスメ,プチギフト', 85, 'TRUE',
+                f'https://www.amazon.co.jp/dp/{i:010d}',
+            ])
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # macOSはバイト、Linuxは KB
+
+
+def _bench_stage(stage: str, src: str, dst: str):
+    """ベンチマークの1段階（ピークメモリを測るため別プロセスで実行される）"""
+    started = time.perf_counter()
+    count = 0
+    if stage == 'csv2json':
+        with open(dst, 'w', encoding='utf-8') as f:
+            writer = ProductsJSONWriter(f, {'version': '1.0.0', 'lastUpdated': ''})
+            for product in iter_csv_products(Path(src)):
+                writer.write(product)
+            writer.close()
+            count = writer.count
+    elif stage == 'json2csv':
+        count = write_products_csv(iter_json_products(Path(src)), Path(dst))
+    elif stage == 'validate':
+        for _, row in iter_csv_rows(Path(src)):
+            validate_row(row)
+            count += 1
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'rows': count, 'seconds': elapsed, 'peak_rss_mb': _peak_rss_mb()}))
+
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'行数':>10} {'処理':<10} {'時間':>8} {'行/秒':>12} {'ピークRSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        for size in sizes:
+            csv_path, json_path, out_path = tmp / 'in.csv', tmp / 'out.json', tmp / 'out.csv'
+            _generate_csv(csv_path, size)
+            for stage, src, dst in (('csv2json', csv_path, json_path),
+                                    ('json2csv', json_path, out_path),
+                                    ('validate', csv_path, '')):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--bench-stage', stage, str(src), str(dst)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output)
+                print(f"{size:>10,} {stage:<10} {result['seconds']:>7.2f}s "
+                      f"{result['rows'] / result['seconds']:>12,.0f} {result['peak_rss_mb']:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    if '--bench-stage' in sys.argv:
+        _bench_stage(*sys.argv[sys.argv.index('--bench-stage') + 1:][:3])
+    elif '--bench' in sys.argv:
+        extra = sys.argv[sys.argv.index('--bench') + 1:]
+        run_benchmark((int(extra[0]),) if extra else (10_000, 100_000, 1_000_000))
+    else:
+        print(__doc__)
@@ -1,68 +1,53 @@
 #!/usr/bin/env python3
-import json
-import csv
 import os
-from datetime import datetime
+import sys
 
 # CSVファイルを読み込み
 script_dir = os.path.dirname(os.path.abspath(__file__))
 csv_path = os.path.join(script_dir, '../data/products.csv')
 
-products = []
-
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-
-    for row in reader:
-        # 配列データをパース
-        recipients = [r.strip() for r in row['recipients'].split(',') if r.strip()]
-        occasions = [o.strip() for o in row['occasions'].split(',') if o.strip()]
-        tags = [t.strip() for t in row['tags'].split(',') if t.strip()]
-
-        # アフィリエイトリンクを構築
-        affiliate_links = []
-        if row['amazonUrl'].strip():
-            affiliate_links.append({
-                'provider': 'amazon',
-                'url': row['amazonUrl'].strip()
-            })
-        if row['rakutenUrl'].strip():
-            affiliate_links.append({
-                'provider': 'rakuten',
-                'url': row['rakutenUrl'].strip()
-            })
-
-        # 商品データを構築
-        product = {
-            'id': row['id'].strip(),
-            'name': row['name'].strip(),
-            'description': row['description'].strip(),
-            'price': int(row['price']) if row['price'].strip() else 0,
-            'imageUrl': row['imageUrl'].strip(),
-            'category': row['category'].strip(),
-            'recipients': recipients,
-            'occasions': occasions,
-            'budgetRange': row['budgetRange'].strip(),
-            'affiliateLinks': affiliate_links,
-            'tags': tags,
-            'priority': int(row['priority']) if row['priority'].strip() else 0,
-            'isPublished': row['isPublished'].strip().upper() == 'TRUE',
-            'createdAt': datetime.now().isoformat() + 'Z',
-            'updatedAt': datetime.now().isoformat() + 'Z'
-        }
-
-        products.append(product)
-
-# products.jsonのフォーマットで出力
-output = {
-    'version': '1.0.0',
-    'lastUpdated': datetime.now().isoformat() + 'Z',
-    'products': products
-}
-
+sys.path.insert(0, os.path.join(script_dir, '../product-management'))
+from json_export import export_products_json, format_counts  # noqa: E402
+from build_artifacts import format_report, write_build_artifacts  # noqa: E402
+from match_index import write_match_index  # noqa: E402
+from product_codec import now_timestamp  # noqa: E402
+from product_stream import iter_csv_errors, iter_csv_products  # noqa: E402
+
+# --validate-only: 変換せずにCSVの内容だけを確認
+if '--validate-only' in sys.argv:
+    error_count = 0
+    for line_num, error in iter_csv_errors(csv_path):
+        error_count += 1
+        if error_count <= 50:
+            print(f'❌ {line_num}行目: {error}')
+    if error_count:
+        print(f'❌ {error_count}件の問題があります: {csv_path}')
+        sys.exit(1)
+    print(f'✅ 問題はありません: {csv_path}')
+    sys.exit(0)
+
+# CSVを1行ずつ商品データに変換
+products = iter_csv_products(csv_path)
+
+# products.jsonのフォーマットで出力（変更のあった商品だけタイムスタンプを更新）
 output_path = os.path.join(script_dir, '../src/data/products.json')
-with open(output_path, 'w', encoding='utf-8') as f:
-    json.dump(output, f, ensure_ascii=False, indent=2)
-
-print(f'✅ products.jsonを更新しました: {output_path}')
-print(f'📊 商品数: {len(products)}件')
+now = now_timestamp()
+counts = export_products_json(products, output_path, now=now, last_updated=now)
+
+if counts['written']:
+    print(f'✅ products.jsonを更新しました: {output_path}')
+else:
+    print(f'✅ products.jsonは最新です（変更なし）: {output_path}')
+total = counts['added'] + counts['changed'] + counts['unchanged']
+print(f'📊 商品数: {total}件 ({format_counts(counts)})')
+
+# バンドル用の最小化・シャード済みJSON（--intern で文字列テーブル化）
+build_dir = os.path.join(script_dir, '../src/data/build')
+intern = '--intern' in sys.argv
+report = write_build_artifacts(output_path, build_dir, intern=intern)
+print(f'📦 バンドル用JSON: {build_dir}{" (文字列テーブル)" if intern else ""}')
+print(format_report(report, os.path.getsize(output_path)))
+
+# 診断結果の事前計算インデックス
+result = write_match_index(output_path, build_dir)
+print(f'🧭 診断インデックス: {result["keys"]}キー {result["bytes"] / 1024:.1f}KB')
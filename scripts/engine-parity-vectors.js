@@ -0,0 +1,138 @@
+/**
+ * 診断エンジン（src/lib/diagnose/engine.ts）の期待値を生成する
+ *
+ * 固定の商品カタログに対して、全フィルタの組み合わせで matchProducts / getRelaxedMatches /
+ * generateResultId を実行し、product-management/engine_vectors.json に書き出す。
+ * Python版（product-management/diagnose_engine.py）はこのファイルと結果を突き合わせる。
+ *
+ * engine.ts を変更したら実行して、生成されたファイルもコミットする:
+ *   node scripts/engine-parity-vectors.js
+ *
+ * TypeScript は devDependencies の typescript で変換する（npm install 前でも動くよう、
+ * 見つからなければ engine.ts で使っている範囲の型注釈だけを取り除く）。
+ */
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const ROOT = path.join(__dirname, '..');
+const ENGINE_PATH = path.join(ROOT, 'src/lib/diagnose/engine.ts');
+const TYPES_PATH = path.join(ROOT, 'src/types/product.ts');
+const OUTPUT_PATH = path.join(ROOT, 'product-management/engine_vectors.json');
+
+const CATALOGUE_SIZE = 60;
+const SEED = 20240601;
+// 予算帯の境界の前後
+const BOUNDARY_PRICES = [0, 2999, 3000, 4999, 5000, 9999, 10000, 19999, 20000, 29999, 30000, 1000000];
+
+// TypeScriptの型注釈を取り除く（typescript がない場合。engine.ts で使っている構文のみ対応）
+function stripTypes(source) {
+  return source
+    .replace(/^import type .*;$/gm, '')
+    .replace(/:\s*(?:string|number|boolean|[A-Z]\w*)(?:\[\])?(?=\s*[,)=;{])/g, '')
+    .replace(/^export function /gm, 'function ');
+}
+
+function loadEngine() {
+  const source = fs.readFileSync(ENGINE_PATH, 'utf8');
+  let code;
+  try {
+    const ts = require(require.resolve('typescript', { paths: [ROOT] }));
+    code = ts.transpileModule(source, {
+      compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+    }).outputText;
+  } catch (e) {
+    const names = [...source.matchAll(/^export function (\w+)/gm)].map((m) => m[1]);
+    code = stripTypes(source) + `\nmodule.exports = { ${names.join(', ')} };\n`;
+  }
+  const module = { exports: {} };
+  vm.runInNewContext(code, { module, exports: module.exports, require });
+  return module.exports;
+}
+
+// src/types/product.ts のユニオン型の値（Python側のリストとの同期確認にも使う）
+function unionValues(source, typeName) {
+  const match = source.match(new RegExp(`export type ${typeName} =([^;]+);`));
+  if (!match) throw new Error(`${typeName} が見つかりません`);
+  return [...match[1].matchAll(/"([^"]+)"/g)].map((m) => m[1]);
+}
+
+// 再現可能な乱数（mulberry32）
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function buildCatalogue(recipients, occasions) {
+  const random = createRandom(SEED);
+  const pick = (values) => values[Math.floor(random() * values.length)];
+  const sample = (values, max) => values.filter(() => random() < max / values.length);
+  const products = [];
+  for (let i = 0; i < CATALOGUE_SIZE; i++) {
+    products.push({
+      id: `p${String(i).padStart(3, '0')}`,
+      // 境界の価格を一通り含める
+      price: i < BOUNDARY_PRICES.length ? BOUNDARY_PRICES[i] : Math.floor(random() * 50000),
+      // 同じ優先度を多くして、並び順（安定ソート）も確認する
+      priority: pick([80, 85, 90, 95]),
+      isPublished: random() < 0.85,
+      recipients: sample(recipients, 4),
+      occasions: sample(occasions, 5),
+    });
+  }
+  return products;
+}
+
+function main() {
+  const engine = loadEngine();
+  const types = fs.readFileSync(TYPES_PATH, 'utf8');
+  const recipients = unionValues(types, 'Recipient');
+  const occasions = unionValues(types, 'Occasion');
+  const budgetRanges = unionValues(types, 'BudgetRange');
+  const products = buildCatalogue(recipients, occasions);
+
+  const cases = [];
+  for (const recipient of [undefined, ...recipients]) {
+    for (const occasion of [undefined, ...occasions]) {
+      for (const budgetRange of [undefined, ...budgetRanges]) {
+        const filters = { recipient, occasion, budgetRange };
+        const match = engine.matchProducts(products, filters).map((p) => p.id);
+        // ResultContent.tsx と同じく、3件未満のときだけ条件を緩和する
+        const relaxed = match.length < 3
+          ? engine.getRelaxedMatches(products, filters, match, 3 - match.length).map((p) => p.id)
+          : null;
+        cases.push({
+          filters: JSON.parse(JSON.stringify(filters)),
+          match,
+          relaxed,
+          resultId: engine.generateResultId(filters),
+        });
+      }
+    }
+  }
+
+  const prices = [...BOUNDARY_PRICES, 1, 2500, 7777, 15000, 25000, 99999];
+  const header = {
+    source: 'src/lib/diagnose/engine.ts',
+    generatedBy: 'node scripts/engine-parity-vectors.js',
+    recipients,
+    occasions,
+    budgetRanges,
+    budgets: prices.map((price) => [price, engine.getBudgetRangeFromPrice(price)]),
+  };
+  // 差分を追いやすいよう、商品・ケースは1件1行で書き出す
+  const fields = Object.entries(header).map(([key, value]) => ` ${JSON.stringify(key)}: ${JSON.stringify(value)}`);
+  const rows = (values) => `[\n${values.map((v) => '  ' + JSON.stringify(v)).join(',\n')}\n ]`;
+  fields.push(` "products": ${rows(products)}`, ` "cases": ${rows(cases)}`);
+  fs.writeFileSync(OUTPUT_PATH, `{\n${fields.join(',\n')}\n}\n`);
+  console.log(`✅ ${cases.length}ケース（商品 ${products.length}件）を書き出しました: ${path.relative(ROOT, OUTPUT_PATH)}`);
+}
+
+main();
@@ -96,6 +96,8 @@ export interface Product {
   priority: number;
   /** 公開状態 */
   isPublished: boolean;
+  /** 商品ページのURL（商品情報の取得元。任意） */
+  productUrl?: string;
   /** 作成日時 */
   createdAt: string;
   /** 更新日時 */
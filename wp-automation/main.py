@@ -5,6 +5,8 @@ WordPress記事自動化ツール
 使い方:
     python main.py              # 対話モードで記事作成
     python main.py --test       # WordPress接続テスト
+    python main.py --roundups out/roundups   # まとめ記事を一括生成
+    python main.py --bench templates         # 記事HTMLの描画ベンチマーク
     python main.py --help       # ヘルプ表示
 
 重要な設計思想:
@@ -14,13 +16,15 @@ WordPress記事自動化ツール
 
 import argparse
 import sys
+from pathlib import Path
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Confirm
 
 from src.utils import load_config
 from src.publishers import WordPressClient, PostData
-from src.generators import InteractiveArticleGenerator
+from src.generators import InteractiveArticleGenerator, RoundupGenerator, load_catalogue
+from src.generators.roundup_generator import DEFAULT_SOURCE, DEFAULT_MIN_PRODUCTS, DEFAULT_MAX_PRODUCTS
 
 console = Console()
 
@@ -110,6 +114,27 @@ def create_article():
         console.print("生成された記事のHTMLは上記の通りです。手動でコピーして使用できます。")
 
 
+def generate_roundups(out_dir: str, source: str, workers: int, min_products: int, max_products: int):
+    """カタログから「贈る相手 × シーン × 予算帯」のまとめ記事を一括生成（投稿はしない）"""
+    config = load_config()
+    products = load_catalogue(Path(source))
+    generator = RoundupGenerator(products, config.diagnosis_app_url,
+                                 min_products=min_products, max_products=max_products)
+    console.print(f"\n[bold]まとめ記事を生成しています...[/bold]（公開中の商品 {len(products)}件）")
+    manifest = generator.generate(Path(out_dir), workers=workers, source=source)
+
+    console.print(Panel(
+        f"[green]✓ {manifest['articleCount']}記事を生成しました[/green]\n\n"
+        f"出力先: {out_dir}\n"
+        f"商品不足で見送った組み合わせ: {manifest['skippedCombinations']}件\n"
+        f"所要時間: {manifest['totalSeconds']:.2f}秒（{manifest['articlesPerSecond']:,.1f}記事/秒, "
+        f"{manifest['workers']}プロセス）\n\n"
+        f"[dim]下書き投稿: python post_article.py --drafts {out_dir}[/dim]",
+        title="まとめ記事",
+        border_style="green",
+    ))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="WordPress記事自動化ツール",
@@ -118,6 +143,8 @@ def main():
 例:
     python main.py          # 対話モードで記事作成
     python main.py --test   # WordPress接続テスト
+    python main.py --roundups out/roundups --min-products 3
+                            # まとめ記事を一括生成（投稿はしない）
 
 設定:
     config/.env ファイルに以下を設定してください:
@@ -134,9 +161,60 @@ def main():
         help="WordPress接続テストを実行",
     )
 
+    parser.add_argument(
+        "--roundups",
+        type=str,
+        metavar="OUT_DIR",
+        help="商品カタログからまとめ記事を一括生成し、OUT_DIR に書き出す",
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=str(DEFAULT_SOURCE),
+        help="--roundups の商品カタログ（products.json または products.csv）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="--roundups のプロセス数 (default: CPU数)",
+    )
+    parser.add_argument(
+        "--min-products",
+        type=int,
+        default=DEFAULT_MIN_PRODUCTS,
+        help=f"--roundups で記事にする最小の商品数 (default: {DEFAULT_MIN_PRODUCTS})",
+    )
+    parser.add_argument(
+        "--max-products",
+        type=int,
+        default=DEFAULT_MAX_PRODUCTS,
+        help=f"--roundups で1記事に載せる最大の商品数 (default: {DEFAULT_MAX_PRODUCTS})",
+    )
+
+    parser.add_argument(
+        "--bench",
+        choices=["roundups", "templates"],
+        help="ベンチマーク（roundups: 1プロセスとプロセスプールの比較, templates: 記事HTMLの描画）",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="--bench の件数（roundups: 商品数 2,000 / templates: 記事数 10,000）",
+    )
+
     args = parser.parse_args()
 
-    if args.test:
+    if args.bench == "roundups":
+        from src.generators import roundup_generator
+        roundup_generator.run_benchmark(args.count or 2000)
+    elif args.bench == "templates":
+        from src.generators import template_engine
+        template_engine.run_benchmark(args.count or 10_000)
+    elif args.roundups:
+        generate_roundups(args.roundups, args.source, args.workers, args.min_products, args.max_products)
+    elif args.test:
         success = test_connection()
         sys.exit(0 if success else 1)
     else:
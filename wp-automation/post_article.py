@@ -7,6 +7,9 @@ WordPress記事投稿ツール（Claude Code対話形式用）
     python post_article.py --title "タイトル" --content "本文HTML"  # 記事投稿
     python post_article.py --update 123 --title "新タイトル"        # 記事更新
     python post_article.py --list                    # 下書き一覧
+    python post_article.py --drafts articles.json    # 複数記事をまとめて下書き投稿
+    python post_article.py --drafts out/roundups     # main.py --roundups で生成したまとめ記事を下書き投稿
+    python post_article.py --sync out/roundups       # 投稿済みの記事のうち、変わった項目だけを更新
 
 Claude Codeでの使用例:
     1. Claude Codeに記事を書いてもらう
@@ -14,17 +17,21 @@ Claude Codeでの使用例:
 """
 
 import argparse
+import asyncio
 import base64
+import json
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 import requests
 from dotenv import load_dotenv
 
 
+@lru_cache(maxsize=None)
 def load_wp_config():
-    """WordPress設定を読み込む"""
+    """WordPress設定を読み込む（.env の読み込みはプロセスで1回だけ）"""
     env_path = Path(__file__).parent / "config" / ".env"
     if env_path.exists():
         load_dotenv(env_path)
@@ -44,8 +51,18 @@ def load_wp_config():
     return url, username, app_password
 
 
+@lru_cache(maxsize=None)
+def get_sync_state():
+    """投稿済み記事の同期状態（.cache/sync_state.json）"""
+    from src.publishers.sync_state import SyncState
+
+    url, _, _ = load_wp_config()
+    return SyncState(url)
+
+
+@lru_cache(maxsize=None)
 def get_session(username: str, app_password: str) -> requests.Session:
-    """認証済みセッションを取得"""
+    """認証済みセッションを取得（同じ認証情報なら同じセッション・接続を使い回す）"""
     session = requests.Session()
     credentials = f"{username}:{app_password}"
     encoded = base64.b64encode(credentials.encode()).decode()
@@ -101,6 +118,9 @@ def create_post(title: str, content: str, excerpt: str = "", status: str = "draf
             print(f"  投稿ID: {post_id}")
             print(f"  ステータス: {status}")
             print(f"  編集URL: {url}/wp-admin/post.php?post={post_id}&action=edit")
+            state = get_sync_state()
+            state.record(post_id, payload)
+            state.save()
             return post_id
         else:
             print(f"✗ 投稿失敗: {response.status_code}")
@@ -111,10 +131,36 @@ def create_post(title: str, content: str, excerpt: str = "", status: str = "draf
         return None
 
 
-def update_post(post_id: int, title: str = None, content: str = None, excerpt: str = None, status: str = None):
-    """既存記事を更新"""
+def send_update(post_id: int, payload: dict):
+    """
+    記事の項目を更新（本文は UTF-8 のJSONで送る）
+
+    Returns:
+        (成功したか, 失敗時のメッセージ, 送信した本文のバイト数)
+    """
+    from src.publishers.sync_state import encode_body
+
     url, username, app_password = load_wp_config()
     session = get_session(username, app_password)
+    body = encode_body(payload)
+    try:
+        response = session.post(f"{url}/wp-json/wp/v2/posts/{post_id}", data=body, timeout=30)
+    except requests.RequestException as e:
+        return False, str(e), len(body)
+    if response.status_code == 200:
+        return True, "", len(body)
+    return False, f"{response.status_code} {response.text[:200]}", len(body)
+
+
+def update_post(post_id: int, title: str = None, content: str = None, excerpt: str = None, status: str = None,
+                force: bool = False):
+    """
+    既存記事を更新
+
+    同期状態（前回送った内容のハッシュ）と同じタイトル・本文・抜粋は送らない（force で全て送る）。
+    """
+    url, _, _ = load_wp_config()
+    state = get_sync_state()
 
     payload = {}
     if title is not None:
@@ -123,33 +169,160 @@ def update_post(post_id: int, title: str = None, content: str = None, excerpt: s
         payload["content"] = content
     if excerpt is not None:
         payload["excerpt"] = excerpt
+
+    changed = None if force else state.changed_fields(post_id, payload)
+    if changed is not None:
+        unchanged = [name for name in payload if name not in changed]
+        for name in unchanged:
+            del payload[name]
+        if unchanged:
+            print(f"  前回と同じ項目は送りません: {', '.join(unchanged)}")
+
     if status is not None:
         payload["status"] = status
 
     if not payload:
+        if changed is not None:
+            print("✓ 変更なし（更新は送信しませんでした）")
+            return True
         print("エラー: 更新する項目がありません")
         return False
 
+    success, error, _ = send_update(post_id, payload)
+    if success:
+        state.record(post_id, payload)
+        state.save()
+        print(f"✓ 更新成功!")
+        print(f"  投稿ID: {post_id}")
+        print(f"  更新した項目: {', '.join(payload)}")
+        print(f"  編集URL: {url}/wp-admin/post.php?post={post_id}&action=edit")
+        return True
+    print(f"✗ 更新失敗: {error}")
+    return False
+
+
+def fetch_raw_fields(post_id: int):
+    """サーバーにある記事のタイトル・本文・抜粋（編集用の raw）。取得できなければ None"""
+    from src.publishers.sync_state import SYNC_FIELDS
+
+    url, username, app_password = load_wp_config()
+    session = get_session(username, app_password)
     try:
-        response = session.post(
+        response = session.get(
             f"{url}/wp-json/wp/v2/posts/{post_id}",
-            json=payload,
+            params={"context": "edit", "_fields": ",".join(("id",) + SYNC_FIELDS)},
             timeout=30,
         )
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    return {name: (data.get(name) or {}).get("raw", "") for name in SYNC_FIELDS}
+
+
+def load_articles(path: str):
+    """
+    同期する記事（(記事ファイルのパス, 記事) のリスト）
+
+    path がディレクトリなら *.json（manifest.json を除く）を1ファイル1記事として、
+    ファイルなら記事のリストとして読み込む。
+    """
+    path = Path(path)
+    if path.is_dir():
+        articles = []
+        for file in sorted(path.glob("*.json")):
+            if file.name == "manifest.json":
+                continue
+            with open(file, "r", encoding="utf-8") as f:
+                articles.append((str(file.resolve()), json.load(f)))
+        return articles
+    with open(path, "r", encoding="utf-8") as f:
+        return [(None, article) for article in json.load(f)]
+
+
+def _kb(size: int) -> str:
+    return f"{size / 1024:,.1f}KB"
+
+
+def sync_articles(path: str, dry_run: bool = False, force: bool = False):
+    """
+    ローカルの記事と同期状態を比べ、変わった項目だけを更新
+
+    - 投稿IDは記事の "id"、または --drafts で投稿したときに記録したファイルのパスから決める
+    - 同期状態と同じ記事にはリクエストを出さない
+    - 同期状態のない記事は、サーバーの内容（GET 1回）と比べる
+    """
+    from src.publishers.sync_state import SYNC_FIELDS, encode_body
+
+    state = get_sync_state()
+    counts = {"updated": 0, "unchanged": 0, "unposted": 0, "failed": 0}
+    field_counts = {name: 0 for name in SYNC_FIELDS}
+    requests_made = {"GET": 0, "POST": 0}
+    bytes_sent = 0
+    bytes_avoided = 0
 
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✓ 更新成功!")
-            print(f"  投稿ID: {post_id}")
-            print(f"  編集URL: {url}/wp-admin/post.php?post={post_id}&action=edit")
-            return True
-        else:
-            print(f"✗ 更新失敗: {response.status_code}")
-            print(response.text)
-            return False
-    except requests.RequestException as e:
-        print(f"✗ エラー: {e}")
-        return False
+    try:
+        for source, article in load_articles(path):
+            label = article.get("title", source)
+            post_id = article.get("id") or (state.post_id_for(source) if source else None)
+            if not post_id:
+                counts["unposted"] += 1
+                print(f"- 未投稿のためスキップ: {label}")
+                continue
+
+            fields = {name: article[name] for name in SYNC_FIELDS if name in article}
+            full_size = len(encode_body(fields))
+            changed = list(fields) if force else state.changed_fields(post_id, fields)
+            if changed is None:
+                requests_made["GET"] += 1
+                server_fields = fetch_raw_fields(post_id)
+                if server_fields is None:
+                    counts["failed"] += 1
+                    print(f"✗ 投稿 {post_id} を取得できませんでした: {label}")
+                    continue
+                state.record(post_id, server_fields, source)
+                changed = state.changed_fields(post_id, fields)
+
+            if not changed:
+                counts["unchanged"] += 1
+                bytes_avoided += full_size
+                continue
+
+            payload = {name: fields[name] for name in changed}
+            size = len(encode_body(payload))
+            if dry_run:
+                counts["updated"] += 1
+                print(f"~ {post_id}: {label}（{', '.join(changed)}）")
+                continue
+
+            requests_made["POST"] += 1
+            success, error, size = send_update(post_id, payload)
+            bytes_sent += size
+            if success:
+                counts["updated"] += 1
+                bytes_avoided += max(0, full_size - size)
+                for name in changed:
+                    field_counts[name] += 1
+                state.record(post_id, payload, source)
+                print(f"✓ {post_id}: {label}（{', '.join(changed)}）")
+            else:
+                counts["failed"] += 1
+                print(f"✗ {post_id}: {label}: {error}")
+    finally:
+        if not dry_run:
+            state.save()
+
+    print(f"\n{'更新予定' if dry_run else '更新'} {counts['updated']}件 / 変更なし {counts['unchanged']}件 / "
+          f"未投稿 {counts['unposted']}件 / 失敗 {counts['failed']}件")
+    if not dry_run:
+        print(f"  更新した項目: タイトル {field_counts['title']}件, 本文 {field_counts['content']}件, "
+              f"抜粋 {field_counts['excerpt']}件")
+        print(f"  リクエスト: 更新 {requests_made['POST']}回, 状態のない記事の取得 {requests_made['GET']}回")
+        total = bytes_sent + bytes_avoided
+        saved = f"（{bytes_avoided / total:.1%}）" if total else ""
+        print(f"  送信 {_kb(bytes_sent)} / 送信を省いた {_kb(bytes_avoided)}{saved}")
+    return counts["failed"] == 0
 
 
 def list_drafts():
@@ -182,6 +355,99 @@ def list_drafts():
         print(f"✗ エラー: {e}")
 
 
+async def attach_featured_images(client, posts, images, alt_texts):
+    """アイキャッチ画像をアップロードして posts に設定（失敗しても投稿は続ける）"""
+    from src.publishers import MediaPipeline
+
+    try:
+        pipeline = MediaPipeline(client, diagnosis_app_url=os.getenv("DIAGNOSIS_APP_URL", ""))
+    except ImportError as e:
+        print(f"⚠ アイキャッチ画像をアップロードできません: {e}")
+        return
+    attached = await pipeline.attach(posts, images, alt_texts)
+    print(f"🖼 {pipeline.summary()}")
+    print(f"   アイキャッチ画像を設定: {attached}件")
+
+
+def create_drafts_from_file(path: str, concurrency: int, create_terms: bool = False,
+                            upload_media: bool = True):
+    """
+    JSONファイルの記事をまとめて下書き投稿（AsyncWordPressClient.create_drafts）
+
+    ファイル形式: [{"title": "...", "content": "<p>...</p>", "excerpt": "...",
+                   "categories": ["カテゴリ名"], "tags": ["タグ名"]}, ...]
+    カテゴリ・タグは名前（またはスラッグ）で指定し、TaxonomyCache でIDに解決する。
+    "featuredImage"（URL・診断アプリの /images/... ・ローカルのパス）があれば、MediaPipeline で
+    縮小してアップロードし、アイキャッチ画像に設定する（アップロード済みの画像は再利用する）。
+    path がディレクトリの場合は main.py --roundups の出力（manifest.json の順）を読み込み、
+    投稿IDをファイルごとに同期状態へ記録する（投稿済みのファイルは投稿せず、--sync で更新する）。
+    --status の指定にかかわらず、常に下書きとして投稿する。
+    """
+    from src.publishers import AsyncWordPressClient, PostData, TaxonomyCache
+    from src.utils import WordPressConfig
+
+    state = get_sync_state()
+    if Path(path).is_dir():
+        from src.generators.roundup_generator import load_payloads
+        sources = []
+        articles = []
+        for file, article in load_payloads(Path(path)):
+            source = str(file.resolve())
+            if state.post_id_for(source):
+                print(f"- 投稿済みのためスキップ（--sync で更新できます）: {article['title']}")
+                continue
+            sources.append(source)
+            articles.append(article)
+        if not articles:
+            print("投稿する記事はありません")
+            return True
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            articles = json.load(f)
+        sources = [None] * len(articles)
+    posts = [PostData(title=a["title"], content=a["content"], excerpt=a.get("excerpt", ""),
+                      category_names=list(a.get("categories", [])),
+                      tag_names=list(a.get("tags", [])))
+             for a in articles]
+
+    url, username, app_password = load_wp_config()
+    config = WordPressConfig(url=url, username=username, app_password=app_password)
+
+    async def run():
+        async with AsyncWordPressClient(config, concurrency=concurrency) as client:
+            use_batch = await client.supports_batch()
+            print(f"{len(posts)}件を下書き投稿します（同時接続数: {concurrency}, "
+                  f"/batch/v1: {'使用' if use_batch else '未対応のため個別に投稿'}）")
+            if any(post.category_names or post.tag_names for post in posts):
+                missing = await TaxonomyCache(client).fill_posts(posts, create_missing=create_terms)
+                for taxonomy, names in missing.items():
+                    label = "カテゴリ" if taxonomy == "categories" else "タグ"
+                    print(f"⚠ 見つからない{label}: {', '.join(names)}"
+                          f"{'' if create_terms else '（--create-terms で作成できます）'}")
+            images = [a.get("featuredImage") for a in articles]
+            if upload_media and any(images):
+                await attach_featured_images(client, posts, images,
+                                             [a.get("featuredImageAlt") or a["title"] for a in articles])
+            return await client.create_drafts(posts, use_batch=use_batch)
+
+    results = asyncio.run(run())
+    succeeded = 0
+    for post, result, source in zip(posts, results, sources):
+        if result.success:
+            succeeded += 1
+            state.record(result.post_id, {"title": post.title, "content": post.content,
+                                          "excerpt": post.excerpt}, source)
+            print(f"✓ {post.title}")
+            print(f"  投稿ID: {result.post_id}")
+            print(f"  編集URL: {result.edit_url}")
+        else:
+            print(f"✗ {post.title}")
+            print(f"  {result.error}")
+    state.save()
+    print(f"\n下書き投稿: 成功 {succeeded}件 / 失敗 {len(results) - succeeded}件")
+    return succeeded == len(results)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="WordPress記事投稿ツール（Claude Code用）",
@@ -204,6 +470,13 @@ def main():
 
     # 下書き一覧
     python post_article.py --list
+
+    # 複数記事をまとめて下書き投稿（/batch/v1 に対応していれば25件ずつまとめて送信）
+    python post_article.py --drafts articles.json --concurrency 4
+
+    # 投稿済みの記事を同期（前回から変わった項目だけを送る。"id" のない記事は --drafts で記録したもの）
+    python post_article.py --sync out/roundups --dry-run
+    python post_article.py --sync articles.json
         """
     )
 
@@ -216,6 +489,19 @@ def main():
                         choices=["draft", "publish", "private"],
                         help="投稿ステータス (default: draft)")
     parser.add_argument("--update", type=int, metavar="POST_ID", help="更新する記事ID")
+    parser.add_argument("--drafts", type=str, metavar="FILE",
+                        help="記事一覧のJSONファイル、またはまとめ記事の出力ディレクトリ（常に下書きとして並列投稿）")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="--drafts の同時接続数 (default: 4)")
+    parser.add_argument("--create-terms", action="store_true",
+                        help="--drafts で見つからないカテゴリ・タグを新規作成する")
+    parser.add_argument("--no-media", action="store_true",
+                        help="--drafts でアイキャッチ画像（featuredImage）をアップロードしない")
+    parser.add_argument("--sync", type=str, metavar="PATH",
+                        help="記事のディレクトリ（1ファイル1記事）またはJSONファイルの投稿済み記事を、変わった項目だけ更新")
+    parser.add_argument("--dry-run", action="store_true", help="--sync で更新する記事を表示するだけ")
+    parser.add_argument("--force", action="store_true",
+                        help="--update / --sync で同期状態にかかわらず全ての項目を送る")
 
     args = parser.parse_args()
 
@@ -227,6 +513,15 @@ def main():
         list_drafts()
         return
 
+    if args.drafts:
+        success = create_drafts_from_file(args.drafts, args.concurrency, args.create_terms,
+                                          upload_media=not args.no_media)
+        sys.exit(0 if success else 1)
+
+    if args.sync:
+        success = sync_articles(args.sync, dry_run=args.dry_run, force=args.force)
+        sys.exit(0 if success else 1)
+
     if args.update:
         # 記事更新
         success = update_post(
@@ -235,6 +530,7 @@ def main():
             content=args.content,
             excerpt=args.excerpt if args.excerpt else None,
             status=args.status if args.status != "draft" else None,
+            force=args.force,
         )
         sys.exit(0 if success else 1)
 
@@ -1,3 +1,7 @@
 from .article_generator import InteractiveArticleGenerator, ArticleOutline, GeneratedArticle
+from .roundup_generator import RoundupGenerator, RoundupSpec, load_catalogue
 
-__all__ = ["InteractiveArticleGenerator", "ArticleOutline", "GeneratedArticle"]
+__all__ = [
+    "InteractiveArticleGenerator", "ArticleOutline", "GeneratedArticle",
+    "RoundupGenerator", "RoundupSpec", "load_catalogue",
+]
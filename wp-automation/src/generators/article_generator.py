@@ -13,6 +13,8 @@ from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
 from rich.markdown import Markdown
 
+from .template_engine import render, render_cta
+
 console = Console()
 
 
@@ -49,20 +51,7 @@ class InteractiveArticleGenerator:
 
     def _create_cta_html(self) -> str:
         """診断アプリへのCTA HTMLを生成"""
-        return f'''
-<!-- ギフト診断CTA -->
-<div style="background: linear-gradient(135deg, #fdf4f3 0%, #fce8e6 100%); border-radius: 12px; padding: 24px; margin: 32px 0; text-align: center; border: 1px solid #f4b4ae;">
-  <p style="font-size: 18px; font-weight: bold; color: #aa372d; margin-bottom: 12px;">
-    🎁 プレゼント選びに迷ったら...
-  </p>
-  <p style="color: #536076; margin-bottom: 16px;">
-    3つの質問に答えるだけで、最適なギフトが見つかります
-  </p>
-  <a href="{self.diagnosis_app_url}" target="_blank" rel="noopener" style="display: inline-block; background-color: #cb4539; color: white; padding: 12px 32px; border-radius: 9999px; text-decoration: none; font-weight: bold;">
-    無料でギフト診断をする →
-  </a>
-</div>
-'''
+        return render_cta(self.diagnosis_app_url)
 
     def start_interview(self) -> Optional[ArticleOutline]:
         """
@@ -149,64 +138,21 @@ class InteractiveArticleGenerator:
         """
         アウトラインから記事HTMLを生成
 
-        注意: この段階ではAIは使わず、テンプレートベースで構成します。
+        注意: この段階ではAIは使わず、テンプレート（src/templates/article.html）で構成します。
+        インタビューの回答はテンプレートでHTMLエスケープされます。
         AIによる文章のリライトは別途オプションで提供可能。
         """
-        # HTML記事を構築
-        html_parts = []
-
-        # 導入文
-        html_parts.append(f'''
-<p>この記事では、<strong>{outline.title}</strong>について、実際に贈った体験をもとにご紹介します。</p>
-
-<p>「本当に喜んでもらえるプレゼントを選びたい」そんなあなたの参考になれば嬉しいです。</p>
-''')
-
-        # 最初のCTA挿入
-        html_parts.append(self.cta_html)
-
-        # 体験談セクション
-        html_parts.append(f'''
-<h2>実際に贈ってみた体験談</h2>
-
-<p>{outline.personal_experience}</p>
-''')
-
-        # 良かった点
         points = [p.strip() for p in outline.recommendation_reason.split(",")]
-        points_html = "\n".join([f"<li>{p}</li>" for p in points if p])
-
-        html_parts.append(f'''
-<h2>おすすめポイント</h2>
-
-<ul>
-{points_html}
-</ul>
-''')
+        cautions = outline.sections[2]["content"]
 
-        # 注意点
-        if outline.sections[2]["content"] != "特になし":
-            html_parts.append(f'''
-<h2>購入前に知っておきたい注意点</h2>
-
-<p>{outline.sections[2]["content"]}</p>
-''')
-
-        # まとめ + CTA
-        html_parts.append(f'''
-<h2>まとめ</h2>
-
-<p>今回は{outline.title}についてご紹介しました。</p>
-
-<p>プレゼント選びは本当に悩みますよね。でも、相手のことを想って選んだプレゼントは、きっと喜んでもらえるはずです。</p>
-
-<p>この記事が、あなたのプレゼント選びの参考になれば幸いです。</p>
-''')
-
-        # 最後のCTA
-        html_parts.append(self.cta_html)
-
-        full_content = "\n".join(html_parts)
+        full_content = render(
+            "article.html",
+            title=outline.title,
+            experience=outline.personal_experience,
+            points=[p for p in points if p],
+            cautions="" if cautions == "特になし" else cautions,
+            cta=render_cta(self.diagnosis_app_url),
+        )
 
         return GeneratedArticle(
             title=outline.title,
@@ -0,0 +1,408 @@
+"""
+まとめ記事の一括生成モジュール
+
+商品カタログ（products.json / products.csv）から、「贈る相手 × シーン × 予算帯」の
+組み合わせごとに、該当する商品が min_products 件以上あるものについてまとめ記事
+（例: 「【母の日】母に贈る〜3,000円のプレゼント5選」）を作る。
+
+- 記事のHTML生成とファイルへの書き出しはプロセスプールで並列に行う。カタログは
+  ワーカーの起動時に1回だけ渡し、各ジョブには組み合わせと商品IDだけを送る
+- 出力先のディレクトリには、記事ごとの投稿用JSON（post_article.py --drafts と同じ形式）と
+  manifest.json（記事ごとの生成時間・全体のスループット）を書く
+
+対話型の InteractiveArticleGenerator と異なり、体験談は含まない。記事は下書きとして投稿し、
+公開前に人が確認・加筆する前提。
+
+使い方:
+    python main.py --bench roundups --count N   # 1プロセスとプロセスプールの比較
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+
+from .article_generator import GeneratedArticle
+from .template_engine import render, render_cta, render_product_card
+
+console = Console()
+
+DEFAULT_SOURCE = Path(__file__).parent.parent.parent.parent / "src" / "data" / "products.json"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+DEFAULT_MIN_PRODUCTS = 3
+DEFAULT_MAX_PRODUCTS = 5
+
+# src/types/product.ts と同期する（記事の並び順にも使う）
+RECIPIENTS = ["彼氏", "彼女", "夫", "妻", "父", "母", "友人男性", "友人女性", "上司", "同僚", "子供"]
+OCCASIONS = [
+    "誕生日", "クリスマス", "バレンタイン", "ホワイトデー", "母の日", "父の日", "結婚祝い",
+    "出産祝い", "引っ越し祝い", "就職祝い", "退職祝い", "お礼", "記念日",
+]
+# product-management/build_artifacts.py の BUDGET_SLUGS と同じ
+BUDGET_SLUGS = {
+    "〜3,000円": "under-3000",
+    "3,000〜5,000円": "3000-5000",
+    "5,000〜10,000円": "5000-10000",
+    "10,000〜20,000円": "10000-20000",
+    "20,000〜30,000円": "20000-30000",
+    "30,000円〜": "over-30000",
+}
+
+# --- カタログの読み込み ---
+
+# product-management/product_codec.py の DEFAULT_PRIORITY と同じ（優先度が空欄の場合）
+DEFAULT_PRIORITY = 80
+
+
+def _split_list(value: str) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _to_int(value: Optional[str], default: int) -> int:
+    """整数の列（空欄・数値でない場合は default。"2,980" のようなカンマ区切りは読む）"""
+    try:
+        return int((value or "").replace(",", "").strip())
+    except ValueError:
+        return default
+
+
+def _product_from_csv_row(row: Dict[str, str]) -> dict:
+    """
+    products.csv の行を products.json の商品と同じ形にする
+
+    変換のルールは product-management/product_codec.py（export で products.json を作る変換）と
+    揃える: price の空欄は 0、priority の空欄は 80、productUrl は空でなければ含める。
+    """
+    links = [{"provider": provider, "url": row[column].strip()}
+             for provider, column in (("amazon", "amazonUrl"), ("rakuten", "rakutenUrl"))
+             if (row.get(column) or "").strip()]
+    product = {
+        "id": (row.get("id") or "").strip(),
+        "name": (row.get("name") or "").strip(),
+        "description": (row.get("description") or "").strip(),
+        "price": _to_int(row.get("price"), 0),
+        "imageUrl": (row.get("imageUrl") or "").strip(),
+        "category": (row.get("category") or "").strip(),
+        "recipients": _split_list(row.get("recipients")),
+        "occasions": _split_list(row.get("occasions")),
+        "budgetRange": (row.get("budgetRange") or "").strip(),
+        "affiliateLinks": links,
+        "tags": _split_list(row.get("tags")),
+        "priority": _to_int(row.get("priority"), DEFAULT_PRIORITY),
+        "isPublished": (row.get("isPublished") or "").strip().upper() == "TRUE",
+    }
+    product_url = (row.get("productUrl") or "").strip()
+    if product_url:
+        product["productUrl"] = product_url
+    return product
+
+
+def load_catalogue(path: Path = DEFAULT_SOURCE) -> List[dict]:
+    """
+    商品カタログを読み込む（公開中の商品のみ）
+
+    Args:
+        path: products.json（{"products": [...]}）または products.csv
+    """
+    path = Path(path)
+    if path.suffix == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            products = [_product_from_csv_row(row) for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        products = data["products"] if isinstance(data, dict) else data
+    return [p for p in products if p.get("isPublished") and p.get("id")]
+
+
+# --- 記事の組み合わせ ---
+
+@dataclass
+class RoundupSpec:
+    """まとめ記事1本分（贈る相手 × シーン × 予算帯と、載せる商品）"""
+    recipient: str
+    occasion: str
+    budget_range: str
+    product_ids: List[str] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return (f"【{self.occasion}】{self.recipient}に贈る{self.budget_range}の"
+                f"プレゼント{len(self.product_ids)}選")
+
+    @property
+    def filename(self) -> str:
+        budget = BUDGET_SLUGS.get(self.budget_range, "other")
+        return f"{self.occasion}_{self.recipient}_{budget}.json"
+
+
+def _order(values: List[str], value: str) -> int:
+    return values.index(value) if value in values else len(values)
+
+
+def plan_roundups(products: Iterable[dict], min_products: int = DEFAULT_MIN_PRODUCTS,
+                  max_products: int = DEFAULT_MAX_PRODUCTS) -> Tuple[List[RoundupSpec], int]:
+    """
+    商品が min_products 件以上ある組み合わせを列挙
+
+    各記事には優先度の高い順（同じなら安い順）に最大 max_products 件を載せる。
+
+    Returns:
+        (記事の組み合わせ, 商品が足りずに見送った組み合わせの数)
+    """
+    groups: Dict[Tuple[str, str, str], List[dict]] = {}
+    for product in products:
+        for recipient in product.get("recipients", []):
+            for occasion in product.get("occasions", []):
+                groups.setdefault((recipient, occasion, product.get("budgetRange", "")), []).append(product)
+
+    budgets = list(BUDGET_SLUGS)
+    specs = []
+    skipped = 0
+    for (recipient, occasion, budget_range), members in sorted(
+            groups.items(), key=lambda item: (_order(OCCASIONS, item[0][1]),
+                                              _order(RECIPIENTS, item[0][0]),
+                                              _order(budgets, item[0][2]), item[0])):
+        if len(members) < min_products:
+            skipped += 1
+            continue
+        members.sort(key=lambda p: (-p.get("priority", 0), p.get("price", 0), p["id"]))
+        specs.append(RoundupSpec(recipient, occasion, budget_range,
+                                 [p["id"] for p in members[:max_products]]))
+    return specs, skipped
+
+
+# --- 記事のHTML ---
+
+def render_roundup(spec: RoundupSpec, products: List[dict], diagnosis_app_url: str) -> GeneratedArticle:
+    """
+    まとめ記事のHTMLを生成（テンプレート src/templates/roundup.html。AIは使わない）
+
+    商品カード・CTAはメモ化されるため、同じ商品が載る記事どうしで描画を使い回す。
+    """
+    content = render(
+        "roundup.html",
+        recipient=spec.recipient,
+        occasion=spec.occasion,
+        budget_range=spec.budget_range,
+        items=[(product, render_product_card(product, diagnosis_app_url)) for product in products],
+        cta=render_cta(diagnosis_app_url),
+    )
+
+    excerpt = f"{spec.occasion}に{spec.recipient}へ贈る、予算{spec.budget_range}のプレゼントを{len(products)}点厳選しました。"
+    return GeneratedArticle(
+        title=spec.title,
+        content=content,
+        excerpt=excerpt,
+        seo_description=excerpt,
+    )
+
+
+def build_payload(spec: RoundupSpec, article: GeneratedArticle, products: Sequence[dict] = ()) -> dict:
+    """
+    投稿用JSON（post_article.py --drafts の1記事分。カテゴリ・タグは名前で指定）
+
+    先頭の商品の画像をアイキャッチ画像にする（投稿時に MediaPipeline でアップロード）。
+    """
+    payload = {
+        "title": article.title,
+        "content": article.content,
+        "excerpt": article.excerpt,
+        "status": "draft",
+        "categories": [spec.occasion],
+        "tags": [spec.recipient, spec.budget_range],
+    }
+    featured = next((p for p in products if p.get("imageUrl")), None)
+    if featured:
+        payload["featuredImage"] = featured["imageUrl"]
+        payload["featuredImageAlt"] = featured["name"]
+    return payload
+
+
+# --- 並列生成 ---
+
+# ワーカープロセスごとの状態（_init_worker で1回だけ設定する）
+_worker_products: Dict[str, dict] = {}
+_worker_diagnosis_app_url = ""
+_worker_out_dir: Optional[Path] = None
+
+
+def _init_worker(products_by_id: Dict[str, dict], diagnosis_app_url: str, out_dir: Path):
+    global _worker_products, _worker_diagnosis_app_url, _worker_out_dir
+    _worker_products = products_by_id
+    _worker_diagnosis_app_url = diagnosis_app_url
+    _worker_out_dir = out_dir
+
+
+def _render_job(spec: RoundupSpec) -> dict:
+    """1記事を生成して書き出し、manifest の1行を返す（本文はプロセス間で送らない）"""
+    started = time.perf_counter()
+    products = [_worker_products[product_id] for product_id in spec.product_ids]
+    article = render_roundup(spec, products, _worker_diagnosis_app_url)
+    data = json.dumps(build_payload(spec, article, products), ensure_ascii=False, indent=2).encode("utf-8")
+    (_worker_out_dir / spec.filename).write_bytes(data)
+    return {
+        "file": spec.filename,
+        "title": spec.title,
+        "recipient": spec.recipient,
+        "occasion": spec.occasion,
+        "budgetRange": spec.budget_range,
+        "productIds": spec.product_ids,
+        "bytes": len(data),
+        "renderMs": round((time.perf_counter() - started) * 1000, 3),
+        "worker": os.getpid(),
+    }
+
+
+class RoundupGenerator:
+    """
+    まとめ記事の一括生成器
+
+    使い方:
+        generator = RoundupGenerator(load_catalogue(), config.diagnosis_app_url)
+        manifest = generator.generate(Path("out/roundups"), workers=4)
+    """
+
+    def __init__(self, products: List[dict], diagnosis_app_url: str,
+                 min_products: int = DEFAULT_MIN_PRODUCTS, max_products: int = DEFAULT_MAX_PRODUCTS):
+        self.products = products
+        self.diagnosis_app_url = diagnosis_app_url
+        self.min_products = min_products
+        self.max_products = max_products
+
+    def plan(self) -> Tuple[List[RoundupSpec], int]:
+        return plan_roundups(self.products, self.min_products, self.max_products)
+
+    def generate(self, out_dir: Path, workers: Optional[int] = None, source: str = "") -> dict:
+        """
+        全記事を生成して out_dir に書き出す
+
+        Args:
+            out_dir: 出力先（前回の manifest にあって今回生成しなかった記事のファイルは削除する）
+            workers: プロセス数（None ならCPU数、1ならプールを使わずにこのプロセスで生成）
+            source: manifest に記録するカタログのパス
+
+        Returns:
+            manifest（manifest.json と同じ内容）
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        workers = workers or os.cpu_count() or 1
+
+        started = time.perf_counter()
+        specs, skipped = self.plan()
+        products_by_id = {p["id"]: p for p in self.products}
+        # 1ジョブが軽いため、ワーカーごとに数回に分けてまとめて渡す
+        chunksize = max(1, len(specs) // (workers * 4))
+
+        if workers == 1 or len(specs) <= 1:
+            _init_worker(products_by_id, self.diagnosis_app_url, out_dir)
+            articles = [_render_job(spec) for spec in specs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(products_by_id, self.diagnosis_app_url, out_dir)) as pool:
+                articles = list(pool.map(_render_job, specs, chunksize=chunksize))
+        total_seconds = time.perf_counter() - started
+
+        self._remove_stale(out_dir, {a["file"] for a in articles})
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "source": str(source),
+            "productCount": len(self.products),
+            "minProducts": self.min_products,
+            "maxProducts": self.max_products,
+            "workers": workers,
+            "articleCount": len(articles),
+            "skippedCombinations": skipped,
+            "totalSeconds": round(total_seconds, 4),
+            "renderSeconds": round(sum(a["renderMs"] for a in articles) / 1000, 4),
+            "articlesPerSecond": round(len(articles) / total_seconds, 1) if total_seconds else 0.0,
+            "articles": articles,
+        }
+        tmp_path = out_dir / f".{MANIFEST_NAME}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, out_dir / MANIFEST_NAME)
+        return manifest
+
+    @staticmethod
+    def _remove_stale(out_dir: Path, keep: set):
+        previous = load_manifest(out_dir)
+        for article in (previous or {}).get("articles", []):
+            if article["file"] not in keep:
+                (out_dir / article["file"]).unlink(missing_ok=True)
+
+
+def load_manifest(out_dir: Path) -> Optional[dict]:
+    """出力先の manifest.json（なければ None）"""
+    try:
+        with open(Path(out_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_payloads(out_dir: Path) -> List[Tuple[Path, dict]]:
+    """manifest の順に投稿用JSONを読み込む（(ファイルのパス, 投稿用JSON) のリスト）"""
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"{Path(out_dir) / MANIFEST_NAME} が見つかりません")
+    payloads = []
+    for article in manifest["articles"]:
+        file = Path(out_dir) / article["file"]
+        with open(file, "r", encoding="utf-8") as f:
+            payloads.append((file, json.load(f)))
+    return payloads
+
+
+# --- ベンチマーク ---
+
+def _generate_catalogue(count: int) -> List[dict]:
+    import random
+    from bisect import bisect_right
+
+    rng = random.Random(0)
+    budgets = list(BUDGET_SLUGS)
+    prices = [rng.randint(500, 50000) for _ in range(count)]
+    return [{
+        "id": f"prod_{i:06d}",
+        "name": f"ギフトセット {i}",
+        "description": f"ベンチマーク用の商品説明 {i}。" * 4,
+        "price": prices[i],
+        "imageUrl": "/images/products/default.jpg",
+        "category": rng.choice(["雑貨", "コスメ", "グルメ", "ファッション"]),
+        "recipients": rng.sample(RECIPIENTS, 4),
+        "occasions": rng.sample(OCCASIONS, 3),
+        "budgetRange": budgets[bisect_right([3000, 5000, 10000, 20000, 30000], prices[i])],
+        "affiliateLinks": [{"provider": "amazon", "url": f"https://www.amazon.co.jp/dp/{i:010d}"}],
+        "tags": ["プチギフト"],
+        "priority": rng.choice([80, 85, 90]),
+        "isPublished": True,
+    } for i in range(count)]
+
+
+def run_benchmark(count: int = 2000):
+    import tempfile
+
+    products = _generate_catalogue(count)
+    generator = RoundupGenerator(products, "https://example.com/diagnose")
+    specs, skipped = generator.plan()
+    print(f"🧮 {count:,}商品 → {len(specs):,}記事（商品不足で見送り {skipped:,}件）")
+    cpus = os.cpu_count() or 1
+    for workers in sorted({1, 2, cpus}):
+        with tempfile.TemporaryDirectory() as out_dir:
+            manifest = generator.generate(Path(out_dir), workers=workers)
+        print(f"   workers={workers:<3} {manifest['totalSeconds']:>7.3f}s  "
+              f"{manifest['articlesPerSecond']:>9,.1f}記事/s  "
+              f"（1記事あたり平均 {manifest['renderSeconds'] / max(1, manifest['articleCount']) * 1000:.2f}ms）")
+
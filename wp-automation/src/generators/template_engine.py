@@ -0,0 +1,171 @@
+"""
+記事HTMLのテンプレートエンジン（Jinja2）
+
+- レイアウトは src/templates/*.html に置き、プロセスごとに1回だけコンパイルする
+  （Environment と Template を lru_cache で保持し、auto_reload もしない）
+- 自動エスケープを有効にしているため、インタビューの回答や商品名などはそのまま渡してよい。
+  HTMLとして埋め込む断片は Markup で渡す
+- 記事間で共通の断片（CTA・商品カード）は、描画に使う値をキーにしてメモ化する。
+  同じ値なら同じ HTML になるため、値が変われば別のキーとして描画し直される
+
+使い方:
+    python main.py --bench templates --count N   # 1万記事の描画ベンチマーク
+"""
+
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple
+from urllib.parse import urljoin
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+from markupsafe import Markup
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+
+PRODUCT_CARD_CACHE_SIZE = 4096
+
+AFFILIATE_LABELS = {"amazon": "Amazonで見る", "rakuten": "楽天市場で見る", "yahoo": "Yahoo!ショッピングで見る"}
+
+
+def _yen(value: int) -> str:
+    return f"{value:,}円"
+
+
+def create_environment() -> Environment:
+    """テンプレートの Environment を作る（通常は get_environment を使う）"""
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        undefined=StrictUndefined,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False,
+    )
+    env.filters["yen"] = _yen
+    return env
+
+
+@lru_cache(maxsize=None)
+def get_environment() -> Environment:
+    """プロセスで共有する Environment"""
+    return create_environment()
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str) -> Template:
+    """コンパイル済みのテンプレート（プロセスごとに1回だけコンパイル）"""
+    return get_environment().get_template(name)
+
+
+def render(template_name: str, /, **context) -> str:
+    return get_template(template_name).render(**context)
+
+
+# --- 断片のメモ化 ---
+
+@lru_cache(maxsize=64)
+def render_cta(diagnosis_url: str) -> Markup:
+    """診断アプリへのCTA（cta_block.html）"""
+    return Markup(render("cta_block.html", diagnosis_url=diagnosis_url))
+
+
+@lru_cache(maxsize=PRODUCT_CARD_CACHE_SIZE)
+def _render_product_card(name: str, description: str, price: int, image_url: str,
+                         links: Tuple[Tuple[str, str], ...], product_url: str,
+                         diagnosis_app_url: str) -> Markup:
+    labeled = [(AFFILIATE_LABELS.get(provider, "商品を見る"), url) for provider, url in links if url]
+    if not labeled and product_url:
+        labeled = [("商品ページを見る", product_url)]
+    return Markup(render(
+        "product_card.html",
+        name=name,
+        description=description,
+        price=price,
+        # 画像は診断アプリ側にあるため、絶対URLにする
+        image_url=urljoin(diagnosis_app_url, image_url) if image_url else "",
+        links=labeled,
+    ))
+
+
+def render_product_card(product: dict, diagnosis_app_url: str) -> Markup:
+    """
+    商品カード（product_card.html。見出しは含まない）
+
+    描画に使う項目だけをキーにするため、優先度・タグなどが変わってもキャッシュは使える。
+    """
+    links = tuple((link["provider"], link["url"]) for link in product.get("affiliateLinks", ()))
+    return _render_product_card(product["name"], product.get("description", ""), product.get("price", 0),
+                                product.get("imageUrl", ""), links, product.get("productUrl", ""),
+                                diagnosis_app_url)
+
+
+def cache_info() -> Dict[str, object]:
+    """断片キャッシュのヒット数など"""
+    return {"cta": render_cta.cache_info(), "product_card": _render_product_card.cache_info()}
+
+
+def clear_caches():
+    render_cta.cache_clear()
+    _render_product_card.cache_clear()
+
+
+# --- ベンチマーク ---
+
+def run_benchmark(count: int = 10_000):
+    """
+    インタビュー記事とまとめ記事を半数ずつ count 件描画する
+
+      - 毎回コンパイル: 記事ごとにテンプレートをコンパイルし直す（遅いため最大1,000記事で測る）
+      - コンパイル済み: テンプレートは使い回し、CTA・商品カードは記事ごとに描画する
+      - 断片キャッシュ: テンプレートを使い回し、CTA・商品カードもメモ化する
+    """
+    from .article_generator import ArticleOutline, InteractiveArticleGenerator
+    from .roundup_generator import RoundupGenerator, _generate_catalogue, render_roundup
+
+    diagnosis_url = "https://example.com/diagnose"
+    products = _generate_catalogue(2000)
+    by_id = {p["id"]: p for p in products}
+    specs, _ = RoundupGenerator(products, diagnosis_url).plan()
+    generator = InteractiveArticleGenerator(diagnosis_url)
+    outlines = [ArticleOutline(
+        title=f"母の日に贈ったハンドクリーム <{i}>",
+        description="",
+        sections=[{"heading": "はじめに", "content": ""}, {"heading": "良かった点", "content": ""},
+                  {"heading": "注意点", "content": "香りが強め & 少量"}],
+        personal_experience=f"母に贈ったら「いい香り」と喜んでくれました。<script>{i}</script>",
+        recommendation_reason="パッケージが可愛い, 香りが上品, 値段が手頃",
+    ) for i in range(100)]
+
+    def recompile():
+        get_environment.cache_clear()
+        get_template.cache_clear()
+        clear_caches()
+
+    def run(label: str, reset, n: int, base: float = 0.0) -> float:
+        """1記事あたりの秒数"""
+        recompile()
+        size = 0
+        started = time.perf_counter()
+        for i in range(n):
+            if reset:
+                reset()
+            if i % 2:
+                size += len(generator.generate_article(outlines[i % len(outlines)]).content)
+            else:
+                spec = specs[i % len(specs)]
+                size += len(render_roundup(spec, [by_id[pid] for pid in spec.product_ids], diagnosis_url).content)
+        per_article = (time.perf_counter() - started) / n
+        print(f"   {label:<14} {n:>7,}記事  {per_article * 1000:>7.3f}ms/記事  {1 / per_article:>9,.0f}記事/s  "
+              f"{(base or per_article) / per_article:>6.1f}x  （平均 {size / n:,.0f} 文字）")
+        return per_article
+
+    print(f"🧮 インタビュー記事・まとめ記事を半数ずつ描画（まとめ記事は{len(specs):,}種類）")
+    base = run("毎回コンパイル", recompile, min(count, 1000))
+    run("コンパイル済み", clear_caches, count, base)
+    run("断片キャッシュ", None, count, base)
+    info = cache_info()
+    card = info["product_card"]
+    print(f"\n   商品カード: ヒット {card.hits:,} / ミス {card.misses:,}（保持 {card.currsize:,}件）"
+          f"  CTA: ヒット {info['cta'].hits:,} / ミス {info['cta'].misses:,}")
+
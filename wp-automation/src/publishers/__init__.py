@@ -1,3 +1,8 @@
 from .wordpress_client import WordPressClient, PostData, PostResult
+from .async_wordpress_client import AsyncWordPressClient
+from .taxonomy_cache import TaxonomyCache, TermIndex
+from .sync_state import SyncState
+from .media_pipeline import MediaPipeline
 
-__all__ = ["WordPressClient", "PostData", "PostResult"]
+__all__ = ["WordPressClient", "AsyncWordPressClient", "TaxonomyCache", "TermIndex", "SyncState", "MediaPipeline",
+           "PostData", "PostResult"]
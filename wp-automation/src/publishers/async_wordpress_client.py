@@ -0,0 +1,336 @@
+"""
+WordPress REST API 非同期クライアント
+
+季節ごとのギフト記事などをまとめて下書き投稿するためのクライアント。
+- 1つの aiohttp.ClientSession（keep-alive の接続プール）をすべてのリクエストで使い回す
+- 同時リクエスト数は concurrency で制限する
+- サーバーが /batch/v1（WordPress 5.6以降）に対応していれば、最大25件を1リクエストにまとめる
+
+カテゴリ・タグ（ターム）は全ページを並列に取得でき、存在しないものはまとめて作成できる
+（名前 → ID の解決とキャッシュは taxonomy_cache.TaxonomyCache）。
+画像はファイルから読みながら /wp/v2/media にアップロードできる
+（縮小・重複の排除・下書きへの添付は media_pipeline.MediaPipeline）。
+
+重要: WordPressClient と同じく、新規作成（記事は下書き）のみ行う。
+"""
+
+import asyncio
+import base64
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from rich.console import Console
+
+from ..utils.config import WordPressConfig
+from .wordpress_client import PostData, PostResult, build_draft_payload, created_result
+
+console = Console()
+
+DEFAULT_CONCURRENCY = 4
+BATCH_MAX_REQUESTS = 25  # /batch/v1 に1回で送れる件数（WordPressの既定値）
+POSTS_ROUTE = "/wp/v2/posts"
+TERMS_PER_PAGE = 100  # REST API の per_page の上限
+TERM_FIELDS = "id,name,slug,parent"
+
+# バッチ自体が受け付けられなかった（どの投稿も作成されていない）ステータス
+BATCH_REJECTED_STATUSES = {400, 404, 405, 501}
+
+
+class AsyncWordPressClient:
+    """
+    WordPress REST API 非同期クライアント
+
+    注意: このクライアントは新規投稿（下書き）のみを行います。
+    既存の記事の更新・削除機能は意図的に実装していません。
+
+    使い方:
+        async with AsyncWordPressClient(config, concurrency=4) as client:
+            results = await client.create_drafts(posts)
+    """
+
+    def __init__(self, config: WordPressConfig, concurrency: int = DEFAULT_CONCURRENCY,
+                 batch_size: int = BATCH_MAX_REQUESTS, timeout: float = 30):
+        self.config = config
+        self.concurrency = concurrency
+        self.batch_size = min(batch_size, BATCH_MAX_REQUESTS)
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._batch_supported: Optional[bool] = None
+
+    async def __aenter__(self) -> "AsyncWordPressClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        """接続プールを作成（Basic認証ヘッダーはセッション全体に設定）"""
+        if self._session is not None:
+            return
+        credentials = f"{self.config.username}:{self.config.app_password}"
+        encoded = base64.b64encode(credentials.encode()).decode()
+        self._session = aiohttp.ClientSession(
+            headers={"Authorization": f"Basic {encoded}"},
+            connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def rest_root(self) -> str:
+        """REST API のルートURL（/wp-json）"""
+        return f"{self.config.url.rstrip('/')}/wp-json"
+
+    async def _request(self, method: str, url: str, **kwargs) -> Tuple[int, object]:
+        """(ステータス, JSON（JSONでなければ本文の文字列）)"""
+        status, data, _ = await self._request_with_headers(method, url, **kwargs)
+        return status, data
+
+    async def _request_with_headers(self, method: str, url: str, **kwargs) -> Tuple[int, object, Dict[str, str]]:
+        """(ステータス, JSON（JSONでなければ本文の文字列）, レスポンスヘッダー)"""
+        await self.open()
+        async with self._semaphore:
+            async with self._session.request(method, url, **kwargs) as response:
+                body = await response.text()
+                headers = dict(response.headers)
+        try:
+            return response.status, json.loads(body), headers
+        except ValueError:
+            return response.status, body, headers
+
+    async def test_connection(self) -> bool:
+        """
+        WordPress接続テスト
+        """
+        try:
+            status, data = await self._request("GET", f"{self.config.api_base}/users/me")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            console.print(f"[red]✗ 接続エラー: {e}[/red]")
+            return False
+        if status == 200 and isinstance(data, dict):
+            console.print(f"[green]✓ WordPress接続成功: {data.get('name', 'Unknown')}[/green]")
+            return True
+        console.print(f"[red]✗ WordPress接続失敗: {status}[/red]")
+        return False
+
+    async def supports_batch(self) -> bool:
+        """サーバーが /batch/v1 に対応しているか（REST API のインデックスで確認し、結果を覚えておく）"""
+        if self._batch_supported is None:
+            try:
+                status, data = await self._request("GET", f"{self.rest_root}/")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+            self._batch_supported = (status == 200 and isinstance(data, dict)
+                                     and "batch/v1" in data.get("namespaces", []))
+        return self._batch_supported
+
+    async def create_draft(self, post: PostData) -> PostResult:
+        """
+        新規記事を下書きとして投稿
+
+        重要: この関数は常に下書き（draft）として投稿します。
+        公開はWordPress管理画面から手動で行ってください。
+        """
+        payload = build_draft_payload(post)
+        try:
+            status, data = await self._request("POST", f"{self.config.api_base}/posts", json=payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return PostResult(success=False, error=f"リクエストエラー: {e}")
+        return self._post_result(status, data)
+
+    def _post_result(self, status: int, data: object) -> PostResult:
+        if status == 201 and isinstance(data, dict):
+            return created_result(self.config, data)
+        return PostResult(success=False, error=f"投稿失敗: {status} - {data}")
+
+    async def _create_batch(self, posts: Sequence[PostData]) -> Optional[List[PostResult]]:
+        """
+        /batch/v1 でまとめて投稿
+
+        Returns:
+            投稿ごとの結果。バッチ自体が受け付けられなかった場合は None（どの投稿も作成されていない）
+        """
+        body = {
+            "validation": "normal",  # 1件の失敗で他の投稿を止めない
+            "requests": [{"method": "POST", "path": POSTS_ROUTE, "body": build_draft_payload(post)}
+                         for post in posts],
+        }
+        try:
+            status, data = await self._request("POST", f"{self.rest_root}/batch/v1", json=body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # 送信後の失敗は作成済みかどうか分からないため、重複を避けて個別に再送しない
+            return [PostResult(success=False, error=f"リクエストエラー（バッチ）: {e}") for _ in posts]
+
+        if status in BATCH_REJECTED_STATUSES:
+            return None
+        responses = data.get("responses") if isinstance(data, dict) else None
+        if status not in (200, 207) or not isinstance(responses, list) or len(responses) != len(posts):
+            return [PostResult(success=False, error=f"投稿失敗（バッチ）: {status} - {data}") for _ in posts]
+        return [self._post_result(item.get("status", 0), item.get("body")) for item in responses]
+
+    async def _create_chunk(self, posts: Sequence[PostData]) -> List[PostResult]:
+        results = await self._create_batch(posts)
+        if results is None:
+            # バッチが使えない（無効化されている・件数の上限が小さいなど）ので個別に投稿する
+            self._batch_supported = False
+            results = list(await asyncio.gather(*(self.create_draft(post) for post in posts)))
+        return results
+
+    async def create_drafts(self, posts: Sequence[PostData],
+                            use_batch: Optional[bool] = None) -> List[PostResult]:
+        """
+        複数の記事を並列に下書き投稿
+
+        Args:
+            use_batch: /batch/v1 を使うか（None ならサーバーの対応状況で決める）
+
+        Returns:
+            posts と同じ順序の投稿結果
+        """
+        posts = list(posts)
+        if not posts:
+            return []
+        if use_batch is None:
+            use_batch = len(posts) > 1 and await self.supports_batch()
+
+        if use_batch:
+            chunks = [posts[i:i + self.batch_size] for i in range(0, len(posts), self.batch_size)]
+            chunk_results = await asyncio.gather(*(self._create_chunk(chunk) for chunk in chunks))
+            return [result for results in chunk_results for result in results]
+        return list(await asyncio.gather(*(self.create_draft(post) for post in posts)))
+
+    # --- カテゴリ・タグ ---
+
+    async def get_terms_page(self, taxonomy: str, page: int = 1,
+                             **params) -> Tuple[List[dict], int, int]:
+        """
+        ターム一覧の1ページ
+
+        Args:
+            taxonomy: "categories" または "tags"
+
+        Returns:
+            (ターム, 全件数 X-WP-Total, 全ページ数 X-WP-TotalPages)
+
+        Raises:
+            aiohttp.ClientError: 取得に失敗した場合
+        """
+        query = {"per_page": TERMS_PER_PAGE, "page": page, "_fields": TERM_FIELDS, **params}
+        status, data, headers = await self._request_with_headers(
+            "GET", f"{self.config.api_base}/{taxonomy}", params=query)
+        if status != 200 or not isinstance(data, list):
+            raise aiohttp.ClientError(f"{taxonomy} の取得に失敗: {status} - {data}")
+        total = int(headers.get("X-WP-Total", len(data)))
+        total_pages = int(headers.get("X-WP-TotalPages", 1))
+        return data, total, total_pages
+
+    async def get_all_terms(self, taxonomy: str, **params) -> List[dict]:
+        """
+        タームを全件取得（1ページ目の X-WP-TotalPages を見て、残りのページを並列に取得）
+
+        Raises:
+            aiohttp.ClientError: 取得に失敗した場合
+        """
+        terms, _, total_pages = await self.get_terms_page(taxonomy, 1, **params)
+        pages = await asyncio.gather(*(self.get_terms_page(taxonomy, page, **params)
+                                       for page in range(2, total_pages + 1)))
+        for page_terms, _, _ in pages:
+            terms.extend(page_terms)
+        return terms
+
+    def _term_result(self, name: str, status: int, data: object) -> Optional[dict]:
+        if status == 201 and isinstance(data, dict):
+            return {key: data.get(key) for key in ("id", "name", "slug", "parent")}
+        if isinstance(data, dict) and data.get("code") == "term_exists":
+            # 同時に作成された・キャッシュが古いなどで既に存在する
+            return {"id": data.get("data", {}).get("term_id"), "name": name, "slug": "", "parent": 0}
+        console.print(f"[red]✗ 「{name}」を作成できませんでした: {status} - {data}[/red]")
+        return None
+
+    async def _create_term(self, taxonomy: str, name: str) -> Optional[dict]:
+        try:
+            status, data = await self._request("POST", f"{self.config.api_base}/{taxonomy}", json={"name": name})
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            console.print(f"[red]✗ 「{name}」を作成できませんでした: {e}[/red]")
+            return None
+        return self._term_result(name, status, data)
+
+    async def create_terms(self, taxonomy: str, names: Sequence[str]) -> List[Optional[dict]]:
+        """
+        タームをまとめて新規作成（/batch/v1 に対応していれば25件ずつ1リクエスト）
+
+        既に存在する名前は既存のIDを返す。既存のタームは変更しない。
+
+        Returns:
+            names と同じ順序の作成結果（{"id", "name", "slug", "parent"}。失敗は None）
+        """
+        names = list(names)
+        if not names:
+            return []
+        if len(names) == 1 or not await self.supports_batch():
+            return list(await asyncio.gather(*(self._create_term(taxonomy, name) for name in names)))
+
+        async def create_chunk(chunk: List[str]) -> List[Optional[dict]]:
+            body = {
+                "validation": "normal",
+                "requests": [{"method": "POST", "path": f"/wp/v2/{taxonomy}", "body": {"name": name}}
+                             for name in chunk],
+            }
+            try:
+                status, data = await self._request("POST", f"{self.rest_root}/batch/v1", json=body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                console.print(f"[red]✗ タームを作成できませんでした（バッチ）: {e}[/red]")
+                return [None] * len(chunk)
+            if status in BATCH_REJECTED_STATUSES:
+                self._batch_supported = False
+                return list(await asyncio.gather(*(self._create_term(taxonomy, name) for name in chunk)))
+            responses = data.get("responses") if isinstance(data, dict) else None
+            if not isinstance(responses, list) or len(responses) != len(chunk):
+                console.print(f"[red]✗ タームを作成できませんでした（バッチ）: {status} - {data}[/red]")
+                return [None] * len(chunk)
+            return [self._term_result(name, item.get("status", 0), item.get("body"))
+                    for name, item in zip(chunk, responses)]
+
+        chunks = [names[i:i + self.batch_size] for i in range(0, len(names), self.batch_size)]
+        results = await asyncio.gather(*(create_chunk(chunk) for chunk in chunks))
+        return [term for chunk_results in results for term in chunk_results]
+
+    # --- メディア ---
+
+    async def upload_media(self, path: Path, filename: str, mime_type: str,
+                           alt_text: str = "") -> Optional[dict]:
+        """
+        画像ファイルを /wp/v2/media にアップロード（ファイル全体をメモリに読まず、読みながら送信する）
+
+        Args:
+            filename: WordPress に保存するファイル名（ASCII）
+            alt_text: 代替テキスト（作成と同時に設定する）
+
+        Returns:
+            {"id", "source_url"}。失敗は None
+        """
+        headers = {
+            "Content-Type": mime_type,
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        }
+        params = {"alt_text": alt_text} if alt_text else None
+        try:
+            with open(path, "rb") as f:
+                status, data = await self._request("POST", f"{self.config.api_base}/media",
+                                                   data=f, headers=headers, params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            console.print(f"[red]✗ {filename} をアップロードできませんでした: {e}[/red]")
+            return None
+        if status == 201 and isinstance(data, dict):
+            return {"id": data.get("id"), "source_url": data.get("source_url", "")}
+        console.print(f"[red]✗ {filename} をアップロードできませんでした: {status} - {data}[/red]")
+        return None
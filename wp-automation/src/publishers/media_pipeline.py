@@ -0,0 +1,346 @@
+"""
+アイキャッチ画像のアップロード（縮小・重複の排除・下書きへの添付）
+
+画像1枚ごとに 読み込み → 内容のハッシュ → 縮小・再エンコード → アップロード を行い、
+全ての画像を並行に進める。
+- 縮小・再エンコード（Pillow）はCPUを使うため、プロセスプールで行う。再エンコードで
+  EXIF（撮影位置など）は取り除かれる
+- 元画像の内容のハッシュと変換の設定をキーに、アップロード済みのメディアIDを
+  .cache/media_index.json に記録する。同じ画像は（URLやファイル名が違っても）二度と
+  アップロードしない。変換後の内容が同じ場合も既存のメディアを使う
+- アップロードは AsyncWordPressClient の同時接続数の範囲で、変換後のファイルから
+  読みながら送信する
+
+画像の指定:
+    - http(s):// のURL（WordPress の認証情報は送らない）
+    - /images/... のような診断アプリの画像（リポジトリの public/ にあればそれを、
+      なければ診断アプリのURLから取得）
+    - ローカルのファイルパス
+
+使い方:
+    async with AsyncWordPressClient(config) as client:
+        pipeline = MediaPipeline(client, diagnosis_app_url=config_url)
+        await pipeline.attach(posts, [article.get("featuredImage") for article in articles])
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from rich.console import Console
+
+from .async_wordpress_client import AsyncWordPressClient
+from .wordpress_client import PostData
+
+console = Console()
+
+CACHE_DIR = Path(__file__).parent.parent.parent / ".cache"
+INDEX_PATH = CACHE_DIR / "media_index.json"
+OUTPUT_DIR = CACHE_DIR / "media"
+PUBLIC_DIR = Path(__file__).parent.parent.parent.parent / "public"  # 診断アプリ（Next.js）の静的ファイル
+INDEX_VERSION = 1
+
+DEFAULT_MAX_SIZE = 1200  # 長辺（px）。これより小さい画像は拡大しない
+DEFAULT_QUALITY = 82
+DEFAULT_FORMAT = "jpeg"
+FORMATS = {"jpeg": ("image/jpeg", ".jpg"), "webp": ("image/webp", ".webp")}
+
+DOWNLOAD_CONCURRENCY = 4
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def check_pillow():
+    """Pillow がなければ ImportError（メッセージに導入方法を含める）"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError as e:
+        raise ImportError("画像の縮小には Pillow が必要です（pip install -r requirements.txt）") from e
+
+
+def process_image(data: bytes, max_size: int, quality: int, fmt: str) -> Tuple[bytes, int, int]:
+    """
+    画像を縮小・再エンコード（プロセスプールで実行する）
+
+    Returns:
+        (変換後の内容, 幅, 高さ)
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            # JPEG は透過できないため、透過部分を白で塗る
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        out = io.BytesIO()
+        if fmt == "jpeg":
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(out, "WEBP", quality=quality, method=4)
+        return out.getvalue(), image.width, image.height
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _upload_filename(source: str, digest: str, ext: str) -> str:
+    """WordPress に保存するファイル名（元のファイル名のASCII部分 + ハッシュの先頭）"""
+    stem = Path(urlparse(source).path).stem
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "-", stem).strip("-")[:40]
+    return f"{stem}-{digest[:8]}{ext}" if stem else f"{digest[:16]}{ext}"
+
+
+class MediaPipeline:
+    """アイキャッチ画像のアップロードとメディアIDの記録"""
+
+    def __init__(self, client: AsyncWordPressClient, diagnosis_app_url: str = "",
+                 max_size: int = DEFAULT_MAX_SIZE, quality: int = DEFAULT_QUALITY,
+                 fmt: str = DEFAULT_FORMAT, workers: Optional[int] = None,
+                 index_path: Path = INDEX_PATH, output_dir: Path = OUTPUT_DIR,
+                 public_dir: Path = PUBLIC_DIR):
+        check_pillow()
+        if fmt not in FORMATS:
+            raise ValueError(f"未対応の形式です: {fmt}（{', '.join(FORMATS)}）")
+        self.client = client
+        self.diagnosis_app_url = diagnosis_app_url
+        self.max_size = max_size
+        self.quality = quality
+        self.fmt = fmt
+        self.workers = workers or os.cpu_count() or 1
+        self.index_path = Path(index_path)
+        self.output_dir = Path(output_dir)
+        self.public_dir = Path(public_dir)
+        self.site = client.config.url.rstrip("/")
+        # 変換の設定が変われば別の画像としてアップロードする
+        self.variant = f"{fmt}-{max_size}-q{quality}"
+        self._index: Optional[dict] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[Executor] = None
+        self._downloads: Optional[aiohttp.ClientSession] = None
+        self._download_semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+        self.stats = {"sources": 0, "reused": 0, "duplicates": 0, "processed": 0, "uploaded": 0,
+                      "failed": 0, "bytesIn": 0, "bytesOut": 0}
+
+    # --- 索引 ---
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "sites": {}}
+
+    @property
+    def index(self) -> dict:
+        """このサイトの {"sources": {元のハッシュ:設定: メディア}, "outputs": {変換後のハッシュ: メディアID}}"""
+        if self._index is None:
+            site = self._read_all()["sites"].get(self.site, {})
+            self._index = {"sources": site.get("sources", {}), "outputs": site.get("outputs", {})}
+        return self._index
+
+    def save(self):
+        """索引を保存（他のサイトの分は読み直して残す。一時ファイルからrenameで置き換える）"""
+        if self._index is None:
+            return
+        data = self._read_all()
+        data["sites"][self.site] = self._index
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    # --- 読み込み ---
+
+    async def _download(self, url: str) -> bytes:
+        if self._downloads is None:
+            # WordPress の認証ヘッダーを他のサイトに送らないよう、別のセッションを使う
+            self._downloads = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60))
+        async with self._download_semaphore:
+            async with self._downloads.get(url) as response:
+                if response.status != 200:
+                    raise OSError(f"{response.status} {url}")
+                too_large = OSError(f"画像が {MAX_SOURCE_BYTES // (1024 * 1024)}MB を超えています: {url}")
+                if (response.content_length or 0) > MAX_SOURCE_BYTES:
+                    raise too_large
+                # Content-Length のない（chunked の）レスポンスも、上限を超えた時点で打ち切る
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    data += chunk
+                    if len(data) > MAX_SOURCE_BYTES:
+                        raise too_large
+                return bytes(data)
+
+    async def _read_source(self, source: str) -> bytes:
+        if source.startswith(("http://", "https://")):
+            return await self._download(source)
+        path = Path(source).expanduser()
+        if source.startswith("/"):
+            public = self.public_dir / source.lstrip("/")
+            if public.is_file():
+                return await asyncio.to_thread(public.read_bytes)
+            if not path.is_file():
+                if not self.diagnosis_app_url:
+                    raise OSError(f"{public} がなく、診断アプリのURLも設定されていません")
+                return await self._download(urljoin(self.diagnosis_app_url, source))
+        return await asyncio.to_thread(path.read_bytes)
+
+    # --- 変換・アップロード ---
+
+    async def _process_and_upload(self, key: str, data: bytes, source: str, alt_text: str) -> Optional[int]:
+        """変換してアップロードし、メディアIDを返す（失敗は None。例外は出さない）"""
+        loop = asyncio.get_running_loop()
+        try:
+            output, width, height = await loop.run_in_executor(
+                self._executor, process_image, data, self.max_size, self.quality, self.fmt)
+        except Exception as e:  # 壊れた画像など（Pillow の例外は種類が多い）
+            self.stats["failed"] += 1
+            console.print(f"[red]✗ 画像を変換できませんでした: {source}: {e}[/red]")
+            return None
+        self.stats["processed"] += 1
+
+        output_digest = _digest(output)
+        existing = self.index["outputs"].get(output_digest)
+        if existing is not None:
+            # 次回からは元画像のハッシュだけで見つかるよう、この元画像も記録する
+            self.stats["reused"] += 1
+            url = next((entry.get("url", "") for entry in self.index["sources"].values()
+                        if entry.get("outputHash") == output_digest), "")
+            self._record(key, existing, url, output_digest, width, height, len(output), source)
+            return existing
+
+        mime_type, ext = FORMATS[self.fmt]
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{output_digest[:32]}{ext}"
+        if not path.exists():
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(output)
+            os.replace(tmp_path, path)
+
+        media = await self.client.upload_media(path, _upload_filename(source, output_digest, ext),
+                                               mime_type, alt_text)
+        if media is None or media.get("id") is None:
+            self.stats["failed"] += 1
+            return None
+
+        self.stats["uploaded"] += 1
+        self.stats["bytesIn"] += len(data)
+        self.stats["bytesOut"] += len(output)
+        self._record(key, media["id"], media["source_url"], output_digest, width, height, len(output), source)
+        self.index["outputs"][output_digest] = media["id"]
+        return media["id"]
+
+    def _record(self, key: str, media_id: int, url: str, output_digest: str,
+                width: int, height: int, size: int, source: str):
+        self.index["sources"][key] = {
+            "id": media_id,
+            "url": url,
+            "outputHash": output_digest,
+            "width": width,
+            "height": height,
+            "bytes": size,
+            "source": source,
+            "uploadedAt": time.time(),
+        }
+
+    async def media_id_for(self, source: str, alt_text: str = "") -> Optional[int]:
+        """
+        画像のメディアID（アップロード済みなら索引から、なければ変換してアップロード）
+
+        同じ内容の画像を同時に求められた場合、変換・アップロードは1回だけ行う。
+        """
+        try:
+            data = await self._read_source(source)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            self.stats["failed"] += 1
+            console.print(f"[red]✗ 画像を読み込めませんでした: {source}: {e}[/red]")
+            return None
+
+        key = f"{_digest(data)}:{self.variant}"
+        known = self.index["sources"].get(key)
+        if known is not None:
+            self.stats["reused"] += 1
+            return known["id"]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["duplicates"] += 1
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(
+                self._process_and_upload(key, data, source, alt_text))
+        return await task
+
+    async def upload_all(self, images: Iterable[Tuple[str, str]]) -> Dict[str, Optional[int]]:
+        """
+        画像をまとめてアップロード
+
+        Args:
+            images: (画像の指定, 代替テキスト)
+
+        Returns:
+            画像の指定 → メディアID（失敗は None）
+        """
+        unique: Dict[str, str] = {}
+        for source, alt_text in images:
+            unique.setdefault(source, alt_text)
+        self.stats["sources"] += len(unique)
+        if self._executor is None:
+            # 1プロセスならスレッドで変換する（イベントループは止めない）
+            self._executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            media_ids = await asyncio.gather(*(self.media_id_for(source, alt) for source, alt in unique.items()))
+        finally:
+            self.save()
+            await self.close()
+        return dict(zip(unique, media_ids))
+
+    async def attach(self, posts: Sequence[PostData], images: Sequence[Optional[str]],
+                     alt_texts: Optional[Sequence[str]] = None) -> int:
+        """
+        画像をアップロードして PostData.featured_media に設定（既に設定されている投稿は変更しない）
+
+        Returns:
+            アイキャッチ画像を設定した投稿の数
+        """
+        alt_texts = alt_texts or [post.title for post in posts]
+        wanted = [(post, image, alt) for post, image, alt in zip(posts, images, alt_texts)
+                  if image and not post.featured_media]
+        media_ids = await self.upload_all((image, alt) for _, image, alt in wanted)
+        attached = 0
+        for post, image, _ in wanted:
+            media_id = media_ids.get(image)
+            if media_id:
+                post.featured_media = media_id
+                attached += 1
+        return attached
+
+    async def close(self):
+        if self._downloads is not None:
+            await self._downloads.close()
+            self._downloads = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def summary(self) -> str:
+        s = self.stats
+        saved = f"（{1 - s['bytesOut'] / s['bytesIn']:.0%}削減）" if s["bytesIn"] else ""
+        return (f"画像 {s['sources']}件: アップロード {s['uploaded']}件, アップロード済みを使用 {s['reused']}件, "
+                f"同じ画像 {s['duplicates']}件, 失敗 {s['failed']}件 / "
+                f"{s['bytesIn'] / 1024:,.0f}KB → {s['bytesOut'] / 1024:,.0f}KB{saved}")
@@ -0,0 +1,118 @@
+"""
+投稿済み記事の同期状態（内容のハッシュ）
+
+投稿IDごとに、最後に送ったタイトル・本文・抜粋のハッシュを保存する。
+ローカルの記事と比べて変わった項目だけを送れば、変わっていない記事にはリクエストを
+出さず、WordPress にリビジョンも作られない。
+
+- ハッシュは「こちらから最後に送った内容」のもの。WordPress の管理画面で編集された内容は
+  検出しない（ローカル側が変わったときにだけ送る）
+- 状態のない投稿は、サーバーの現在の内容（context=edit の raw）からハッシュを作れる
+
+保存形式（.cache/sync_state.json）:
+  {"version": 1, "sites": {サイトURL: {"posts": {投稿ID: {"title", "content", "excerpt",
+                                                          "source", "syncedAt"}}}}}
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_PATH = Path(__file__).parent.parent.parent / ".cache" / "sync_state.json"
+STATE_VERSION = 1
+
+# 同期する項目
+SYNC_FIELDS = ("title", "content", "excerpt")
+
+
+def field_hash(value: str) -> str:
+    """項目の内容のハッシュ"""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+
+def encode_body(payload: dict) -> bytes:
+    """
+    リクエスト本文（UTF-8 のJSON）
+
+    requests の json= は日本語を \\uXXXX（6バイト）にエスケープするため、自前でエンコードする。
+    """
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SyncState:
+    """サイトごとの投稿の同期状態"""
+
+    def __init__(self, site_url: str, path: Path = STATE_PATH):
+        self.site = site_url.rstrip("/")
+        self.path = Path(path)
+        self._posts: Optional[Dict[str, dict]] = None
+        self._sources: Optional[Dict[str, int]] = None
+        self._dirty = False
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": STATE_VERSION, "sites": {}}
+
+    @property
+    def posts(self) -> Dict[str, dict]:
+        if self._posts is None:
+            self._posts = self._read_all()["sites"].get(self.site, {}).get("posts", {})
+        return self._posts
+
+    def get(self, post_id: int) -> Optional[dict]:
+        return self.posts.get(str(post_id))
+
+    def post_id_for(self, source: str) -> Optional[int]:
+        """記事ファイルのパスから投稿ID（--drafts で投稿したときに記録したもの）"""
+        if self._sources is None:
+            self._sources = {entry["source"]: int(post_id)
+                             for post_id, entry in self.posts.items() if entry.get("source")}
+        return self._sources.get(source)
+
+    def changed_fields(self, post_id: int, article: Dict[str, str]) -> Optional[List[str]]:
+        """
+        前回送った内容から変わった項目
+
+        Returns:
+            変わった項目名（変わっていなければ空）。状態がなければ None
+        """
+        entry = self.get(post_id)
+        if entry is None:
+            return None
+        return [name for name in SYNC_FIELDS
+                if name in article and field_hash(article[name]) != entry.get(name)]
+
+    def record(self, post_id: int, fields: Dict[str, str], source: Optional[str] = None):
+        """送った（またはサーバーにある）項目のハッシュを記録"""
+        entry = self.posts.setdefault(str(post_id), {})
+        for name in SYNC_FIELDS:
+            if name in fields:
+                entry[name] = field_hash(fields[name])
+        if source:
+            entry["source"] = source
+            if self._sources is not None:
+                self._sources[source] = post_id
+        entry["syncedAt"] = time.time()
+        self._dirty = True
+
+    def save(self):
+        """変更があれば保存（他のサイトの状態は読み直して残す。一時ファイルからrenameで置き換える）"""
+        if not self._dirty:
+            return
+        data = self._read_all()
+        data["sites"].setdefault(self.site, {})["posts"] = self.posts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,260 @@
+"""
+カテゴリ・タグ（ターム）のキャッシュと名前 → ID の解決
+
+- 全ページを X-WP-TotalPages を見て並列に取得し、.cache/taxonomy.json に保存する
+- TTL内はネットワークに出ない。TTL切れは「IDの新しい順に、既知のIDより新しいものだけ」を
+  取り直す差分更新で、件数（X-WP-Total）が合わない場合や FULL_REFRESH_AFTER を過ぎた場合は
+  全件を取り直す
+- 件数で分かるのは削除の一部だけ。名前・スラッグの変更や、削除と追加が同数の場合は件数が
+  変わらないため、FULL_REFRESH_AFTER の全件取得まで古い名前のまま残る
+- 名前・スラッグからIDへの解決は辞書で O(1)。全角・半角、大文字・小文字、HTMLエスケープの
+  違いは無視する
+
+使い方:
+    async with AsyncWordPressClient(config) as client:
+        cache = TaxonomyCache(client)
+        missing = await cache.fill_posts(posts, create_missing=True)
+"""
+
+import html
+import json
+import os
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+from rich.console import Console
+
+from .async_wordpress_client import AsyncWordPressClient
+from .wordpress_client import PostData
+
+console = Console()
+
+CACHE_PATH = Path(__file__).parent.parent.parent / ".cache" / "taxonomy.json"
+CACHE_VERSION = 1
+DEFAULT_TTL = 24 * 60 * 60  # 1日（過ぎたら差分更新）
+FULL_REFRESH_AFTER = 7 * 24 * 60 * 60  # 1週間（過ぎたら全件を取り直す）
+
+TAXONOMIES = ("categories", "tags")
+
+
+def normalize_term_name(name: str) -> str:
+    """比較用のターム名（REST API の名前はHTMLエスケープされている）"""
+    return unicodedata.normalize("NFKC", html.unescape(name)).casefold().strip()
+
+
+def _slug_key(slug: str) -> str:
+    # 日本語のスラッグはパーセントエンコードされている
+    return unquote(slug).casefold()
+
+
+class TermIndex:
+    """1タクソノミー分のターム（名前・スラッグ → ID）"""
+
+    def __init__(self, terms: Iterable[dict] = ()):
+        self.terms: Dict[int, dict] = {}
+        self.by_name: Dict[str, int] = {}
+        self.by_slug: Dict[str, int] = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: dict):
+        term_id = term["id"]
+        self.terms[term_id] = term
+        # 同名のタームが複数ある場合（親の異なるカテゴリなど）は先に見つかったものを使う
+        self.by_name.setdefault(normalize_term_name(term.get("name", "")), term_id)
+        if term.get("slug"):
+            self.by_slug.setdefault(_slug_key(term["slug"]), term_id)
+
+    def resolve(self, name: str) -> Optional[int]:
+        """名前またはスラッグからID（見つからなければ None）"""
+        term_id = self.by_name.get(normalize_term_name(name))
+        if term_id is None:
+            term_id = self.by_slug.get(_slug_key(name.strip()))
+        return term_id
+
+    @property
+    def max_id(self) -> int:
+        return max(self.terms, default=0)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+class TaxonomyCache:
+    """サイトごとのカテゴリ・タグのキャッシュ"""
+
+    def __init__(self, client: AsyncWordPressClient, path: Path = CACHE_PATH,
+                 ttl: float = DEFAULT_TTL, full_refresh_after: float = FULL_REFRESH_AFTER):
+        self.client = client
+        self.path = Path(path)
+        self.ttl = ttl
+        self.full_refresh_after = full_refresh_after
+        self.site = client.config.url.rstrip("/")
+        self._indexes: Dict[str, TermIndex] = {}
+        self.stats = {"full": 0, "incremental": 0, "created": 0}
+
+    # --- 保存・読み込み ---
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": CACHE_VERSION, "sites": {}}
+
+    def _read_entry(self, taxonomy: str) -> Optional[dict]:
+        return self._read_all()["sites"].get(self.site, {}).get(taxonomy)
+
+    def _write_entry(self, taxonomy: str, entry: dict):
+        """一時ファイルに書いてからrenameで置き換える"""
+        data = self._read_all()
+        data["sites"].setdefault(self.site, {})[taxonomy] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    # --- 取得 ---
+
+    async def _fetch_all(self, taxonomy: str) -> List[dict]:
+        self.stats["full"] += 1
+        return await self.client.get_all_terms(taxonomy)
+
+    async def _fetch_new(self, taxonomy: str, index: TermIndex) -> Optional[List[dict]]:
+        """
+        既知のIDより新しいタームだけを取得（IDの新しい順に、既知のIDが出てくるページまで）
+
+        Returns:
+            新しいターム。件数が合わない（削除があった）場合は None。
+            名前の変更は件数に表れないため、ここでは検出しない
+        """
+        self.stats["incremental"] += 1
+        known_max = index.max_id
+        new_terms: List[dict] = []
+        page = 1
+        while True:
+            terms, total, total_pages = await self.client.get_terms_page(
+                taxonomy, page, orderby="id", order="desc")
+            fresh = [term for term in terms if term["id"] > known_max]
+            new_terms.extend(fresh)
+            if len(fresh) < len(terms) or page >= total_pages:
+                break
+            page += 1
+        if total != len(index) + len(new_terms):
+            return None
+        return new_terms
+
+    async def load(self, taxonomy: str, force: bool = False) -> TermIndex:
+        """
+        タームの索引（キャッシュがTTL内ならネットワークに出ない）
+
+        Args:
+            taxonomy: "categories" または "tags"
+            force: TTLにかかわらず全件を取り直す
+        """
+        if taxonomy in self._indexes and not force:
+            return self._indexes[taxonomy]
+
+        now = time.time()
+        entry = None if force else self._read_entry(taxonomy)
+        if entry is not None and now - entry["fetchedAt"] < self.ttl:
+            index = TermIndex(entry["terms"])
+        else:
+            index = None
+            full_fetched_at = now
+            if entry is not None and now - entry["fullFetchedAt"] < self.full_refresh_after:
+                index = TermIndex(entry["terms"])
+                new_terms = await self._fetch_new(taxonomy, index)
+                if new_terms is None:
+                    index = None
+                else:
+                    for term in new_terms:
+                        index.add(term)
+                    full_fetched_at = entry["fullFetchedAt"]
+            if index is None:
+                index = TermIndex(await self._fetch_all(taxonomy))
+            self._write_entry(taxonomy, {
+                "fetchedAt": now,
+                "fullFetchedAt": full_fetched_at,
+                "terms": list(index.terms.values()),
+            })
+        self._indexes[taxonomy] = index
+        return index
+
+    def _save_index(self, taxonomy: str):
+        entry = self._read_entry(taxonomy) or {"fetchedAt": time.time(), "fullFetchedAt": time.time()}
+        entry["terms"] = list(self._indexes[taxonomy].terms.values())
+        self._write_entry(taxonomy, entry)
+
+    # --- 解決 ---
+
+    async def resolve(self, taxonomy: str, names: Iterable[str],
+                      create_missing: bool = False) -> Tuple[Dict[str, int], List[str]]:
+        """
+        名前（またはスラッグ）をまとめてIDに解決
+
+        Args:
+            create_missing: 見つからない名前のタームをまとめて新規作成する
+
+        Returns:
+            (名前 → ID, 解決できなかった名前)
+        """
+        index = await self.load(taxonomy)
+        names = list(dict.fromkeys(name for name in names if name and name.strip()))
+        resolved: Dict[str, int] = {}
+        missing: List[str] = []
+        for name in names:
+            term_id = index.resolve(name)
+            if term_id is None:
+                missing.append(name)
+            else:
+                resolved[name] = term_id
+
+        if missing and create_missing:
+            created = await self.client.create_terms(taxonomy, missing)
+            still_missing = []
+            for name, term in zip(missing, created):
+                if term is None or term.get("id") is None:
+                    still_missing.append(name)
+                    continue
+                term["name"] = term.get("name") or name
+                index.add(term)
+                resolved[name] = term["id"]
+                self.stats["created"] += 1
+            missing = still_missing
+            self._save_index(taxonomy)
+        return resolved, missing
+
+    async def fill_posts(self, posts: Iterable[PostData],
+                         create_missing: bool = False) -> Dict[str, List[str]]:
+        """
+        PostData.category_names / tag_names を categories / tags のIDに解決して設定
+
+        全記事の名前をまとめて解決するため、記事数によらずリクエストはタクソノミーごとに
+        キャッシュの更新（と、create_missing なら不足分の作成）だけで済む。
+
+        Returns:
+            タクソノミーごとの解決できなかった名前
+        """
+        posts = list(posts)
+        missing: Dict[str, List[str]] = {}
+        for taxonomy, names_attr, ids_attr in (("categories", "category_names", "categories"),
+                                               ("tags", "tag_names", "tags")):
+            names = [name for post in posts for name in getattr(post, names_attr)]
+            if not names:
+                continue
+            resolved, missing[taxonomy] = await self.resolve(taxonomy, names, create_missing)
+            for post in posts:
+                ids = getattr(post, ids_attr)
+                for name in getattr(post, names_attr):
+                    term_id = resolved.get(name)
+                    if term_id is not None and term_id not in ids:
+                        ids.append(term_id)
+        return {taxonomy: names for taxonomy, names in missing.items() if names}
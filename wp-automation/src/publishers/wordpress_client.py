@@ -25,12 +25,19 @@ class PostData:
     categories: list[int] = None
     tags: list[int] = None
     featured_media: int = 0
+    # 名前で指定するカテゴリ・タグ（TaxonomyCache.fill_posts で categories / tags のIDに解決）
+    category_names: list[str] = None
+    tag_names: list[str] = None
 
     def __post_init__(self):
         if self.categories is None:
             self.categories = []
         if self.tags is None:
             self.tags = []
+        if self.category_names is None:
+            self.category_names = []
+        if self.tag_names is None:
+            self.tag_names = []
 
 
 @dataclass
@@ -43,6 +50,41 @@ class PostResult:
     error: Optional[str] = None
 
 
+def build_draft_payload(post: PostData) -> dict:
+    """
+    新規投稿のリクエスト本文
+
+    安全のため、PostData の status にかかわらず常に draft にする。
+    """
+    post.status = "draft"
+
+    payload = {
+        "title": post.title,
+        "content": post.content,
+        "excerpt": post.excerpt,
+        "status": "draft",
+    }
+
+    if post.categories:
+        payload["categories"] = post.categories
+    if post.tags:
+        payload["tags"] = post.tags
+    if post.featured_media:
+        payload["featured_media"] = post.featured_media
+    return payload
+
+
+def created_result(config: WordPressConfig, data: dict) -> PostResult:
+    """投稿作成APIのレスポンス（201）から PostResult を作る"""
+    post_id = data.get("id")
+    return PostResult(
+        success=True,
+        post_id=post_id,
+        post_url=data.get("link"),
+        edit_url=f"{config.url}/wp-admin/post.php?post={post_id}&action=edit",
+    )
+
+
 class WordPressClient:
     """
     WordPress REST API クライアント
@@ -92,22 +134,7 @@ class WordPressClient:
         重要: この関数は常に下書き（draft）として投稿します。
         公開はWordPress管理画面から手動で行ってください。
         """
-        # 安全のため、常にdraftを強制
-        post.status = "draft"
-
-        payload = {
-            "title": post.title,
-            "content": post.content,
-            "excerpt": post.excerpt,
-            "status": "draft",
-        }
-
-        if post.categories:
-            payload["categories"] = post.categories
-        if post.tags:
-            payload["tags"] = post.tags
-        if post.featured_media:
-            payload["featured_media"] = post.featured_media
+        payload = build_draft_payload(post)
 
         try:
             response = self.session.post(
@@ -117,15 +144,7 @@ class WordPressClient:
             )
 
             if response.status_code == 201:
-                data = response.json()
-                post_id = data.get("id")
-
-                return PostResult(
-                    success=True,
-                    post_id=post_id,
-                    post_url=data.get("link"),
-                    edit_url=f"{self.config.url}/wp-admin/post.php?post={post_id}&action=edit",
-                )
+                return created_result(self.config, response.json())
             else:
                 return PostResult(
                     success=False,
@@ -138,30 +157,40 @@ class WordPressClient:
                 error=f"リクエストエラー: {e}",
             )
 
-    def get_categories(self) -> list[dict]:
-        """カテゴリ一覧を取得"""
+    def _get_all_terms(self, taxonomy: str) -> list[dict]:
+        """
+        タームを全ページ取得（X-WP-TotalPages まで順に取得）
+
+        途中のページで失敗した場合は、一部だけの一覧を返さずに空の一覧を返す。
+        """
+        terms = []
+        page = 1
         try:
-            response = self.session.get(
-                f"{self.config.api_base}/categories",
-                params={"per_page": 100},
-                timeout=10,
-            )
-            if response.status_code == 200:
-                return response.json()
-            return []
-        except requests.RequestException:
+            while True:
+                response = self.session.get(
+                    f"{self.config.api_base}/{taxonomy}",
+                    params={"per_page": 100, "page": page},
+                    timeout=10,
+                )
+                if response.status_code != 200:
+                    console.print(f"[red]✗ {taxonomy} の取得に失敗（{page}ページ目）: {response.status_code}[/red]")
+                    return []
+                terms.extend(response.json())
+                if page >= int(response.headers.get("X-WP-TotalPages", 1)):
+                    return terms
+                page += 1
+        except requests.RequestException as e:
+            console.print(f"[red]✗ {taxonomy} の取得に失敗（{page}ページ目）: {e}[/red]")
             return []
 
+    def get_categories(self) -> list[dict]:
+        """
+        カテゴリ一覧を取得（全ページ）
+
+        名前からIDへの解決を繰り返す場合は、キャッシュする TaxonomyCache を使ってください。
+        """
+        return self._get_all_terms("categories")
+
     def get_tags(self) -> list[dict]:
-        """タグ一覧を取得"""
-        try:
-            response = self.session.get(
-                f"{self.config.api_base}/tags",
-                params={"per_page": 100},
-                timeout=10,
-            )
-            if response.status_code == 200:
-                return response.json()
-            return []
-        except requests.RequestException:
-            return []
+        """タグ一覧を取得（全ページ）"""
+        return self._get_all_terms("tags")